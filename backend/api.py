@@ -1,7 +1,7 @@
 import os
 import shutil
 from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
+from fastapi.responses import JSONResponse, FileResponse, HTMLResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
@@ -11,31 +11,22 @@ import json
 from pathlib import Path
 import tempfile
 import uuid
-import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
-import uvicorn
-import cv2
 import time  # Add this import for task tracking
 import asyncio
 import traceback
+from contextlib import asynccontextmanager
 
-# Import your modules
-from src.demand_waste.data_preprocessor import load_inventory_data
-from src.demand_waste.waste_predictor import predict_waste
-from src.smart_kitchen.data_preprocessor import DataPreprocessor
-from src.smart_kitchen.sales_forecaster_prophet import SalesForecaster
-from src.menu_optimization.recipe_recommender import RecipeRecommender
-from src.menu_optimization.recipe_generator import RecipeGenerator
-from src.menu_optimization.cost_optimizer import CostOptimizer
-from src.food_spoilage_detection.food_spoilage_detection import FoodSpoilageDetector
-from src.inventory_tracking.inventory_tracking import InventoryTracker
-from src.inventory_tracking.stock_detection import StockDetector
-from src.vision_analyis.food_waste_classification import FoodWasteClassifier
-from src.vision_analyis.waste_heatmap import WasteHeatmapGenerator
-from src.vision_analyis.PlDashboard import RestaurantWasteTracker
-
-# No global initialization of objects here - only initialize when needed
+# Feature modules (pandas, LangChain, Prophet, YOLO/torch) are imported inside the
+# endpoints that use them, so importing the app stays fast; see `python main.py --import-report`
+from src.model_registry import build_default_registry
+from src.execution import ExecutionLayer
+from src.jobs.store import JobStore
+from src.jobs.worker import JobWorker
+from src.jobs.handlers import JOB_HANDLERS
+from src.smart_kitchen.forecast_store import ForecastStore
+
+# Heavy models are not built here - the model registry loads them on first use
 
 # Helper function to delete files
 def delete_file(file_path: str) -> None:
@@ -48,6 +39,8 @@ def delete_file(file_path: str) -> None:
 
 # Helper function to convert NumPy types to Python native types
 def convert_numpy_types(obj):
+    import numpy as np
+    import pandas as pd
     if isinstance(obj, np.integer):
         return int(obj)
     elif isinstance(obj, np.floating):
@@ -63,11 +56,42 @@ def convert_numpy_types(obj):
     else:
         return obj
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up shared models on startup (if enabled) and release them on shutdown"""
+    warmup = config.get('serving', {}).get('warmup_models', False)
+    if os.getenv("WARMUP_MODELS", "").lower() in ("1", "true", "yes"):
+        warmup = True
+    if warmup:
+        print("Warming up models...")
+        model_registry.warm_up()
+    
+    # Start job workers inside this process (0 when using `python -m src.jobs.worker`)
+    job_settings = config.get('jobs', {})
+    job_workers = [
+        JobWorker(job_store, JOB_HANDLERS, registry=model_registry, config_path=config_path,
+                  poll_interval=job_settings.get('poll_interval_seconds', 1.0),
+                  requeue_interval=job_settings.get('requeue_interval_seconds', 60.0)).start()
+        for _ in range(job_settings.get('embedded_workers', 1))
+    ]
+    
+    # Keep the precomputed sales forecast current (refreshes run as jobs)
+    forecast_settings = config.get('forecast_serving', {})
+    scheduler = asyncio.create_task(forecast_scheduler(forecast_settings)) if forecast_settings.get('schedule', True) else None
+    yield
+    if scheduler is not None:
+        scheduler.cancel()
+    for worker in job_workers:
+        worker.stop(timeout=5)
+    execution.shutdown()
+    model_registry.unload()
+
 # Create FastAPI app
 app = FastAPI(
     title="Kitchen Management API",
     description="API for kitchen management operations",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -96,6 +120,36 @@ config_path = "config/config.yaml"
 with open(config_path, 'r') as f:
     config = yaml.safe_load(f)
 
+# Shared model registry - each heavy model is loaded once per process
+model_registry = build_default_registry(config_path)
+
+# Worker pools for blocking work, so handlers never block the event loop
+execution = ExecutionLayer.from_config(config)
+
+# Durable job queue shared by all API processes and standalone workers
+job_store = JobStore.from_config(config)
+
+# Precomputed sales forecast, rebuilt by "sales_forecast_refresh" jobs
+forecast_store = ForecastStore.from_config(config)
+
+async def submit_forecast_refresh(reason):
+    """Queue a forecast refresh unless one is already waiting or running; returns its job id"""
+    return await asyncio.to_thread(job_store.submit_unique, "sales_forecast_refresh", {"reason": reason})
+
+async def forecast_scheduler(settings):
+    """Queue a refresh whenever the sales data changes or the snapshot is older than the refresh interval"""
+    data_path = config['data']['raw_path']
+    max_age_seconds = settings.get('refresh_interval_minutes', 1440) * 60
+    while True:
+        try:
+            if os.path.exists(data_path):
+                reason = await asyncio.to_thread(forecast_store.refresh_reason, data_path, max_age_seconds)
+                if reason is not None:
+                    print(f"Sales forecast refresh queued ({reason}): {await submit_forecast_refresh(reason)}")
+        except Exception as e:
+            print(f"Error in forecast scheduler: {str(e)}")
+        await asyncio.sleep(settings.get('check_interval_seconds', 60))
+
 # Models for request/response
 class DemandWasteRequest(BaseModel):
     input_path: Optional[str] = "data/raw/inventory_data.csv"
@@ -123,9 +177,6 @@ def get_temp_file_path(extension: str) -> str:
     """Generate a temporary file path with the given extension"""
     return str(TEMP_DIR / f"{uuid.uuid4()}.{extension}")
 
-# Task tracking dictionary to store task status
-task_tracker = {}
-
 # API endpoints
 @app.get("/")
 async def read_root():
@@ -210,11 +261,45 @@ async def test_api():
             {"path": "/api/waste-classification", "method": "GET/POST"},
             {"path": "/api/inventory-tracking", "method": "GET/POST"},
             {"path": "/api/stock-detection", "method": "GET/POST"},
+            {"path": "/api/jobs", "method": "GET"},
+            {"path": "/api/jobs/{job_id}/events", "method": "GET"},
+            {"path": "/api/jobs/{job_id}/cancel", "method": "POST"},
             {"path": "/api/waste-heatmap", "method": "GET/POST"},
-            {"path": "/api/dashboard", "method": "GET"}
+            {"path": "/api/dashboard", "method": "GET"},
+            {"path": "/api/models", "method": "GET"},
+            {"path": "/api/execution", "method": "GET"},
+            {"path": "/api/llm-cache", "method": "GET"},
+            {"path": "/api/demand-waste-prediction/stream", "method": "GET/POST"}
         ]
     }
 
+@app.get("/api/execution")
+async def get_execution_stats():
+    """Report worker pool usage and per-endpoint queue depth"""
+    return {
+        "status": "success",
+        "execution": execution.stats()
+    }
+
+@app.get("/api/models")
+async def get_model_stats():
+    """Report load state, load time and memory of the shared models"""
+    return {
+        "status": "success",
+        "models": model_registry.stats()
+    }
+
+@app.get("/api/llm-cache")
+async def get_llm_cache_stats():
+    """Report LLM response cache size and hit/miss counters"""
+    from src.demand_waste.waste_predictor import get_response_cache
+    cache = get_response_cache(config_path)
+    return {
+        "status": "success",
+        "enabled": cache is not None,
+        "cache": cache.stats() if cache is not None else None
+    }
+
 @app.post("/api/demand-waste-prediction")
 @app.get("/api/demand-waste-prediction")
 async def run_demand_waste():
@@ -226,71 +311,136 @@ async def run_demand_waste():
         input_path = config.get('data', {}).get('waste_inventory_path', "data/raw/inventory_data.csv")
         print(f"Loading data from: {input_path}")
         
-        df = load_inventory_data(input_path)
-        predictions = predict_waste(df)
+        # Import here to avoid loading pandas/LangChain at startup
+        from src.demand_waste.data_preprocessor import load_inventory_data
+        from src.demand_waste.waste_predictor import predict_waste
+        df = await execution.run_io("demand-waste-prediction", load_inventory_data, input_path)
+        predictions = await execution.run_io("demand-waste-prediction", predict_waste, df, config_path)
         
         # Convert predictions to JSON-serializable format
         result = predictions.to_dict(orient='records')
         
         return JSONResponse(content={
             "status": "success",
-            "predictions": result
+            "predictions": result,
+            "llm_stats": predictions.attrs.get('llm_stats')
         })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in Demand Waste Predictor: {str(e)}")
 
+@app.post("/api/demand-waste-prediction/stream")
+@app.get("/api/demand-waste-prediction/stream")
+async def stream_demand_waste(format: str = "ndjson", chunk_size: int = 500):
+    """Stream demand waste predictions: risk scores first, then recommended actions per LLM batch.
+
+    Events are {"type": "scores" | "actions" | "done" | "error", ...}; rows carry
+    their "row" position so the client can merge actions into the scores.
+    Use format=sse for server-sent events instead of NDJSON.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    chunk_size = min(max(chunk_size, 1), 5000)
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def emit(event):
+        loop.call_soon_threadsafe(events.put_nowait, event)
+
+    # Callbacks run in the worker thread; serialize there so later changes to the frame don't leak in
+    def on_scores(scores):
+        records = scores.drop(columns=['recommended_actions']).to_dict(orient='records')
+        for start in range(0, len(records), chunk_size):
+            emit({"type": "scores", "rows": [dict(record, row=start + i)
+                                             for i, record in enumerate(records[start:start + chunk_size])]})
+
+    def on_actions(positions, actions):
+        emit({"type": "actions", "rows": [{"row": position, "recommended_actions": row_actions}
+                                          for position, row_actions in zip(positions, actions)]})
+
+    async def run():
+        try:
+            from src.demand_waste.data_preprocessor import load_inventory_data
+            from src.demand_waste.waste_predictor import predict_waste
+            input_path = config.get('data', {}).get('waste_inventory_path', "data/raw/inventory_data.csv")
+            df = await execution.run_io("demand-waste-prediction", load_inventory_data, input_path)
+            predictions = await execution.run_io("demand-waste-prediction", predict_waste, df, config_path,
+                                                 None, on_scores, on_actions)
+            events.put_nowait({"type": "done", "rows": len(predictions),
+                               "llm_stats": predictions.attrs.get('llm_stats')})
+        except Exception as e:
+            events.put_nowait({"type": "error", "detail": f"Error in Demand Waste Predictor: {str(e)}"})
+
+    async def event_stream():
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                event = await events.get()
+                data = json.dumps(event, default=str)
+                yield f"event: {event['type']}\ndata: {data}\n\n" if format == "sse" else data + "\n"
+                if event["type"] in ("done", "error"):
+                    return
+        finally:
+            await task
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(event_stream(), media_type=media_type,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/api/sales-forecasting")
 async def run_sales_forecast():
-    """Run the smart kitchen sales forecasting module"""
+    """Serve the latest precomputed sales forecast"""
     try:
-        print("\n=== Running Smart Kitchen Sales Module ===")
-        
-        # Load config
-        print(f"Loading config from: {config_path}")
-        
-        # Preprocess data
-        processed_data = pd.read_csv(config['data']['raw_path'])
-        processed_data['date'] = pd.to_datetime(processed_data['date'])
-
-        # Train/test split
-        train_cutoff = pd.to_datetime('2024-12-01')
-        train_data = processed_data[processed_data['date'] <= train_cutoff]
-        test_data = processed_data[processed_data['date'] > train_cutoff]
-        
-        # Train and evaluate model
-        forecaster = SalesForecaster(config_path)
-        # Check if models exist
-        model_files = [f for f in os.listdir(config['model']['path']) if f.endswith('_model.json')]
-        if len(model_files) < len(processed_data['item'].unique()):
-            print("Training models...")
-            forecaster.train(train_data)
-        else:
-            print("Loading existing models...")
-            forecaster.load_models()
-        accuracy = forecaster.evaluate(test_data)
-        
-        # Generate future predictions
-        future_data = generate_future_data(processed_data, 7)  # Default to 7 days
-        future_preds = forecaster.predict(future_data)
+        forecast = await asyncio.to_thread(forecast_store.get)
+        if forecast is None:
+            # Nothing published yet: point the client at the (single, shared) refresh job rather than training here
+            task_id = await submit_forecast_refresh("missing")
+            return JSONResponse(status_code=503, headers={"Retry-After": "30"}, content={
+                "status": "pending",
+                "message": "The first sales forecast is still being built",
+                "task_id": task_id
+            })
         
-        # Convert to JSON-serializable format
-        accuracy_dict = accuracy.to_dict()
-        future_preds_dict = future_preds.to_dict(orient='records')
+        # A changed sales file (or models replaced by an upload) is served from the old snapshot while a refresh runs
+        reason = await asyncio.to_thread(forecast_store.refresh_reason, config['data']['raw_path'])
+        if reason in ("data_changed", "models_replaced"):
+            await submit_forecast_refresh(reason)
         
         return JSONResponse(content={
             "status": "success",
-            "accuracy": accuracy_dict,
-            "future_predictions": future_preds_dict
+            "accuracy": forecast["accuracy"],
+            "future_predictions": forecast["future_predictions"],
+            "version": forecast["version"],
+            "generated_at": forecast["generated_at"],
+            "stale": reason is not None
         })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error in Smart Kitchen Sales: {str(e)}")
 
+@app.post("/api/sales-forecasting/refresh")
+async def refresh_sales_forecast():
+    """Queue a retrain/evaluate/forecast run; GET /api/sales-forecasting serves it once done"""
+    task_id = await submit_forecast_refresh("manual")
+    current = await asyncio.to_thread(forecast_store.get)
+    return {
+        "status": "success",
+        "message": "Sales forecast refresh queued",
+        "task_id": task_id,
+        "current_version": current["version"] if current else None
+    }
+
 @app.post("/api/sales-forecasting")
 async def upload_sales_data(
     background_tasks: BackgroundTasks,
-    file: Optional[UploadFile] = File(None)
+    file: Optional[UploadFile] = File(None),
+    incremental: bool = False
 ):
-    """Upload sales data for forecasting"""
+    """Upload sales data for forecasting.
+
+    By default the models are retrained on the upload alone and the served
+    snapshot is marked stale. With incremental=true the rows are merged into the
+    managed history (forecast_serving.history_path), only the items they change
+    are refit, and the new snapshot is published.
+    """
     try:
         print("\n=== Processing Uploaded Sales Data ===")
         
@@ -310,78 +460,27 @@ async def upload_sales_data(
         # Add cleanup task
         background_tasks.add_task(os.remove, temp_file_path)
         
-        # Process the uploaded file
-        if file_extension == 'csv':
-            processed_data = pd.read_csv(temp_file_path)
+        # Process the uploaded file in the process pool
+        from src.pipelines import update_sales_forecast, run_sales_forecast_upload
+        if incremental:
+            forecast = await execution.run_cpu("sales-forecasting", update_sales_forecast, config_path, temp_file_path)
         else:
-            processed_data = pd.read_excel(temp_file_path)
-        
-        # Ensure required columns exist
-        required_columns = ['date', 'item', 'quantity']
-        missing_columns = [col for col in required_columns if col not in processed_data.columns]
-        if missing_columns:
-            raise HTTPException(status_code=400, 
-                                detail=f"Missing required columns: {', '.join(missing_columns)}. File must include date, item, and quantity columns.")
-        
-        # Convert date to datetime
-        processed_data['date'] = pd.to_datetime(processed_data['date'])
-        
-        # Train/test split
-        train_cutoff = processed_data['date'].max() - timedelta(days=7)  # Use last week as test data
-        train_data = processed_data[processed_data['date'] <= train_cutoff]
-        test_data = processed_data[processed_data['date'] > train_cutoff]
-        
-        if len(test_data) == 0:
-            # If no test data, use last 10% of data as test
-            train_size = int(len(processed_data) * 0.9)
-            train_data = processed_data.iloc[:train_size]
-            test_data = processed_data.iloc[train_size:]
-        
-        # Train and evaluate model
-        forecaster = SalesForecaster(config_path)
-        print("Training models on uploaded data...")
-        forecaster.train(train_data)
-        accuracy = forecaster.evaluate(test_data)
-        
-        # Generate future predictions
-        future_data = generate_future_data(processed_data, 7)  # Default to 7 days
-        future_preds = forecaster.predict(future_data)
-        
-        # Convert to JSON-serializable format
-        accuracy_dict = accuracy.to_dict()
-        future_preds_dict = future_preds.to_dict(orient='records')
+            forecast = await execution.run_cpu("sales-forecasting", run_sales_forecast_upload,
+                                               config_path, temp_file_path, 7)
+        accuracy_dict = forecast["accuracy"]
+        future_preds_dict = forecast["future_predictions"]
         
         return JSONResponse(content={
             "status": "success",
             "message": "Sales data processed successfully",
             "accuracy": accuracy_dict,
-            "future_predictions": future_preds_dict
+            "future_predictions": future_preds_dict,
+            "version": forecast.get("version"),
+            "update": forecast.get("update")
         })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing sales data: {str(e)}")
 
-def generate_future_data(historical_data, days_ahead):
-    """Generate future data for sales forecasting"""
-    last_date = historical_data['date'].max()
-    future_dates = pd.date_range(start=last_date + timedelta(days=1), periods=days_ahead)
-    future_data = []
-    
-    for date in future_dates:
-        for item in historical_data['item'].unique():
-            item_data = historical_data[historical_data['item'] == item].tail(7)
-            last_row = item_data.iloc[-1]
-            lag_7 = item_data['quantity'].iloc[0] if len(item_data) >= 7 else 0
-            future_data.append({
-                'date': date,
-                'item': item,
-                'day_of_week': date.dayofweek,
-                'month': date.month,
-                'is_weekend': 1 if date.dayofweek in [5, 6] else 0,
-                'lag_1': last_row['quantity'],
-                'lag_7': lag_7
-            })
-    return pd.DataFrame(future_data)
-
 @app.get("/api/recipe-recommendation")
 async def run_recipe_recommender():
     """Run the recipe recommender module"""
@@ -389,18 +488,21 @@ async def run_recipe_recommender():
         print("\n=== Running Recipe Recommender Module ===")
         
         # Initialize recommender
-        recommender = RecipeRecommender(config_path)
+        from src.menu_optimization.recipe_recommender import RecipeRecommender
+        recommender = await execution.run_io("recipe-recommendation", RecipeRecommender, config_path)
         
         # Get current date
         current_date = datetime.now().strftime('%Y-%m-%d')
         
-        # Get recipe recommendation
-        recommended_recipe = recommender.suggest_daily_special(current_date)
+        # Get recipe recommendation (LLM call runs in the thread pool)
+        recommended_recipe = await execution.run_io("recipe-recommendation",
+                                                    recommender.suggest_daily_special, current_date)
         
         # If we have a valid recipe name, add the ingredients list
         if recommended_recipe["recipe_name"] != "No suitable special found":
             # Get the recipe details from the CSV file
             recipe_name = recommended_recipe["recipe_name"]
+            import pandas as pd
             recipes_df = pd.read_csv(recommender.config['data']['recipe_path'])
             recipe_data = recipes_df[recipes_df['recipe_name'] == recipe_name]
             
@@ -428,11 +530,13 @@ async def run_recipe_generator():
     try:
         print("\n=== Running Recipe Generator Module ===")
         
-        # Initialize generator
-        generator = RecipeGenerator(config_path)
+        # Initialize the generator (reads config and data) and run the LLM call in the thread pool
+        def generate():
+            from src.menu_optimization.recipe_generator import RecipeGenerator
+            generator = RecipeGenerator(config_path)
+            return generator.generate_recipes()
         
-        # Generate recipes
-        recipes = generator.generate_recipes()
+        recipes = await execution.run_io("recipe-generation", generate)
         
         return JSONResponse(content={
             "status": "success",
@@ -448,10 +552,11 @@ async def run_cost_optimizer():
         print("\n=== Running Cost Optimizer Module ===")
         
         # Initialize optimizer
+        from src.menu_optimization.cost_optimizer import CostOptimizer
         optimizer = CostOptimizer(config_path)
         
         # Optimize costs
-        optimized_costs = optimizer.optimize_costs()
+        optimized_costs = await execution.run_io("cost-optimization", optimizer.optimize_costs)
         
         # Convert NumPy types to Python native types
         optimized_costs = convert_numpy_types(optimized_costs)
@@ -469,8 +574,8 @@ async def run_spoilage_detection_get():
     try:
         print("\n=== Running Food Spoilage Detection Module (GET) ===")
         
-        # Initialize detector
-        detector = FoodSpoilageDetector(config_path)
+        # Get the shared detector
+        detector = await execution.run_io("spoilage-detection", model_registry.get, "spoilage_detector")
         
         # Use a sample image
         sample_images = detector.get_sample_images()
@@ -479,8 +584,12 @@ async def run_spoilage_detection_get():
         else:
             raise HTTPException(status_code=400, detail="No sample images found")
         
-        # Detect spoilage
-        result = detector.detect_spoilage(image_path)
+        # Detect spoilage with the shared detector
+        def run_detection():
+            with model_registry.use("spoilage_detector") as detector:
+                return detector.detect_spoilage(image_path)
+
+        result = await execution.run_io("spoilage-detection", run_detection)
         
         return JSONResponse(content={
             "status": "success",
@@ -499,8 +608,8 @@ async def run_spoilage_detection_post(
     try:
         print("\n=== Running Food Spoilage Detection Module (POST) ===")
         
-        # Initialize detector
-        detector = FoodSpoilageDetector(config_path)
+        # Get the shared detector
+        detector = await execution.run_io("spoilage-detection", model_registry.get, "spoilage_detector")
         
         # Save uploaded file
         file_extension = file.filename.split('.')[-1].lower()
@@ -515,8 +624,12 @@ async def run_spoilage_detection_post(
         # Use the temporary file
         image_path = temp_file_path
         
-        # Detect spoilage
-        result = detector.detect_spoilage(image_path)
+        # Detect spoilage with the shared detector
+        def run_detection():
+            with model_registry.use("spoilage_detector") as detector:
+                return detector.detect_spoilage(image_path)
+
+        result = await execution.run_io("spoilage-detection", run_detection)
         
         return JSONResponse(content={
             "status": "success",
@@ -534,8 +647,8 @@ async def run_waste_classification_get():
     try:
         print("\n=== Running Waste Classification Module ===")
         
-        # Initialize classifier
-        classifier = FoodWasteClassifier(config_path)
+        # Get the shared classifier
+        classifier = await execution.run_io("waste-classification", model_registry.get, "waste_classifier")
         
         # Use the first sample image
         sample_images = classifier.config['data']['sample_waste_images']
@@ -548,8 +661,12 @@ async def run_waste_classification_get():
             
         print(f"Using sample image: {image_path}")
         
-        # Classify waste
-        result = classifier.detect_food_waste(image_path)
+        # Classify waste with the shared classifier
+        def run_classification():
+            with model_registry.use("waste_classifier") as classifier:
+                return classifier.detect_food_waste(image_path)
+
+        result = await execution.run_io("waste-classification", run_classification)
         if result is None:
             raise HTTPException(status_code=500, detail="Failed to classify waste - no result returned")
         
@@ -571,9 +688,14 @@ async def run_waste_classification_get():
 async def inventory_tracking():
     """Run inventory tracking on images."""
     try:
-        tracker = InventoryTracker(config_path)
-        print("tracker")
-        results = tracker.detect_inventory()
+        def run_tracking():
+            from src.inventory_tracking.inventory_tracking import InventoryTracker
+            with model_registry.use("inventory_yolo") as model:
+                tracker = InventoryTracker(config_path, model=model)
+                print("tracker")
+                return tracker, tracker.detect_inventory()
+        
+        tracker, results = await execution.run_io("inventory-tracking", run_tracking)
         print(results)
         return {
             "status": "success",
@@ -606,12 +728,17 @@ async def inventory_tracking_post(
             raise HTTPException(status_code=500, detail=f"Failed to save uploaded file: {str(e)}")
         
         try:
-            # Initialize tracker with the uploaded image
-            tracker = InventoryTracker(config_path)
-            tracker.input_image_path = temp_file_path
+            # Initialize tracker with the uploaded image and the shared model
+            def run_tracking():
+                from src.inventory_tracking.inventory_tracking import InventoryTracker
+                with model_registry.use("inventory_yolo") as model:
+                    tracker = InventoryTracker(config_path, model=model)
+                    tracker.input_image_path = temp_file_path
+                    
+                    # Process the image
+                    return tracker, tracker.detect_inventory()
             
-            # Process the image
-            results = tracker.detect_inventory()
+            tracker, results = await execution.run_io("inventory-tracking", run_tracking)
             
             # Create output directory if it doesn't exist
             output_dir = Path("data/output/detection_images")
@@ -627,6 +754,7 @@ async def inventory_tracking_post(
                 # Ensure the output directory exists
                 output_dir.mkdir(parents=True, exist_ok=True)
                 # Save the annotated image
+                import cv2
                 cv2.imwrite(str(output_path), tracker.annotated_image)
             
             # Create static directory if it doesn't exist
@@ -668,10 +796,16 @@ async def stock_detection():
         # Load config
         print(f"Loading config from: {config_path}")
         
-        # Initialize detector with config
-        detector = StockDetector(config_path=config_path)
-        print("detector")
-        results = detector.detect_stock()
+        # Initialize detector with config and the shared model
+        def run_detection():
+            from src.inventory_tracking.stock_detection import StockDetector
+            # The shared model is only locked per inference batch, not for the whole video
+            detector = StockDetector(config_path=config_path, model=model_registry.get("inventory_yolo"),
+                                     model_lock=model_registry.use_lock("inventory_yolo"))
+            print("detector")
+            return detector.detect_stock()
+        
+        results = await execution.run_io("stock-detection", run_detection)
         print(results)
         return {
             "status": "success",
@@ -683,14 +817,13 @@ async def stock_detection():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/stock-detection")
-async def upload_stock_detection_video(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def upload_stock_detection_video(file: UploadFile = File(...)):
     """Upload a video for stock detection"""
     try:
         print("Uploading video for stock detection")
         
         # Generate a unique filename for the uploaded video
         file_id = str(uuid.uuid4())
-        task_id = str(uuid.uuid4())  # Generate task ID for tracking
         video_filename = f"uploaded_video_{file_id}.mp4"
         video_path = os.path.join(config['data']['video_image_path'].rsplit('/', 1)[0], video_filename)
         
@@ -701,143 +834,20 @@ async def upload_stock_detection_video(background_tasks: BackgroundTasks, file:
         with open(video_path, "wb") as buffer:
             shutil.copyfileobj(file.file, buffer)
         
-        # Update config with the new video path
-        config['data']['video_image_path'] = video_path
-        
-        # Setup output video path
-        output_filename = f"output_video_{file_id}.mp4"
-        output_path = os.path.join("static", output_filename)
-        results_filename = f"detection_results_{file_id}.json"
-        results_path = os.path.join("static", results_filename)
-        config['data']['output_video_image_path'] = output_path
-        
-        # Initialize task in the tracker
-        task_tracker[task_id] = {
-            "status": "processing",
-            "progress": 0,
-            "start_time": time.time(),
-            "result": None,
-            "error": None,
-            "file_id": file_id
-        }
-        
-        # Run detection in the background
-        async def process_video():
-            try:
-                # Update task status to "processing"
-                task_tracker[task_id]["status"] = "processing"
-                
-                # Create the StockDetector instance with the updated config
-                detector = StockDetector(config_path=config_path)
-                detector.video_path = video_path  # Explicitly set video path
-                
-                # Set output video path in the detector - use full path for processing
-                detector.output_video_path = os.path.join(os.getcwd(), output_path)
-                
-                # Ensure the static directory exists
-                os.makedirs("static", exist_ok=True)
-                
-                # Simulate progress updates while processing
-                for progress in range(10, 90, 10):
-                    # Simulate processing work
-                    await asyncio.sleep(1)
-                    # Update progress
-                    task_tracker[task_id]["progress"] = progress
-                
-                # Run actual detection
-                results = detector.detect_stock()
-                print(f"Detection results: {results}")
-                
-                # Save results to a JSON file
-                with open(results_path, "w") as f:
-                    json.dump(results, f)
-                
-                # Update progress to reflect video processing is done
-                task_tracker[task_id]["progress"] = 90
-                
-                # Define the expected paths
-                expected_output_path = detector.output_video_path
-                default_output_path = "data/output/stock_prediction/output_video.mp4"
-                relative_output_path = output_path
-                
-                # Check if the detector output video exists
-                if os.path.exists(expected_output_path):
-                    print(f"Output video exists at: {expected_output_path}")
-                    # Make sure we copy the file to the static directory if it's not already there
-                    if expected_output_path != os.path.join(os.getcwd(), relative_output_path):
-                        print(f"Copying from {expected_output_path} to {relative_output_path}")
-                        shutil.copy2(expected_output_path, relative_output_path)
-                elif os.path.exists(default_output_path):
-                    print(f"Copying video from default path {default_output_path} to {relative_output_path}")
-                    shutil.copy2(default_output_path, relative_output_path)
-                else:
-                    # Try to find any output video files that might have been created
-                    output_dir = "data/output/stock_prediction"
-                    if os.path.exists(output_dir):
-                        output_files = [f for f in os.listdir(output_dir) if f.endswith('.mp4')]
-                        if output_files:
-                            # Use the most recently modified file
-                            output_files.sort(key=lambda x: os.path.getmtime(os.path.join(output_dir, x)), reverse=True)
-                            found_path = os.path.join(output_dir, output_files[0])
-                            print(f"Found alternative output video at {found_path}, copying to {relative_output_path}")
-                            shutil.copy2(found_path, relative_output_path)
-                        else:
-                            error_msg = f"Could not find any output video in {output_dir}"
-                            print(f"Warning: {error_msg}")
-                            raise Exception(error_msg)
-                    else:
-                        error_msg = f"Could not find output video at {expected_output_path} or {default_output_path}"
-                        print(f"Warning: {error_msg}")
-                        raise Exception(error_msg)
-                
-                # Verify the output file in static directory actually exists
-                if not os.path.exists(relative_output_path):
-                    error_msg = f"Failed to copy output video to {relative_output_path}"
-                    print(f"Error: {error_msg}")
-                    raise Exception(error_msg)
-                
-                # Set the video URL (relative to the server root)
-                base_url = ""  # Empty for relative URLs
-                video_url = f"{base_url}/static/{output_filename}"
-                results_url = f"{base_url}/static/{results_filename}"
-                
-                # Final progress update
-                task_tracker[task_id]["progress"] = 100
-                
-                # Mark task as completed with results and video URL
-                task_tracker[task_id]["status"] = "completed"
-                
-                task_tracker[task_id]["result"] = {
-                    "results": results,
-                    "video_url": video_url,
-                    "results_url": results_url,
-                    "timestamp": datetime.now().isoformat()
-                }
-                task_tracker[task_id]["end_time"] = time.time()
-                
-                # Log successful completion
-                print(f"Task {task_id} completed successfully. Video available at: {video_url}")
-                
-            except Exception as e:
-                # Mark task as failed
-                task_tracker[task_id]["status"] = "failed"
-                task_tracker[task_id]["error"] = str(e)
-                task_tracker[task_id]["end_time"] = time.time()
-                
-                # Log the full error with traceback
-                print(f"Error in background processing for task {task_id}: {str(e)}")
-                print(f"Error details: {traceback.format_exc()}")
-                
-                # Try to clean up any temporary files
-                try:
-                    if os.path.exists(video_path):
-                        os.remove(video_path)
-                        print(f"Cleaned up temporary video file: {video_path}")
-                except Exception as cleanup_error:
-                    print(f"Error during cleanup: {str(cleanup_error)}")
-        
-        # Start the background task
-        background_tasks.add_task(process_video)
+        # Setup output paths
+        output_path = os.path.join("static", f"output_video_{file_id}.mp4")
+        results_path = os.path.join("static", f"detection_results_{file_id}.json")
+        counts_path = os.path.join("static", f"food_count_{file_id}.csv")
+        
+        # Queue the job - any worker sharing the job database can pick it up
+        task_id = await asyncio.to_thread(job_store.submit, "stock_detection", {
+            "file_id": file_id,
+            "video_path": video_path,
+            "output_path": output_path,
+            "results_path": results_path,
+            "counts_path": counts_path,
+            "cleanup_paths": [video_path, output_path, results_path, counts_path]
+        })
         
         return {
             "status": "success",
@@ -849,31 +859,94 @@ async def upload_stock_detection_video(background_tasks: BackgroundTasks, file:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error uploading video: {str(e)}")
 
+def job_to_response(job):
+    """Convert a stored job into the API representation"""
+    end_time = job["finished_at"] or time.time()
+    response = {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": round(job["progress"]),
+        "message": job["message"],
+        "created_at": datetime.fromtimestamp(job["created_at"]).isoformat(),
+        "elapsed_time": round(end_time - (job["started_at"] or job["created_at"]), 2),
+        "attempts": job["attempts"],
+        "cancel_requested": job["cancel_requested"],
+        "partial_results": job["snapshot"]
+    }
+    if job["status"] == "completed":
+        response["result"] = job["result"]
+    elif job["status"] == "failed":
+        response["error"] = job["error"]
+    return response
+
 # Add task status endpoint
 @app.get("/api/task-status/{task_id}")
 async def get_task_status(task_id: str):
     """Get the status of a task by its ID"""
-    if task_id not in task_tracker:
+    job = await asyncio.to_thread(job_store.get, task_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Task not found")
     
-    task = task_tracker[task_id]
-    
-    # Calculate elapsed time
-    elapsed_time = time.time() - task["start_time"]
-    
-    response = {
-        "status": task["status"],
-        "progress": task["progress"],
-        "elapsed_time": round(elapsed_time, 2)
+    return job_to_response(job)
+
+@app.get("/api/jobs")
+async def list_jobs(status: Optional[str] = None, kind: Optional[str] = None, limit: int = 50, offset: int = 0):
+    """List background jobs, newest first"""
+    jobs = await asyncio.to_thread(job_store.list_jobs, status=status, kind=kind,
+                                   limit=min(limit, 500), offset=offset)
+    return {
+        "status": "success",
+        "jobs": [job_to_response(job) for job in jobs]
     }
-    
-    # Include additional information based on status
-    if task["status"] == "completed":
-        response["result"] = task["result"]
-    elif task["status"] == "failed":
-        response["error"] = task["error"]
-    
-    return response
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get a background job by its ID"""
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_response(job)
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, poll_interval: float = 0.5):
+    """Stream job progress and partial results as server-sent events"""
+    if await asyncio.to_thread(job_store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    poll_interval = min(max(poll_interval, 0.1), 5.0)
+
+    async def event_stream():
+        last_update = None
+        last_sent = time.time()
+        while True:
+            job = await asyncio.to_thread(job_store.get, job_id)
+            if job is None:
+                yield "event: error\ndata: {\"detail\": \"Job not found\"}\n\n"
+                return
+            # Only send when the worker recorded something new
+            if job["updated_at"] != last_update:
+                last_update = job["updated_at"]
+                last_sent = time.time()
+                yield f"event: progress\ndata: {json.dumps(job_to_response(job))}\n\n"
+            if job["status"] in ("completed", "failed", "cancelled"):
+                yield f"event: done\ndata: {json.dumps({'status': job['status']})}\n\n"
+                return
+            # Keep idle connections (and proxies) from timing out
+            if time.time() - last_sent > 15:
+                last_sent = time.time()
+                yield ": keepalive\n\n"
+            await asyncio.sleep(poll_interval)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a queued job or ask the worker to stop a running one"""
+    job = await asyncio.to_thread(job_store.request_cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_response(job)
 
 @app.post("/api/waste-classification")
 async def run_waste_classification_post(
@@ -884,8 +957,8 @@ async def run_waste_classification_post(
     try:
         print("\n=== Running Waste Classification Module ===")
         
-        # Initialize classifier
-        classifier = FoodWasteClassifier(config_path)
+        # Get the shared classifier
+        classifier = await execution.run_io("waste-classification", model_registry.get, "waste_classifier")
         
         # Handle image input
         if file:
@@ -910,8 +983,12 @@ async def run_waste_classification_post(
             else:
                 raise HTTPException(status_code=400, detail="No sample images found")
         
-        # Classify waste
-        result = classifier.detect_food_waste(image_path)
+        # Classify waste with the shared classifier
+        def run_classification():
+            with model_registry.use("waste_classifier") as classifier:
+                return classifier.detect_food_waste(image_path)
+
+        result = await execution.run_io("waste-classification", run_classification)
         if result is None:
             raise HTTPException(status_code=500, detail="Failed to classify waste - no result returned")
         
@@ -932,22 +1009,23 @@ async def run_waste_heatmap_get():
     try:
         print("\n=== Running Waste Heatmap Generation Module ===")
         
-        # Initialize generator
-        generator = WasteHeatmapGenerator(config_path)
-        
         # Use the first sample image
-        sample_images = generator.config['data']['sample_waste_heatmap_images']
+        sample_images = config['data']['sample_waste_heatmap_images']
         if not sample_images:
             raise HTTPException(status_code=400, detail="No sample images found in configuration")
             
-        image_path = os.path.join(generator.config['data']['raw_waste_heatmap_path'], sample_images[2])
+        image_path = os.path.join(config['data']['raw_waste_heatmap_path'], sample_images[2])
         if not os.path.exists(image_path):
             raise HTTPException(status_code=400, detail=f"Sample image not found at path: {image_path}")
             
         print(f"Using sample image: {image_path}")
         
-        # Generate heatmap
-        heatmap_path, detections_path = generator.create_waste_heatmap(image_path)
+        # Generate heatmap with the shared generator
+        def run_heatmap():
+            with model_registry.use("waste_heatmap") as generator:
+                return generator.create_waste_heatmap(image_path)
+        
+        heatmap_path, detections_path = await execution.run_io("waste-heatmap", run_heatmap)
         if not heatmap_path or not detections_path:
             raise HTTPException(status_code=500, detail="Failed to generate heatmap or detections")
             
@@ -989,9 +1067,6 @@ async def run_waste_heatmap_post(
     try:
         print("\n=== Running Waste Heatmap Generation Module ===")
         
-        # Initialize generator
-        generator = WasteHeatmapGenerator(config_path)
-        
         # Handle image input
         if file:
             # Save uploaded file
@@ -1008,15 +1083,19 @@ async def run_waste_heatmap_post(
             image_path = temp_file_path
         else:
             # Use the first sample image if no image is provided
-            sample_images = generator.config['data']['sample_waste_heatmap_images']
+            sample_images = config['data']['sample_waste_heatmap_images']
             if sample_images:
-                image_path = os.path.join(generator.config['data']['raw_waste_heatmap_path'], sample_images[2])
+                image_path = os.path.join(config['data']['raw_waste_heatmap_path'], sample_images[2])
                 print(f"Using sample image: {image_path}")
             else:
                 raise HTTPException(status_code=400, detail="No sample images found")
         
-        # Generate heatmap
-        heatmap_path, detections_path = generator.create_waste_heatmap(image_path)
+        # Generate heatmap with the shared generator
+        def run_heatmap():
+            with model_registry.use("waste_heatmap") as generator:
+                return generator.create_waste_heatmap(image_path)
+        
+        heatmap_path, detections_path = await execution.run_io("waste-heatmap", run_heatmap)
         if not heatmap_path or not detections_path:
             raise HTTPException(status_code=500, detail="Failed to generate heatmap or detections")
             
@@ -1052,27 +1131,9 @@ async def run_dashboard():
     try:
         print("\n=== Running Dashboard Module ===")
         
-        
-        output_dashboard_path = config['data']['output_dashboard_path']
-        
-        # Initialize dashboard
-        tracker = RestaurantWasteTracker(config_path)
-        
-        
-        tracker.save_data_to_csv(output_dashboard_path)
-        tracker.generate_chart_data_csvs(output_dashboard_path)
-        
-        # Generate summary data
-        dashboard = tracker.generate_profit_loss_dashboard()
-        time_analysis = tracker.generate_time_based_analysis()
-        
-        # Convert NumPy types to Python native types
-        dashboard = convert_numpy_types(dashboard)
-        time_analysis = {
-            'weekly': convert_numpy_types(time_analysis['weekly'].to_dict('records')),
-            'monthly': convert_numpy_types(time_analysis['monthly'].to_dict('records')),
-            'quarterly': convert_numpy_types(time_analysis['quarterly'].to_dict('records'))
-        }
+        # Build the dashboard reports in the process pool
+        from src.pipelines import run_dashboard as run_dashboard_pipeline
+        output_dashboard_path = await execution.run_cpu("dashboard", run_dashboard_pipeline, config_path)
         
         return JSONResponse(content={
             "status": "success",
@@ -1086,5 +1147,5 @@ async def run_dashboard():
 
 # Run the app with uvicorn
 if __name__ == "__main__":
-    
+    import uvicorn
     uvicorn.run("api:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
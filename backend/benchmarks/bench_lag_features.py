@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark DataPreprocessor.add_lag_features on a synthetic --years x --items
+daily sales history: the previous per-item loop (boolean mask + .loc
+assignment per item and lag) against the groupby shift/rolling version,
+with and without rolling mean/std over 7/14/28 days.
+
+The loop is only timed on --loop-items items (it grows with items x rows);
+its lag columns are checked identical to the new ones on that subset.
+
+Usage (from the backend directory):
+    python benchmarks/bench_lag_features.py --items 500 --years 5
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.smart_kitchen.data_preprocessor import DataPreprocessor
+
+
+def make_sales(items, years, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2020-01-01", periods=365 * years)
+    frame = pd.DataFrame({
+        "date": np.tile(dates, items),
+        "item": np.repeat([f"item_{i:03d}" for i in range(items)], len(dates)),
+        "quantity": rng.poisson(25, items * len(dates)),
+    })
+    # Shuffled, as appended uploads would be
+    return frame.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+
+def preprocessor_for(data):
+    preprocessor = DataPreprocessor.__new__(DataPreprocessor)
+    preprocessor.data = data.copy()
+    return preprocessor
+
+
+def loop_lag_features(data, lag_days=(1, 7)):
+    """The previous implementation."""
+    for item in data['item'].unique():
+        item_data = data[data['item'] == item].sort_values('date')
+        for lag in lag_days:
+            data.loc[data['item'] == item, f'lag_{lag}'] = item_data['quantity'].shift(lag)
+    data.dropna(inplace=True)
+    return data
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lag-feature engineering")
+    parser.add_argument("--items", type=int, default=500, help="Menu items")
+    parser.add_argument("--years", type=int, default=5, help="Years of daily sales per item")
+    parser.add_argument("--loop-items", type=int, default=100, help="Items the per-item loop is timed on")
+    args = parser.parse_args()
+
+    data = make_sales(args.items, args.years)
+    subset = data[data["item"].isin(data["item"].unique()[:args.loop_items])].reset_index(drop=True)
+
+    loop_s, loop_result = timed(lambda: loop_lag_features(subset.copy()))
+    subset_s, _ = timed(lambda: preprocessor_for(subset).add_lag_features())
+    identical = preprocessor_for(subset)
+    identical.add_lag_features()
+    lags_match = loop_result[["lag_1", "lag_7"]].equals(identical.data[["lag_1", "lag_7"]].astype(float))
+
+    def run(rolling_windows):
+        preprocessor = preprocessor_for(data)
+        preprocessor.add_lag_features(rolling_windows=rolling_windows)
+        return preprocessor.data
+
+    lags_s, _ = timed(lambda: run(()))
+    rolling_s, features = timed(lambda: run((7, 14, 28)))
+
+    print(f"\n{args.items} items x {365 * args.years} days = {len(data):,} rows")
+    print(f"{'implementation':>32} {'items':>6} {'seconds':>9}")
+    print(f"{'per-item loop, lags 1/7':>32} {args.loop_items:>6} {loop_s:>9.2f}")
+    print(f"{'groupby, lags 1/7':>32} {args.loop_items:>6} {subset_s:>9.2f}")
+    print(f"{'groupby, lags 1/7':>32} {args.items:>6} {lags_s:>9.2f}")
+    print(f"{'groupby, lags + rolling 7/14/28':>32} {args.items:>6} {rolling_s:>9.2f}")
+    print(f"loop lags identical: {lags_match}; feature columns: {len(features.columns) - 3}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark validate_response (tolerant single-pass parser + precompiled schema)
+against the previous literal_eval/regex-repair/jsonschema.validate path on a
+corpus of well-formed and malformed demand-waste LLM responses.
+
+The corpus mimics what the model sends back: plain JSON, Python-style dicts,
+apostrophes inside single-quoted actions, trailing commas, missing commas
+between analyses, code fences and truncated output.
+
+Usage (from the backend directory):
+    python benchmarks/bench_llm_json.py --responses 2000 --analyses 10
+"""
+import os
+import re
+import sys
+import ast
+import json
+import time
+import random
+import logging
+import argparse
+
+from jsonschema import validate, ValidationError
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.demand_waste.waste_predictor import validate_response
+
+ACTIONS = ["Use in tomorrow's specials", "Move to the front of the cold store", "Reduce next order",
+           "Check storage temperature twice daily", "Prep and freeze surplus portions"]
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "analyses": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"recommended_actions": {"type": "array", "items": {"type": "string"}}},
+                "required": ["recommended_actions"]
+            }
+        }
+    },
+    "required": ["analyses"]
+}
+
+
+def legacy_validate_response(response):
+    """The previous validate_response."""
+    try:
+        response = response.strip().strip('"')
+        try:
+            data = ast.literal_eval(response)
+        except (SyntaxError, ValueError):
+            response = re.sub(r"\'(\w+)\'(\s*:\s*)", r'"\1"\2', response)
+            response = re.sub(r"\'(.*?)\'(?=(?:,|\]|\s*}))", r'"\1"', response)
+            response = re.sub(r'(}\s*{)', r'}, {', response)
+            response = re.sub(r'\s+', ' ', response).strip()
+            data = ast.literal_eval(response)
+        json_data = json.dumps(data)
+        validate(instance=data, schema=SCHEMA)
+        return True, json_data
+    except (SyntaxError, ValueError, TypeError, ValidationError) as e:
+        return False, f"Invalid JSON format: {e}"
+
+
+def make_corpus(responses, analyses, seed=0):
+    """(kind, text) pairs; every kind except 'truncated' is recoverable."""
+    rng = random.Random(seed)
+    kinds = ["json", "python", "apostrophe", "trailing_comma", "missing_comma", "fenced", "truncated"]
+    corpus = []
+    for i in range(responses):
+        kind = kinds[i % len(kinds)]
+        actions = [[rng.choice(ACTIONS[1:]) for _ in range(2)] for _ in range(analyses)]
+        if kind in ("apostrophe", "truncated"):
+            actions[0][0] = ACTIONS[0]
+        data = {"analyses": [{"recommended_actions": row} for row in actions]}
+        text = json.dumps(data)
+        if kind == "python":
+            text = repr(data)
+        elif kind == "apostrophe":
+            text = repr(data).replace('"', "'")
+        elif kind == "trailing_comma":
+            text = repr(data).replace("']", "',]").replace("}]", "},]")
+        elif kind == "missing_comma":
+            text = repr(data).replace("}, {", "} {")
+        elif kind == "fenced":
+            text = f"```json\n{json.dumps(data, indent=2)}\n```"
+        elif kind == "truncated":
+            text = text[:len(text) // 2]
+        corpus.append((kind, text))
+    return corpus
+
+
+def run(validate_fn, corpus, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [validate_fn(text)[0] for _, text in corpus]
+    elapsed = (time.perf_counter() - start) / repeat
+    return elapsed, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM response parsing and validation")
+    parser.add_argument("--responses", type=int, default=2000, help="Responses in the corpus")
+    parser.add_argument("--analyses", type=int, default=10, help="Analyses per response")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes over the corpus")
+    args = parser.parse_args()
+
+    # Both implementations log every failure; keep the table readable
+    logging.disable(logging.CRITICAL)
+    corpus = make_corpus(args.responses, args.analyses)
+    kinds = sorted({kind for kind, _ in corpus})
+
+    rows = []
+    for name, validate_fn in [("legacy", legacy_validate_response), ("tolerant", validate_response)]:
+        elapsed, results = run(validate_fn, corpus, args.repeat)
+        parsed = {kind: sum(ok for (k, _), ok in zip(corpus, results) if k == kind) for kind in kinds}
+        rows.append((name, elapsed, parsed))
+
+    total = {kind: sum(1 for k, _ in corpus if k == kind) for kind in kinds}
+    print(f"\n{args.responses} responses x {args.analyses} analyses; parsed / total per kind")
+    print(f"{'parser':>10} {'us/resp':>9} " + " ".join(f"{kind:>15}" for kind in kinds))
+    for name, elapsed, parsed in rows:
+        cells = " ".join(f"{f'{parsed[kind]}/{total[kind]}':>15}" for kind in kinds)
+        print(f"{name:>10} {elapsed / len(corpus) * 1e6:>9.1f} {cells}")
+    print(f"speedup {rows[0][1] / rows[1][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Offline throughput benchmark of the LLM-driven modules against the stub
+provider (llm.provider: stub), with configurable latency and error rates.
+
+Each module is called --calls times from --workers threads; the table shows
+calls/s, latency percentiles (including each module's retry backoff) and how
+many calls ended in the module's own error fallback.
+
+Usage (from the backend directory):
+    python benchmarks/bench_llm_modules.py --calls 40 --workers 8 --latency-ms 200 --error-rate 0.05
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yaml
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def write_fixtures(tmp, args):
+    rng = np.random.default_rng(0)
+    names = [f"ingredient_{i}" for i in range(20)]
+    inventory_path = os.path.join(tmp, "inventory.csv")
+    pd.DataFrame({
+        "ingredient": names,
+        "stock_kg": rng.uniform(1, 20, 20).round(1),
+        "shelf_life_days": rng.integers(3, 20, 20),
+        "weekly_usage_kg": rng.uniform(1, 10, 20).round(1),
+        "delivery_date": "2024-01-01"
+    }).to_csv(inventory_path, index=False)
+    recipe_path = os.path.join(tmp, "recipes.csv")
+    pd.DataFrame({"recipe_name": ["Dal"] * 2, "ingredient": names[:2], "quantity": [1, 1], "unit": ["kg", "kg"]}) \
+        .to_csv(recipe_path, index=False)
+    image_path = os.path.join(tmp, "tomato.jpg")
+    Image.fromarray(rng.integers(0, 255, (64, 64, 3), dtype=np.uint8)).save(image_path)
+
+    config = {
+        "data": {
+            "inventory_path": inventory_path,
+            "recipe_path": recipe_path,
+            "output_spoilage_path": os.path.join(tmp, "spoilage.csv"),
+            "log_path": os.path.join(tmp, "classification.log"),
+            "output_waste_classification_path": os.path.join(tmp, "waste.csv"),
+        },
+        "recommendation": {"expiration_threshold_days": 3},
+        "logging": {"file": os.path.join(tmp, "spoilage.log")},
+        "llm": {"provider": "stub", "stub": {
+            "latency_ms": args.latency_ms, "latency_jitter_ms": args.latency_ms / 4,
+            "error_rate": args.error_rate, "rate_limit_rate": 0.0, "seed": 0
+        }}
+    }
+    config_path = os.path.join(tmp, "config.yaml")
+    with open(config_path, "w") as f:
+        yaml.safe_dump(config, f)
+    return config_path, image_path
+
+
+def build_modules(config_path, image_path):
+    """(name, call, is_fallback) for each module; is_fallback spots the module's error output."""
+    from src.menu_optimization.recipe_recommender import RecipeRecommender
+    from src.menu_optimization.recipe_generator import RecipeGenerator
+    from src.food_spoilage_detection.food_spoilage_detection import FoodSpoilageDetector
+    from src.vision_analyis.food_waste_classification import FoodWasteClassifier
+
+    recommender = RecipeRecommender(config_path)
+    generator = RecipeGenerator(config_path)
+    detector = FoodSpoilageDetector(config_path)
+    classifier = FoodWasteClassifier(config_path)
+    return [
+        ("recipe details", lambda: recommender.get_recipe_details("Dal"),
+         lambda result: result.get("cuisine") == "Unknown"),
+        ("recipe ideas", generator.generate_recipes, lambda result: not result),
+        ("spoilage", lambda: detector.detect_spoilage(image_path), lambda result: result.startswith("An error")),
+        ("waste class.", lambda: classifier.detect_food_waste(image_path), lambda result: result.startswith("An error")),
+    ]
+
+
+def timed(call):
+    start = time.perf_counter()
+    result = call()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM-driven modules against the stub provider")
+    parser.add_argument("--calls", type=int, default=40, help="Calls per module")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent threads")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Mean stub latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub calls failing with a 500")
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path, image_path = write_fixtures(tmp, args)
+        for name, call, is_fallback in build_modules(config_path, image_path):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.workers) as pool:
+                results = list(pool.map(lambda _: timed(call), range(args.calls)))
+            elapsed = time.perf_counter() - start
+            latencies = np.array([latency for latency, _ in results]) * 1000
+            fallbacks = sum(1 for _, result in results if is_fallback(result))
+            rows.append((name, args.calls / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 95), fallbacks))
+
+    print(f"\nstub latency={args.latency_ms}ms  error rate={args.error_rate}  workers={args.workers}  calls={args.calls}")
+    print(f"{'module':>15} {'calls/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'fallbacks':>10}")
+    for name, throughput, p50, p95, fallbacks in rows:
+        print(f"{name:>15} {throughput:>8.1f} {p50:>8.0f} {p95:>8.0f} {fallbacks:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark forecasting one dish with the lazy per-item Prophet model cache
+against the previous eager path (deserialize every *_model.json first).
+
+One synthetic model is fitted and copied to --items files, so the timing is
+all deserialization and prediction. Rows:
+  eager       the previous load_models(): deserialize every file, then predict one item
+  lazy cold   fresh process cache, predict one item (loads only that file)
+  lazy warm   a new SalesForecaster in the same process, same item (cache hit)
+
+Usage (from the backend directory):
+    python benchmarks/bench_prophet_model_cache.py --items 60
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+import yaml
+from prophet import Prophet
+from prophet.serialize import model_to_json, model_from_json
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.smart_kitchen import sales_forecaster_prophet
+from src.smart_kitchen.sales_forecaster_prophet import SalesForecaster
+
+
+def write_models(model_dir, items, days):
+    rng = np.random.default_rng(0)
+    history = pd.DataFrame({"ds": pd.date_range("2023-01-01", periods=days), "y": rng.poisson(20, days)})
+    model_json = model_to_json(Prophet(weekly_seasonality=True, daily_seasonality=False).fit(history))
+    os.makedirs(model_dir, exist_ok=True)
+    for i in range(items):
+        with open(f"{model_dir}/item_{i:03d}_model.json", "w") as f:
+            f.write(model_json)
+    return len(model_json)
+
+
+def timed(call):
+    start = time.perf_counter()
+    call()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lazy Prophet model loading")
+    parser.add_argument("--items", type=int, default=60, help="Saved per-item models")
+    parser.add_argument("--days", type=int, default=730, help="History behind each model")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = os.path.join(tmp, "models")
+        model_bytes = write_models(model_dir, args.items, args.days)
+        config_path = os.path.join(tmp, "config.yaml")
+        with open(config_path, "w") as f:
+            yaml.safe_dump({"model": {"path": model_dir}, "prophet": {"model_cache_mb": 256}}, f)
+        future = pd.DataFrame({"date": pd.date_range("2025-01-01", periods=7), "item": "item_000"})
+
+        def eager():
+            models = {}
+            for name in os.listdir(model_dir):
+                with open(f"{model_dir}/{name}") as f:
+                    models[name.replace("_model.json", "")] = model_from_json(f.read())
+            models["item_000"].predict(future[["date"]].rename(columns={"date": "ds"}))
+
+        eager_ms = timed(eager)
+        sales_forecaster_prophet._model_cache = None
+        cold_ms = timed(lambda: SalesForecaster(config_path).predict(future))
+        warm_ms = timed(lambda: SalesForecaster(config_path).predict(future))
+        stats = SalesForecaster(config_path).cache_stats()
+
+    print(f"\n{args.items} models of {model_bytes / 1024:.0f} KB, forecasting 1 item for 7 days")
+    print(f"{'path':>10} {'ms':>9}")
+    print(f"{'eager':>10} {eager_ms:>9.1f}")
+    print(f"{'lazy cold':>10} {cold_ms:>9.1f}")
+    print(f"{'lazy warm':>10} {warm_ms:>9.1f}")
+    print(f"model load: cold {stats['cold_load_ms']} ms, warm {stats['warm_load_ms']} ms "
+          f"({stats['misses']} misses, {stats['hits']} hits)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-item Prophet training, serial vs the process pool
+(SalesForecaster.train with prophet.train_workers), on synthetic sales for
+--items menu items, and check every pool size writes the same models.
+
+Speedup is bounded by the cores available (os.cpu_count() is printed);
+pool sizes above it are still run but only add start-up overhead.
+
+Usage (from the backend directory):
+    python benchmarks/bench_prophet_training.py --items 60 --workers 1 8 16
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.smart_kitchen.sales_forecaster_prophet import SalesForecaster
+
+
+def make_sales(items, days, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2023-01-01", periods=days)
+    weekday_boost = np.where(dates.dayofweek >= 5, 1.4, 1.0)
+    return pd.concat([
+        pd.DataFrame({"date": dates, "item": f"item_{i:03d}",
+                      "quantity": rng.poisson(rng.uniform(5, 60) * weekday_boost)})
+        for i in range(items)
+    ], ignore_index=True)
+
+
+def train(data, tmp, workers):
+    model_dir = os.path.join(tmp, f"models_{workers}")
+    config_path = os.path.join(tmp, f"config_{workers}.yaml")
+    with open(config_path, "w") as f:
+        yaml.safe_dump({
+            "model": {"path": model_dir},
+            "prophet": {"yearly_seasonality": True, "weekly_seasonality": True, "daily_seasonality": False}
+        }, f)
+    start = time.perf_counter()
+    SalesForecaster(config_path).train(data, workers=workers)
+    elapsed = time.perf_counter() - start
+    models = {}
+    for name in sorted(os.listdir(model_dir)):
+        with open(os.path.join(model_dir, name)) as f:
+            models[name] = f.read()
+    return elapsed, models
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel Prophet training")
+    parser.add_argument("--items", type=int, default=60, help="Menu items (one model each)")
+    parser.add_argument("--days", type=int, default=730, help="Days of sales history per item")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 16], help="Pool sizes to time")
+    args = parser.parse_args()
+
+    # Prophet/cmdstanpy log every fit
+    logging.disable(logging.INFO)
+    data = make_sales(args.items, args.days)
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in args.workers:
+            elapsed, models = train(data, tmp, workers)
+            rows.append((workers, elapsed, models))
+
+    serial_s, serial_models = rows[0][1], rows[0][2]
+    print(f"\n{args.items} items x {args.days} days, {os.cpu_count()} CPUs")
+    print(f"{'workers':>8} {'seconds':>9} {'items/s':>9} {'speedup':>8} {'identical':>10}")
+    for workers, elapsed, models in rows:
+        print(f"{workers:>8} {elapsed:>9.2f} {args.items / elapsed:>9.1f} {serial_s / elapsed:>7.1f}x "
+              f"{str(models == serial_models):>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark StockDetector video throughput on CPU for different YOLO batch sizes.
+
+Usage (from the backend directory):
+    python benchmarks/bench_stock_batch.py --weights models/food_detection_model/best.pt
+    python benchmarks/bench_stock_batch.py --video data/raw/stock_videos/sample_video.mp4 --frames 120
+
+Without --weights an untrained YOLOv8n built from its config is used, which
+has the same compute cost as the real detector but needs no download.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ultralytics import YOLO
+from src.inventory_tracking.stock_detection import StockDetector
+
+
+def make_video(path, frames, width=1280, height=720, fps=30):
+    """Write a synthetic video with a few moving coloured blobs."""
+    rng = np.random.default_rng(0)
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    centers = rng.integers(100, min(width, height) - 100, size=(5, 2))
+    colors = rng.integers(0, 255, size=(5, 3))
+    for i in range(frames):
+        frame = np.full((height, width, 3), 40, dtype=np.uint8)
+        for (cx, cy), color in zip(centers, colors):
+            cv2.circle(frame, (int(cx + 3 * i) % width, int(cy)), 60, tuple(int(c) for c in color), -1)
+        out.write(frame)
+    out.release()
+
+
+def run(model, video_path, batch_size, workdir):
+    detector = StockDetector(model=model)
+    detector.batch_size = batch_size
+    detector.video_path = video_path
+    detector.output_video_path = os.path.join(workdir, f"out_{batch_size}.mp4")
+    detector.output_csv_count_path = os.path.join(workdir, f"counts_{batch_size}.csv")
+
+    start = time.perf_counter()
+    frames = {"n": 0}
+    detector.detect_stock(progress_callback=lambda done, total: frames.update(n=done))
+    elapsed = time.perf_counter() - start
+    return frames["n"], elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark batched YOLO inference for stock detection')
+    parser.add_argument('--weights', default=None, help='YOLO weights (default: untrained yolov8n)')
+    parser.add_argument('--video', default=None, help='Video to process (default: synthetic 720p clip)')
+    parser.add_argument('--frames', type=int, default=64, help='Frames in the synthetic clip')
+    parser.add_argument('--batch-sizes', default='1,4,8,16', help='Comma-separated batch sizes')
+    args = parser.parse_args()
+
+    model = YOLO(args.weights or 'yolov8n.yaml')
+    model.to('cpu')
+
+    with tempfile.TemporaryDirectory() as workdir:
+        video_path = args.video
+        if video_path is None:
+            video_path = os.path.join(workdir, 'synthetic.mp4')
+            make_video(video_path, args.frames)
+
+        # Warm up so the first measured run does not pay for model fusing
+        run(model, video_path, 1, workdir)
+
+        rows = []
+        for batch_size in [int(b) for b in args.batch_sizes.split(',')]:
+            frames, elapsed = run(model, video_path, batch_size, workdir)
+            rows.append((batch_size, frames, elapsed))
+
+    print(f"\n{'batch':>6} {'frames':>7} {'seconds':>9} {'frames/s':>9}")
+    for batch_size, frames, elapsed in rows:
+        print(f"{batch_size:>6} {frames:>7} {elapsed:>9.2f} {frames / elapsed:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
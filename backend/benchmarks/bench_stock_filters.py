@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of StockDetector's per-frame consistency filters: the per-box
+reference (filter_detections_scalar) against the vectorized filter_detections.
+
+Usage (from the backend directory):
+    python benchmarks/bench_stock_filters.py --frames 200 --boxes 10,50,150,300
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.inventory_tracking.stock_detection import StockDetector
+
+
+class RecordedModel:
+    """Only the class names are needed to filter recorded detections."""
+    names = {0: "Apple", 1: "Banana", 2: "Egg", 3: "Tomato", 4: "Orange", 5: "Green Apple", 6: "Plate"}
+
+
+def recorded_frames(frames, boxes_per_frame, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+    data = []
+    for _ in range(frames):
+        xy = rng.uniform(0, 600, (boxes_per_frame, 2))
+        wh = rng.uniform(5, 200, (boxes_per_frame, 2))
+        boxes = np.concatenate([xy, xy + wh, rng.uniform(0.03, 1, (boxes_per_frame, 1)),
+                                rng.integers(0, len(RecordedModel.names), (boxes_per_frame, 1))],
+                               axis=1).astype(np.float32)
+        data.append(boxes)
+    return frame, data
+
+
+def time_filter(method_name, frame, data):
+    detector = StockDetector(model=RecordedModel())
+    method = getattr(detector, method_name)
+    start = time.perf_counter()
+    kept = [method(frame, boxes, 2.0, 1.125) for boxes in data]
+    return (time.perf_counter() - start) / len(data), kept
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark stock detection consistency filters')
+    parser.add_argument('--frames', type=int, default=200, help='Recorded frames per run')
+    parser.add_argument('--boxes', default='10,50,150,300', help='Comma-separated boxes per frame')
+    args = parser.parse_args()
+
+    rows = []
+    for boxes_per_frame in [int(b) for b in args.boxes.split(',')]:
+        frame, data = recorded_frames(args.frames, boxes_per_frame)
+        scalar_time, scalar_kept = time_filter('filter_detections_scalar', frame, data)
+        vector_time, vector_kept = time_filter('filter_detections', frame, data)
+        identical = [[d[4:] for d in f] for f in scalar_kept] == [[d[4:] for d in f] for f in vector_kept]
+        rows.append((boxes_per_frame, scalar_time, vector_time, identical))
+
+    print(f"\n{'boxes':>6} {'scalar ms':>10} {'vector ms':>10} {'speedup':>8} {'identical':>10}")
+    for boxes_per_frame, scalar_time, vector_time, identical in rows:
+        print(f"{boxes_per_frame:>6} {scalar_time * 1000:>10.3f} {vector_time * 1000:>10.3f} "
+              f"{scalar_time / vector_time:>7.1f}x {str(identical):>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark end-to-end predict_waste time for 10/100/1000-ingredient inventories
+against the stub LLM provider (fixed latency, occasional 429 responses).
+
+The previous thread-pool implementation slept one second after every batch,
+so its floor (batches x 1s) is printed alongside for comparison.
+
+Usage (from the backend directory):
+    python benchmarks/bench_waste_llm_runner.py --sizes 10,100,1000 --latency 0.3 --rpm 3000
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.demand_waste import waste_predictor
+
+
+def make_inventory(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "ingredient": [f"ingredient_{i}" for i in range(size)],
+        "stock_kg": rng.uniform(0.5, 20, size).round(2),
+        "days_since_delivery": rng.integers(0, 15, size),
+        "shelf_life_days": rng.integers(3, 30, size),
+        "storage_temp_c": rng.integers(-18, 8, size),
+        "weekly_usage_kg": rng.uniform(1, 15, size).round(2)
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the async demand-waste LLM runner")
+    parser.add_argument("--sizes", default="10,100,1000", help="Comma-separated inventory sizes")
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub LLM latency per call (s)")
+    parser.add_argument("--rate-limit-prob", type=float, default=0.05, help="Probability a call returns 429")
+    parser.add_argument("--rpm", type=int, default=3000, help="requests_per_minute for the runner")
+    parser.add_argument("--tpm", type=int, default=2000000, help="tokens_per_minute for the runner")
+    parser.add_argument("--concurrency", type=int, default=8, help="max_concurrency for the runner")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            # A fresh stub per size (seeded by size) keeps each run repeatable
+            config_path = os.path.join(tmp, f"config_{size}.yaml")
+            with open(config_path, "w") as f:
+                yaml.safe_dump({"llm": {
+                    "provider": "stub",
+                    "stub": {"latency_ms": args.latency * 1000, "latency_jitter_ms": args.latency * 100,
+                             "rate_limit_rate": args.rate_limit_prob, "seed": size},
+                    "requests_per_minute": args.rpm,
+                    "tokens_per_minute": args.tpm,
+                    "max_concurrency": args.concurrency,
+                    "max_retries": 5,
+                    "backoff_seconds": 0.1
+                }}, f)
+
+            start = time.perf_counter()
+            result = waste_predictor.predict_waste(make_inventory(size), config_path)
+            elapsed = time.perf_counter() - start
+            stats = result.attrs["llm_stats"]
+            failed = (result["recommended_actions"].str[0] == "Fallback: Consult inventory manager").sum()
+            # The old path sent fixed batches of 5 and slept 1s after each
+            rows.append((size, stats["batches"], stats["calls"], elapsed, -(-size // 5) * 1.0, failed))
+
+    print(f"\nlatency={args.latency}s  429 prob={args.rate_limit_prob}  rpm={args.rpm}  concurrency={args.concurrency}")
+    print(f"{'ingredients':>12} {'batches':>8} {'calls':>6} {'async (s)':>10} {'legacy floor (s)':>17} {'failed rows':>12}")
+    for size, batches, calls, elapsed, legacy, failed in rows:
+        print(f"{size:>12} {batches:>8} {calls:>6} {elapsed:>10.2f} {legacy:>17.1f} {failed:>12}")
+
+
+if __name__ == "__main__":
+    main()
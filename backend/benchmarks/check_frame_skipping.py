@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Check that a gated detection mode (stride / motion) reports the same stock
+counts as full-rate detection, within stock_detection.count_tolerance.
+
+Usage (from the backend directory):
+    python benchmarks/check_frame_skipping.py --mode motion
+    python benchmarks/check_frame_skipping.py --mode stride --video data/raw/stock_videos/sample_video.mp4
+
+Exits with status 1 if any item's count differs by more than the tolerance.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.inventory_tracking.stock_detection import StockDetector
+
+
+def run(config_path, video_path, mode, workdir):
+    detector = StockDetector(config_path)
+    detector.detection_mode = mode
+    detector.video_path = video_path
+    detector.output_video_path = os.path.join(workdir, f"out_{mode}.mp4")
+    detector.output_csv_count_path = os.path.join(workdir, f"counts_{mode}.csv")
+
+    start = time.perf_counter()
+    counts = detector.detect_stock()
+    return dict(counts), detector.inference_frames, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare gated stock detection with full-rate detection')
+    parser.add_argument('--config', default='config/config.yaml', help='Path to config file')
+    parser.add_argument('--video', default=None, help='Video to check (default: data.video_image_path)')
+    parser.add_argument('--mode', default='motion', choices=['stride', 'motion'], help='Gated mode to check')
+    parser.add_argument('--tolerance', type=int, default=None, help='Override stock_detection.count_tolerance')
+    args = parser.parse_args()
+
+    with open(args.config, 'r') as f:
+        config = yaml.safe_load(f)
+    video_path = args.video or config['data']['video_image_path']
+    tolerance = args.tolerance
+    if tolerance is None:
+        tolerance = config.get('stock_detection', {}).get('count_tolerance', 1)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        full_counts, full_frames, full_time = run(args.config, video_path, 'full', workdir)
+        gated_counts, gated_frames, gated_time = run(args.config, video_path, args.mode, workdir)
+
+    print(f"\n{'item':<12} {'full':>6} {args.mode:>8} {'diff':>6}")
+    worst = 0
+    for item in sorted(set(full_counts) | set(gated_counts)):
+        full, gated = full_counts.get(item, 0), gated_counts.get(item, 0)
+        worst = max(worst, abs(full - gated))
+        print(f"{item:<12} {full:>6} {gated:>8} {gated - full:>6}")
+
+    print(f"\nInference frames: full={full_frames} {args.mode}={gated_frames}")
+    print(f"Time: full={full_time:.2f}s {args.mode}={gated_time:.2f}s "
+          f"(speedup x{full_time / gated_time:.2f})")
+
+    if worst > tolerance:
+        print(f"FAIL: max count difference {worst} exceeds tolerance {tolerance}")
+        sys.exit(1)
+    print(f"OK: max count difference {worst} within tolerance {tolerance}")
+
+
+if __name__ == '__main__':
+    main()
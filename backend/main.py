@@ -1,7 +1,6 @@
 import os
 import argparse
 import yaml
-import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
 
@@ -17,10 +16,16 @@ def run_demand_waste_module():
         print(f"Loading data from: {input_path}")
         
         df = load_inventory_data(input_path)
-        predictions = predict_waste(df)
+        # Checkpointed, so an interrupted run resumes with the batches it already finished
+        predictions = predict_waste(df, checkpoint=True)
         
         print("\nPrediction Results:")
         print(predictions.to_string(index=False, justify='left', col_space=10))
+        if predictions.attrs.get('llm_stats'):
+            stats = predictions.attrs['llm_stats']
+            print(f"\nLLM: {stats['profiles']} profiles for {stats['rows']} ingredients, "
+                  f"{stats['batches']} calls ({stats['calls_saved']} saved by deduplication, "
+                  f"{stats['resumed']} profiles resumed from checkpoint)")
         
         if not predictions.empty:
             output_path = "data/processed/waste_prediction_results.csv"
@@ -29,6 +34,9 @@ def run_demand_waste_module():
         else:
             print("Warning: No predictions generated")
             
+    except KeyboardInterrupt:
+        # Finished LLM batches are already in the checkpoint file
+        print("\nInterrupted. Completed batches are checkpointed; rerun to resume.")
     except Exception as e:
         print(f"Error in Demand Waste Predictor: {str(e)}")
         raise
@@ -40,6 +48,7 @@ def run_smart_kitchen_module():
         # Import here to avoid loading unnecessary dependencies
         from src.smart_kitchen.data_preprocessor import DataPreprocessor
         from src.smart_kitchen.sales_forecaster_prophet import SalesForecaster
+        import pandas as pd
 
         # Load config
         config_path = "config/config.yaml"
@@ -65,8 +74,7 @@ def run_smart_kitchen_module():
             print("Training models...")
             forecaster.train(train_data)
         else:
-            print("Loading existing models...")
-            forecaster.load_models()
+            print("Using existing models (loaded per item on first use)...")
         accuracy = forecaster.evaluate(test_data)
         
         print("\nAccuracy Metrics (Test Set):")
@@ -88,6 +96,7 @@ def run_smart_kitchen_module():
 
 def generate_future_data(historical_data, days_ahead):
     """Generate future data for sales forecasting"""
+    import pandas as pd
     last_date = historical_data['date'].max()
     future_dates = pd.date_range(start=last_date + timedelta(days=1), periods=days_ahead)
     future_data = []
@@ -287,8 +296,8 @@ def run_waste_heatmap(image_path=None):
         print(f"Error in Waste Heatmap Generation: {str(e)}")
         raise
 
-def run_inventory_tracking():
-    """Run the inventory tracking module"""
+def run_inventory_tracking(image_dir=None):
+    """Run the inventory tracking module (bulk mode when image_dir is given)"""
     try:
         print("\n=== Running Inventory Tracking Module ===")
         # Import here to avoid loading unnecessary dependencies
@@ -302,6 +311,14 @@ def run_inventory_tracking():
         tracker = InventoryTracker(config_path)
         
         # Run inventory detection
+        if image_dir:
+            results = tracker.detect_directory(image_dir)
+            
+            print("\nInventory Detection Results:")
+            print(f"Results saved to: {tracker.csv_output_path}")
+            print(f"Annotated images saved to: {tracker.output_dir}")
+            return results
+        
         results = tracker.detect_inventory()
         
         print("\nInventory Detection Results:")
@@ -379,15 +396,24 @@ def main():
         description='Run various kitchen management modules',
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
-    parser.add_argument('module', choices=[
+    parser.add_argument('module', nargs='?', choices=[
         'demand', 'sales', 'recipe', 'recipe_gen',
         'cost_opt', 'spoilage', 'inventory', 'detect_stock', 'waste_class', 'waste_heatmap', 'dashboard'
     ], help='Module to run')
     parser.add_argument('--image-path', help='Path to image file (for spoilage, waste classification, or heatmap)')
+    parser.add_argument('--image-dir', help='Directory of images to process in bulk (for inventory)')
+    parser.add_argument('--import-report', nargs='?', const='api', metavar='MODULE',
+                        help='Print an import-time breakdown of MODULE (default: api) and exit')
     
     args = parser.parse_args()
+    # The module is only optional for --import-report
+    if args.module is None and not args.import_report:
+        parser.error("the following arguments are required: module")
     
-    if args.module == 'demand':
+    if args.import_report:
+        from src.import_report import print_report
+        print_report(args.import_report)
+    elif args.module == 'demand':
         run_demand_waste_module()
     elif args.module == 'sales':
         run_smart_kitchen_module()
@@ -400,7 +426,7 @@ def main():
     elif args.module == 'spoilage':
         run_food_spoilage_detection(args.image_path)
     elif args.module == 'inventory':
-        run_inventory_tracking()
+        run_inventory_tracking(args.image_dir)
     elif args.module == 'detect_stock':
         run_stock_detection()
     elif args.module == 'waste_class':
@@ -0,0 +1,106 @@
+import os
+import glob
+import json
+import time
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCheckpoint:
+    """Append-only JSONL record of the recommended actions finished so far.
+
+    Each line holds one ingredient profile's key and its actions, written as
+    soon as its LLM batch completes. A rerun over the same inventory loads the
+    file and only sends the profiles that are missing. A line cut short by a
+    crash is ignored, and a file older than `max_age_hours` is discarded.
+    """
+
+    def __init__(self, path, max_age_hours=24):
+        self.path = path
+        self.max_age_seconds = max_age_hours * 3600 if max_age_hours else None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, settings, profile_keys, path=None):
+        """Checkpoint for one run from the `demand_waste.checkpoint` settings, or None when disabled.
+
+        Unless an explicit path is given, the file is named after the run's
+        profile keys, so runs over different inventories (or prompts/models)
+        never share one. Expired checkpoints in the directory are removed.
+        """
+        settings = settings or {}
+        max_age_hours = settings.get('max_age_hours', 24)
+        if path is None:
+            if not settings.get('enabled', True):
+                return None
+            directory = settings.get('dir', "data/checkpoints")
+            cls.purge_expired(directory, max_age_hours)
+            path = os.path.join(directory, f"waste_predictions-{cls.run_key(profile_keys)[:16]}.jsonl")
+        return cls(path, max_age_hours=max_age_hours)
+
+    @staticmethod
+    def run_key(profile_keys):
+        """Hash identifying a run's inputs: the set of its profile keys."""
+        return hashlib.sha256("\n".join(sorted(profile_keys)).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def purge_expired(directory, max_age_hours):
+        if not max_age_hours:
+            return
+        cutoff = time.time() - max_age_hours * 3600
+        for path in glob.glob(os.path.join(directory, "waste_predictions-*.jsonl")):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                # Removed by another run in the meantime
+                continue
+
+    @staticmethod
+    def make_key(system_prompt, model_name, row):
+        """Hash of the prompt, model and (normalized) profile fields."""
+        content = json.dumps({"system": system_prompt, "model": model_name, "row": row},
+                             sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def load(self):
+        """Map of key -> actions for every complete line in the file."""
+        done = {}
+        if not os.path.exists(self.path):
+            return done
+        if self.max_age_seconds and time.time() - os.path.getmtime(self.path) > self.max_age_seconds:
+            logger.info(f"Ignoring expired checkpoint {self.path}")
+            self.clear()
+            return done
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    done[entry["key"]] = entry["actions"]
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"Skipping incomplete checkpoint line in {self.path}")
+        return done
+
+    def append(self, keys, actions):
+        """Durably record finished profiles (flushed and fsynced before returning)."""
+        if not keys:
+            return
+        lines = "".join(json.dumps({"key": key, "actions": row_actions}, ensure_ascii=False) + "\n"
+                        for key, row_actions in zip(keys, actions))
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        """Remove the file once a run has finished every profile."""
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
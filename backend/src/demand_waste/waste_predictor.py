@@ -303,30 +303,39 @@
 
 # src/waste_predictor.py
 import pandas as pd
+import numpy as np
 import os
 import json
-import signal
-import ast
 import time
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from langchain_groq import ChatGroq
-from langchain.schema import SystemMessage, HumanMessage
+from langchain_core.messages import SystemMessage, HumanMessage
 from dotenv import load_dotenv
 import re
 import logging
-from tenacity import retry, stop_after_attempt, wait_exponential
-from jsonschema import validate, ValidationError
+import threading
+import yaml
+from jsonschema import Draft7Validator, ValidationError
+import asyncio
+import functools
+from src.llm_cache import LLMResponseCache
+from src.llm_runner import AsyncLLMRunner, estimate_tokens
+from src.llm_provider import get_chat_model
+from src.llm_json import parse_llm_json
+from src.demand_waste.checkpoint import PredictionCheckpoint
 
 # Load environment variables
 load_dotenv()
 
-# Initialize the Groq model with increased timeout
-llm = ChatGroq(
-    api_key=os.getenv("GROQ_API_KEY"),
-    model_name="Llama-3.1-8b-Instant",
-    timeout=30  # Increased timeout to handle slow responses
-)
+# Chat model used for recommended actions (provider selected by `llm.provider` in config.yaml)
+MODEL_NAME = "Llama-3.1-8b-Instant"
+
+def get_llm(config):
+    """Chat model for the configured provider, or None if it is unavailable (e.g. no GROQ_API_KEY)."""
+    try:
+        return get_chat_model(config, model_name=MODEL_NAME, timeout=30)  # Increased timeout to handle slow responses
+    except ValueError as e:
+        logger.warning(f"No LLM available ({e}); returning risk scores only.")
+        return None
 
 # Configure logging
 logging.basicConfig(
@@ -336,90 +345,114 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Retry decorator with exponential backoff
-@retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=2, max=15))
-def invoke_llm_with_retry(llm, messages):
-    try:
-        response = llm.invoke(messages)
-        logger.debug(f"Full LLM response: {response.content}")
-        return response
-    except Exception as e:
-        logger.error(f"API call failed: {e}")
-        raise
-
+# Response caches, one per config file
+_response_caches = {}
+_response_caches_lock = threading.Lock()
+
+def get_response_cache(config_path):
+    """Return the LLM response cache configured in config_path (None if disabled or missing)."""
+    if not config_path or not os.path.exists(config_path):
+        return None
+    with _response_caches_lock:
+        if config_path not in _response_caches:
+            with open(config_path, 'r') as f:
+                config = yaml.safe_load(f)
+            _response_caches[config_path] = LLMResponseCache.from_config(config)
+        return _response_caches[config_path]
+
+def normalize_batch(batch):
+    """Canonical form of the prompt fields of a batch, used for the cache key."""
+    return [
+        {
+            "ingredient": str(row["ingredient"]).strip(),
+            "stock_kg": round(float(row["stock_kg"]), 3),
+            "days_since_delivery": round(float(row["days_since_delivery"]), 3),
+            "shelf_life_days": round(float(row["shelf_life_days"]), 3),
+            "storage_temp_c": round(float(row["storage_temp_c"]), 3),
+            "weekly_usage_kg": round(float(row["weekly_usage_kg"]), 3)
+        }
+        for row in batch
+    ]
+
+# Single async LLM call; retries and rate limiting are handled by AsyncLLMRunner
+async def invoke_llm_async(llm, messages):
+    response = await llm.ainvoke(messages)
+    logger.debug(f"Full LLM response: {response.content}")
+    return response
+
+# Rough completion size per ingredient, for the tokens-per-minute budget
+COMPLETION_TOKENS_PER_ROW = 40
+
+def load_config(config_path):
+    if not config_path or not os.path.exists(config_path):
+        return {}
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f) or {}
+
+
+# Response schema, compiled once (jsonschema.validate re-checks and rebuilds it on every call)
+ANALYSES_VALIDATOR = Draft7Validator({
+    "type": "object",
+    "properties": {
+        "analyses": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "recommended_actions": {"type": "array", "items": {"type": "string"}}
+                },
+                "required": ["recommended_actions"]
+            }
+        }
+    },
+    "required": ["analyses"]
+})
 
-# Enhanced response validation with iterative repair and schema validation
-import json
-import re
-from jsonschema import validate
+def parse_response(response: str) -> dict:
+    """Parse an LLM analyses response (repairing quotes and commas) and check it against the schema."""
+    data = parse_llm_json(response)
+    ANALYSES_VALIDATOR.validate(data)
+    return data
 
 def validate_response(response: str) -> tuple[bool, str]:
     try:
-        # Step 1: Clean the response
-        response = response.strip().strip('"')
-
-        # Step 2: Try parsing with ast.literal_eval to handle single quotes
-        try:
-            data = ast.literal_eval(response)
-        except (SyntaxError, ValueError) as e:
-            logger.debug(f"Initial parse failed with ast.literal_eval: {e}")
-            # Fallback to regex-based cleaning
-            response = re.sub(r"\'(\w+)\'(\s*:\s*)", r'"\1"\2', response)  # Convert single-quoted keys
-            response = re.sub(r"\'(.*?)\'(?=(?:,|\]|\s*}))", r'"\1"', response)  # Convert single-quoted values
-            response = re.sub(r'(}\s*{)', r'}, {', response)  # Insert missing commas between objects
-            response = re.sub(r'\s+', ' ', response).strip()  # Normalize whitespace
-            data = ast.literal_eval(response)
-
-        # Step 3: Convert to standard JSON
-        json_data = json.dumps(data)
-
-        # Step 4: Validate against schema
-        schema = {
-            "type": "object",
-            "properties": {
-                "analyses": {
-                    "type": "array",
-                    "items": {
-                        "type": "object",
-                        "properties": {
-                            "recommended_actions": {"type": "array", "items": {"type": "string"}}
-                        },
-                        "required": ["recommended_actions"]
-                    }
-                }
-            },
-            "required": ["analyses"]
-        }
-        validate(instance=data, schema=schema)
-        return True, json_data
-    except (SyntaxError, ValueError, TypeError, ValidationError) as e:
+        return True, json.dumps(parse_response(response))
+    except (ValueError, ValidationError) as e:
         logger.error(f"Validation failed: {e} for raw response: {repr(response)}")
         return False, f"Invalid JSON format: {e}"
 
+class BatchMismatchError(ValueError):
+    """The LLM response did not contain one analysis per requested ingredient."""
+
 # Extract recommended actions from LLM response
-def extract_recommended_actions(response: str, ingredients, valid_rows):
-    is_valid, json_data_or_error = validate_response(response)
-    logger.info(f"Validation result: {json_data_or_error if is_valid else 'Failed - ' + json_data_or_error}")
-    if not is_valid:
-        logger.error(f"Raw invalid response: {response}")
-        return {ingr: [f"Fallback: Consult inventory manager (Error: {json_data_or_error}, Raw: {response[:100]}...)"] for ingr in ingredients}
+def extract_recommended_actions(response: str, ingredients, valid_rows=None, strict=False):
+    try:
+        data = parse_response(response)
+    except (ValueError, ValidationError) as e:
+        error = f"Invalid JSON format: {e}"
+        logger.error(f"Validation failed: {error} for raw response: {repr(response)}")
+        if strict:
+            raise BatchMismatchError(error)
+        return {ingr: [f"Fallback: Consult inventory manager (Error: {error}, Raw: {response[:100]}...)"] for ingr in ingredients}
 
     try:
-        data = json.loads(json_data_or_error)
         analyses = data.get("analyses", [])
         if len(analyses) != len(ingredients):
+            if strict:
+                raise BatchMismatchError(f"Expected {len(ingredients)} analyses, got {len(analyses)}")
             logger.warning(f"Mismatch: Expected {len(ingredients)} analyses, got {len(analyses)}. Using available data.")
         return {
             ingr: [action for action in (analyses[i].get("recommended_actions", []) if i < len(analyses) else [])]
             for i, ingr in enumerate(ingredients)
         }
+    except BatchMismatchError:
+        raise
     except (ValueError, KeyError) as e:
         logger.error(f"Extraction failed: {e}")
         return {ingr: [f"Fallback: Consult inventory manager (Error: {e})"] for ingr in ingredients}
 
-# Process a single batch
-def process_batch(batch, batch_ingredients, valid_rows, system_prompt):
-    user_input = "Analyze the following ingredients for waste prevention:\n" + "\n".join(
+def build_user_input(batch):
+    return "Analyze the following ingredients for waste prevention:\n" + "\n".join(
         f"Ingredient: {row['ingredient']}, Stock: {row['stock_kg']}kg, "
         f"Days Since Delivery: {row['days_since_delivery']}, "
         f"Shelf Life (Days): {row['shelf_life_days']}, "
@@ -428,133 +461,190 @@ def process_batch(batch, batch_ingredients, valid_rows, system_prompt):
         for row in batch
     )
 
+def pack_batches(rows, system_prompt, max_prompt_tokens=2000, max_rows=25):
+    """Greedily pack rows into batches whose estimated prompt stays within max_prompt_tokens.
+
+    The system prompt is paid once per call, so fuller batches mean fewer
+    round-trips; max_rows bounds the completion size. A row that alone
+    exceeds the budget still gets a batch of its own.
+    """
+    base_tokens = estimate_tokens(system_prompt + build_user_input([]))
+    batches, current, current_tokens = [], [], base_tokens
+    for row in rows:
+        row_tokens = estimate_tokens(build_user_input([row])) - estimate_tokens(build_user_input([])) + 1
+        if current and (current_tokens + row_tokens > max_prompt_tokens or len(current) >= max_rows):
+            batches.append(current)
+            current, current_tokens = [], base_tokens
+        current.append(row)
+        current_tokens += row_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+# Get recommended actions for a single batch (one list per row, in batch order)
+async def process_batch(batch, system_prompt, runner, llm, cache=None, depth=0):
+    user_input = build_user_input(batch)
+
     try:
-        response = invoke_llm_with_retry(llm, [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_input)
-        ])
-        logger.info(f"Raw response for batch {batch[0]['ingredient'][:10]}...: {response.content[:100]}...")
-
-        recommended_actions_dict = extract_recommended_actions(response.content, batch_ingredients, valid_rows)
-        batch_results = [
-            {
-                "ingredient": row["ingredient"],
-                "stock_kg": row["stock_kg"],
-                "days_since_delivery": row["days_since_delivery"],
-                "shelf_life_days": row["shelf_life_days"],
-                "storage_temp_c": row["storage_temp_c"],
-                "weekly_usage_kg": row["weekly_usage_kg"],
-                "suggested_replenishment_kg": row["suggested_replenishment_kg"],
-                "spoilage_risk": calculate_spoilage_risk(row["days_since_delivery"], row["shelf_life_days"]),
-                "overuse_risk": calculate_overuse_risk(row["stock_kg"], row["weekly_usage_kg"], row["shelf_life_days"]),
-                "recommended_actions": recommended_actions_dict.get(row["ingredient"], ["No actions available"])
-            }
-            for row in batch
-        ]
-        return batch_results
+        # Unchanged inventory rows reuse the previous response
+        cache_key = None
+        content = None
+        if cache is not None:
+            cache_key = LLMResponseCache.make_key(system_prompt, llm.model_name, normalize_batch(batch))
+            content = cache.get(cache_key)
+            if content is not None:
+                logger.info(f"Cache hit for batch {batch[0]['ingredient'][:10]}...")
+                cache_key = None
+
+        if content is None:
+            messages = [
+                SystemMessage(content=system_prompt),
+                HumanMessage(content=user_input)
+            ]
+            tokens = estimate_tokens(system_prompt + user_input) + COMPLETION_TOKENS_PER_ROW * len(batch)
+            response = await runner.call(lambda: invoke_llm_async(llm, messages), tokens, rows=len(batch), depth=depth)
+            content = response.content
+            logger.info(f"Raw response for batch {batch[0]['ingredient'][:10]}...: {content[:100]}...")
+
+        # Key analyses by position so repeated ingredient names in a batch keep their own actions
+        try:
+            recommended_actions_dict = extract_recommended_actions(content, range(len(batch)), strict=True)
+        except BatchMismatchError as e:
+            if len(batch) == 1:
+                recommended_actions_dict = extract_recommended_actions(content, range(1))
+            else:
+                # Split and retry only this sub-batch; its siblings keep their answers
+                logger.warning(f"{e} for batch starting with {batch[0]['ingredient']}; splitting {len(batch)} rows")
+                middle = len(batch) // 2
+                first, second = await asyncio.gather(
+                    process_batch(batch[:middle], system_prompt, runner, llm, cache, depth + 1),
+                    process_batch(batch[middle:], system_prompt, runner, llm, cache, depth + 1)
+                )
+                return first + second
+        else:
+            # Only cache complete responses, so bad ones are retried next time
+            if cache_key is not None:
+                cache.set(cache_key, content)
+        return [recommended_actions_dict.get(i, ["No actions available"]) for i in range(len(batch))]
     except Exception as e:
         logger.error(f"Error processing batch starting with {batch[0]['ingredient']}: {e}")
-        return [
-            {
-                "ingredient": row["ingredient"],
-                "stock_kg": row["stock_kg"],
-                "days_since_delivery": row["days_since_delivery"],
-                "shelf_life_days": row["shelf_life_days"],
-                "storage_temp_c": row["storage_temp_c"],
-                "weekly_usage_kg": row["weekly_usage_kg"],
-                "suggested_replenishment_kg": row["suggested_replenishment_kg"],
-                "spoilage_risk": "Error: Batch processing failed",
-                "overuse_risk": "Error: Batch processing failed",
-                "recommended_actions": ["Fallback: Consult inventory manager"]
-            }
-            for row in batch
-        ]
-
-# Heuristic calculations
-def calculate_spoilage_risk(days_since_delivery: int, shelf_life_days: int) -> float:
-    """Heuristically calculate spoilage risk based on days since delivery and shelf life."""
-    days_past = days_since_delivery - shelf_life_days
-    if days_past <= 0:
-        return 0.0
-    elif 0 < days_past <= 2:
-        return 0.5
-    elif 2 < days_past <= 5:
-        return 0.8
-    else:
-        return 1.0
-
-def calculate_overuse_risk(stock_kg: float, weekly_usage_kg: float, shelf_life_days: int) -> float:
-    """Heuristically calculate overuse risk based on stock duration."""
-    stock_duration = (stock_kg / (weekly_usage_kg / 7)) if weekly_usage_kg > 0 else float('inf')
-    if stock_duration >= shelf_life_days:
-        return 0.0
-    elif stock_duration >= 7:
-        return 0.3
-    elif stock_duration >= 3:
-        return 0.7
-    else:
-        return 1.0
-
-# Predict waste and suggest replenishment for ingredients
-def predict_waste(df: pd.DataFrame) -> pd.DataFrame:
-    results = []
+        return [["Fallback: Consult inventory manager"] for _ in batch]
 
-    # Handle Ctrl+C gracefully
-    def signal_handler(sig, frame):
-        logger.info("Process interrupted by user. Saving partial results...")
-        partial_df = pd.DataFrame(results)
-        partial_df.to_csv("partial_waste_predictions.csv", index=False)
-        exit(0)
+def is_fallback(actions):
+    """True for the placeholder actions used when a batch's LLM call failed."""
+    return any(str(action).startswith("Fallback:") for action in actions)
 
-    signal.signal(signal.SIGINT, signal_handler)
+# Input fields every row needs for scoring and for the LLM prompt
+REQUIRED_FIELDS = ['ingredient', 'stock_kg', 'days_since_delivery', 'shelf_life_days', 'storage_temp_c', 'weekly_usage_kg']
 
-    start_time = time.time()  # Track execution time
+def score_inventory(df: pd.DataFrame, current_date=None) -> pd.DataFrame:
+    """Vectorized replenishment, spoilage and overuse scores for the whole inventory.
 
+    Spoilage risk by days past shelf life: <= 0 -> 0.0, <= 2 -> 0.5, <= 5 -> 0.8,
+    else 1.0. Overuse risk by days of stock at the weekly usage rate: at least
+    the shelf life -> 0.0, >= 7 -> 0.3, >= 3 -> 0.7, else 1.0. Rows with missing
+    fields get "Error: Missing data" risks.
+    """
     # Calculate days_since_delivery dynamically using today's date if not provided
-    current_date = datetime.now()
     if 'days_since_delivery' not in df.columns:
         if 'delivery_date' not in df.columns:
             raise ValueError("Either 'days_since_delivery' or 'delivery_date' must be provided in the DataFrame.")
-        df['delivery_date'] = pd.to_datetime(df['delivery_date'], errors='coerce')
-        df['days_since_delivery'] = (current_date - df['delivery_date']).dt.days
-
-    # Validate input data and build batch input
-    valid_rows = []
-    ingredients = []
-    for _, row in df.iterrows():
-        required_fields = ['ingredient', 'stock_kg', 'days_since_delivery', 'shelf_life_days', 'storage_temp_c', 'weekly_usage_kg']
-        if any(pd.isna(row[field]) for field in required_fields):
-            logger.warning(f"Missing data for {row['ingredient']}. Skipping incomplete row.")
-            results.append({
-                "ingredient": row["ingredient"],
-                "stock_kg": None if pd.isna(row["stock_kg"]) else row["stock_kg"],
-                "days_since_delivery": None if pd.isna(row["days_since_delivery"]) else row["days_since_delivery"],
-                "shelf_life_days": None if pd.isna(row["shelf_life_days"]) else row["shelf_life_days"],
-                "storage_temp_c": None if pd.isna(row["storage_temp_c"]) else row["storage_temp_c"],
-                "weekly_usage_kg": None if pd.isna(row["weekly_usage_kg"]) else row["weekly_usage_kg"],
-                "suggested_replenishment_kg": 0.0,
-                "spoilage_risk": "Error: Missing data",
-                "overuse_risk": "Error: Missing data",
-                "recommended_actions": []
-            })
-            continue
-
-        buffer_storage = 0.10 * row['weekly_usage_kg']
-        suggested_replenishment_kg = max(0, (row['weekly_usage_kg'] + buffer_storage) - row['stock_kg'])
-        valid_rows.append({
-            "ingredient": row["ingredient"],
-            "stock_kg": row["stock_kg"],
-            "days_since_delivery": row["days_since_delivery"],
-            "shelf_life_days": row["shelf_life_days"],
-            "storage_temp_c": row["storage_temp_c"],
-            "weekly_usage_kg": row["weekly_usage_kg"],
-            "suggested_replenishment_kg": round(suggested_replenishment_kg, 2)
-        })
-        ingredients.append(row["ingredient"])
-
-    if not valid_rows:
+        delivery_date = pd.to_datetime(df['delivery_date'], errors='coerce')
+        df = df.assign(days_since_delivery=((current_date or datetime.now()) - delivery_date).dt.days)
+
+    missing = df[REQUIRED_FIELDS].isna().any(axis=1).to_numpy()
+    stock = pd.to_numeric(df['stock_kg'], errors='coerce').to_numpy(dtype=float)
+    days = pd.to_numeric(df['days_since_delivery'], errors='coerce').to_numpy(dtype=float)
+    shelf_life = pd.to_numeric(df['shelf_life_days'], errors='coerce').to_numpy(dtype=float)
+    weekly_usage = pd.to_numeric(df['weekly_usage_kg'], errors='coerce').to_numpy(dtype=float)
+
+    # Replenish to one week of usage plus a 10% buffer
+    buffer_storage = 0.10 * weekly_usage
+    replenishment = np.round(np.maximum(0, (weekly_usage + buffer_storage) - stock), 2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        days_past = days - shelf_life
+        spoilage = np.select([days_past <= 0, days_past <= 2, days_past <= 5], [0.0, 0.5, 0.8], 1.0)
+
+        # Days of stock at the current usage rate; no usage means it never runs out
+        stock_duration = np.where(weekly_usage > 0, stock / (weekly_usage / 7), np.inf)
+        overuse = np.select([stock_duration >= shelf_life, stock_duration >= 7, stock_duration >= 3], [0.0, 0.3, 0.7], 1.0)
+
+    result = pd.DataFrame({field: df[field].to_numpy() for field in REQUIRED_FIELDS})
+    result['suggested_replenishment_kg'] = np.where(missing, 0.0, replenishment)
+    result['spoilage_risk'] = spoilage
+    result['overuse_risk'] = overuse
+    if missing.any():
+        logger.warning(f"Missing data for {int(missing.sum())} ingredients. Skipping incomplete rows.")
+        for column in ('spoilage_risk', 'overuse_risk'):
+            result[column] = result[column].astype(object)
+            result.loc[missing, column] = "Error: Missing data"
+        # None instead of NaN so the results stay JSON serializable
+        for field in REQUIRED_FIELDS[1:]:
+            result[field] = result[field].astype(object).where(result[field].notna(), None)
+    return result
+
+def dedup_profiles(scores: pd.DataFrame):
+    """Group rows whose prompt fields are identical (as normalize_batch canonicalizes them).
+
+    Only exact matches share an answer: the LLM's actions can quote the row's own
+    numbers (e.g. "Replenish stock by 2.2kg"), which would be wrong for a merely
+    similar row. Returns (representatives, inverse): row positions sent to the LLM,
+    one per profile, and for every row the index of its profile in `representatives`.
+    """
+    keys = pd.DataFrame({"ingredient": scores['ingredient'].astype(str).str.strip()})
+    for field in REQUIRED_FIELDS[1:]:
+        keys[field] = np.round(scores[field].to_numpy(dtype=float), 3)
+    inverse = keys.groupby(list(keys.columns), sort=False, dropna=False).ngroup().to_numpy()
+    _, representatives = np.unique(inverse, return_index=True)
+    return representatives, inverse
+
+# Predict waste and suggest replenishment for ingredients
+def predict_waste(df: pd.DataFrame, config_path: str = "config/config.yaml", use_llm: bool = None,
+                  on_scores=None, on_actions=None, checkpoint: bool = False, checkpoint_path: str = None) -> pd.DataFrame:
+    """Score every ingredient, then ask the LLM for recommended actions.
+
+    For streaming, on_scores(result_df) is called as soon as the deterministic
+    columns are ready, and on_actions(positions, actions) once per finished LLM
+    batch with the row positions it covers and their recommended actions.
+
+    With checkpoint=True (or an explicit checkpoint_path), finished profiles are
+    appended to a checkpoint file for this inventory (demand_waste.checkpoint) as
+    their batches complete, so an interrupted run picks up where it stopped. The
+    file is removed once every profile has an answer.
+    """
+    config = load_config(config_path)
+    start_time = time.time()  # Track execution time
+
+    # Deterministic columns for every row first; the LLM only adds recommended_actions
+    result_df = score_inventory(df)
+    result_df['recommended_actions'] = [[] for _ in range(len(result_df))]
+    logger.info(f"Scored {len(result_df)} ingredients in {time.time() - start_time:.3f}s")
+    if on_scores is not None:
+        on_scores(result_df)
+
+    if use_llm is None:
+        use_llm = config.get('demand_waste', {}).get('use_llm', True)
+    llm = get_llm(config) if use_llm else None
+    if llm is None:
+        return result_df
+
+    valid_mask = result_df['spoilage_risk'] != "Error: Missing data"
+    if not valid_mask.any():
         logger.error("No valid data to process.")
-        return pd.DataFrame(results)
+        return result_df
+    valid_positions = np.flatnonzero(valid_mask.to_numpy())
+    settings = config.get('demand_waste', {})
+
+    # Identical ingredient profiles (e.g. the same stock at several outlets) share one LLM answer
+    if settings.get('dedup', {}).get('enabled', True):
+        representatives, inverse = dedup_profiles(result_df.iloc[valid_positions])
+    else:
+        representatives = inverse = np.arange(len(valid_positions))
+    valid_rows = result_df.iloc[valid_positions[representatives]][REQUIRED_FIELDS + ['suggested_replenishment_kg']].to_dict('records')
+
+    cache = get_response_cache(config_path)
+    runner = AsyncLLMRunner.from_config(config)
 
     # Define system prompt
     system_prompt = (
@@ -577,22 +667,77 @@ def predict_waste(df: pd.DataFrame) -> pd.DataFrame:
         "}"
     )
 
-    # Process batches in parallel
-    batch_size = 5
-    batches = [valid_rows[i:i + batch_size] for i in range(0, len(valid_rows), batch_size)]
-    batch_ingredients = [ingredients[i:i + batch_size] for i in range(0, len(ingredients), batch_size)]
-
-    with ThreadPoolExecutor(max_workers=min(4, len(batches))) as executor:
-        future_to_batch = {
-            executor.submit(process_batch, batch, batch_ingr, valid_rows, system_prompt): (batch, batch_ingr)
-            for batch, batch_ingr in zip(batches, batch_ingredients)
-        }
-        for future in as_completed(future_to_batch):
-            batch_results = future.result()
-            results.extend(batch_results)
-            time.sleep(1)  # Rate limiting delay between batches
+    # Profiles answered by an earlier, interrupted run are read back instead of asked again
+    profile_keys = [PredictionCheckpoint.make_key(system_prompt, llm.model_name, row) for row in normalize_batch(valid_rows)]
+    checkpoint = (PredictionCheckpoint.from_config(settings.get('checkpoint'), profile_keys, path=checkpoint_path)
+                  if checkpoint or checkpoint_path else None)
+    completed = checkpoint.load() if checkpoint is not None else {}
+    profile_actions = [completed.get(key) for key in profile_keys]
+    pending = [profile for profile, actions in enumerate(profile_actions) if actions is None]
+    resumed = len(valid_rows) - len(pending)
+    if resumed:
+        logger.info(f"Resuming from {checkpoint.path}: {resumed} of {len(valid_rows)} profiles already done")
+
+    # Pack rows into as few calls as the prompt-token budget allows
+    pack = functools.partial(pack_batches, system_prompt=system_prompt,
+                             max_prompt_tokens=settings.get('max_prompt_tokens', 2000),
+                             max_rows=settings.get('max_batch_rows', 25))
+    batches = pack([valid_rows[profile] for profile in pending])
+    # Dedup savings compare every profile with every row, whether or not the checkpoint already had them:
+    # the calls the full (non-deduplicated) inventory would have needed at the same rows per call
+    profile_calls = len(pack(valid_rows)) if resumed else len(batches)
+    calls_saved = round(len(valid_positions) * profile_calls / len(valid_rows)) - profile_calls
+    logger.info(f"Deduplicated {len(valid_positions)} ingredients into {len(valid_rows)} profiles, "
+                f"packed into {len(batches)} batches ({calls_saved} LLM calls saved)")
+
+    # Row positions of every member of each profile, for fanning answers back out
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.searchsorted(inverse[order], np.arange(len(valid_rows) + 1))
+    batch_offsets = np.cumsum([0] + [len(batch) for batch in batches])
+
+    def emit(profiles, actions):
+        positions, row_actions = [], []
+        for profile, actions_for_profile in zip(profiles, actions):
+            members = valid_positions[order[bounds[profile]:bounds[profile + 1]]]
+            positions.extend(members.tolist())
+            row_actions.extend(list(actions_for_profile) for _ in members)
+        on_actions(positions, row_actions)
+
+    if on_actions is not None and resumed:
+        restored = [profile for profile, actions in enumerate(profile_actions) if actions is not None]
+        emit(restored, [profile_actions[profile] for profile in restored])
+
+    async def run_batch(batch_index, runner):
+        batch_actions = await process_batch(batches[batch_index], system_prompt, runner, llm, cache=cache)
+        profiles = pending[batch_offsets[batch_index]:batch_offsets[batch_index + 1]]
+        if checkpoint is not None:
+            # Fallbacks are left out so a rerun asks for them again
+            finished = [(profile_keys[profile], actions) for profile, actions in zip(profiles, batch_actions)
+                        if not is_fallback(actions)]
+            checkpoint.append([key for key, _ in finished], [actions for _, actions in finished])
+        if on_actions is not None:
+            emit(profiles, batch_actions)
+        return batch_actions
+
+    # Batches run concurrently on an event loop, paced by the configured rate limits
+    tasks = [functools.partial(run_batch, batch_index) for batch_index in range(len(batches))]
+    for profile, actions in zip(pending, (row_actions for batch_actions in runner.run(tasks) for row_actions in batch_actions)):
+        profile_actions[profile] = actions
+    if checkpoint is not None and not any(is_fallback(actions) for actions in profile_actions):
+        checkpoint.clear()
+
+    # Fan each profile's actions back out to every row in its bucket
+    recommended_actions = result_df['recommended_actions'].tolist()
+    for position, profile in zip(valid_positions, inverse):
+        recommended_actions[position] = list(profile_actions[profile])
+    result_df['recommended_actions'] = recommended_actions
+    result_df.attrs['llm_stats'] = dict(runner.stats, rows=len(valid_positions), profiles=len(valid_rows),
+                                        batches=len(batches), calls_saved=calls_saved, resumed=resumed,
+                                        split_calls=sum(1 for call in runner.calls if call.get("depth")))
+    result_df.attrs['llm_calls'] = runner.calls
+    logger.info(f"Processed {len(valid_positions)} ingredients ({len(valid_rows)} profiles) in {len(batches)} batches "
+                f"in {time.time() - start_time:.2f}s (LLM stats: {runner.stats})")
 
-    result_df = pd.DataFrame(results)
     pd.set_option('display.max_colwidth', 200)
     pd.set_option('display.width', 200)
 
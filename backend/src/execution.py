@@ -0,0 +1,170 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+
+class EndpointStats:
+    def __init__(self, name, limit):
+        self.name = name
+        self.limit = limit
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self.total_wait_time = 0.0
+        self.total_run_time = 0.0
+
+    def to_dict(self):
+        finished = self.completed + self.failed
+        return {
+            "endpoint": self.name,
+            "limit": self.limit,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_wait_s": round(self.total_wait_time / finished, 3) if finished else 0.0,
+            "avg_run_s": round(self.total_run_time / finished, 3) if finished else 0.0,
+        }
+
+
+class ExecutionLayer:
+    """Runs blocking work off the event loop with per-endpoint concurrency limits.
+
+    CPU-bound pipelines (pandas, Prophet) go to a process pool and must be
+    picklable top-level functions. Model inference and blocking network/LLM
+    calls go to a thread pool, since the models live in this process's model
+    registry and torch / HTTP clients release the GIL while they work.
+    """
+
+    def __init__(self, cpu_workers=2, io_workers=8, endpoint_limits=None):
+        self.cpu_workers = cpu_workers
+        self.io_workers = io_workers
+        self.endpoint_limits = dict(endpoint_limits or {})
+        self.default_limit = self.endpoint_limits.pop('default', 4)
+
+        self._thread_pool = None
+        self._process_pool = None
+        self._pool_lock = threading.Lock()
+        self._in_flight = {"cpu": 0, "io": 0}
+
+        self._loop = None
+        self._semaphores = {}
+        self._stats = {}
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.get('execution', {})
+        return cls(
+            cpu_workers=settings.get('cpu_workers', 2),
+            io_workers=settings.get('io_workers', 8),
+            endpoint_limits=settings.get('endpoint_limits', {})
+        )
+
+    def _get_thread_pool(self):
+        with self._pool_lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=self.io_workers,
+                                                       thread_name_prefix="api-io")
+            return self._thread_pool
+
+    def _get_process_pool(self):
+        with self._pool_lock:
+            if self._process_pool is None:
+                # Spawn rather than fork: the API process holds torch and
+                # executor threads, which are not fork-safe
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.cpu_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._process_pool
+
+    def _get_semaphore(self, endpoint):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Semaphores are bound to the loop they were first used on
+            self._loop = loop
+            self._semaphores = {}
+        if endpoint not in self._semaphores:
+            limit = self.endpoint_limits.get(endpoint, self.default_limit)
+            self._semaphores[endpoint] = asyncio.Semaphore(limit)
+            if endpoint not in self._stats:
+                self._stats[endpoint] = EndpointStats(endpoint, limit)
+        return self._semaphores[endpoint]
+
+    async def _run(self, kind, endpoint, fn, args, kwargs):
+        semaphore = self._get_semaphore(endpoint)
+        stats = self._stats[endpoint]
+
+        # Wait for a slot for this endpoint
+        stats.queued += 1
+        stats.max_queue_depth = max(stats.max_queue_depth, stats.queued)
+        wait_start = time.time()
+        try:
+            await semaphore.acquire()
+        finally:
+            stats.queued -= 1
+        stats.total_wait_time += time.time() - wait_start
+
+        if kind == "cpu" and self.cpu_workers > 0:
+            pool = self._get_process_pool()
+        else:
+            pool = self._get_thread_pool()
+
+        stats.running += 1
+        self._in_flight[kind] += 1
+        run_start = time.time()
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(
+                pool, functools.partial(fn, *args, **kwargs)
+            )
+            stats.completed += 1
+            return result
+        except Exception:
+            stats.failed += 1
+            raise
+        finally:
+            stats.total_run_time += time.time() - run_start
+            stats.running -= 1
+            self._in_flight[kind] -= 1
+            semaphore.release()
+
+    async def run_cpu(self, endpoint, fn, *args, **kwargs):
+        """Run a picklable CPU-bound function in the process pool."""
+        return await self._run("cpu", endpoint, fn, args, kwargs)
+
+    async def run_io(self, endpoint, fn, *args, **kwargs):
+        """Run a blocking I/O or inference function in the thread pool."""
+        return await self._run("io", endpoint, fn, args, kwargs)
+
+    def stats(self):
+        cpu_size = self.cpu_workers if self.cpu_workers > 0 else 0
+        return {
+            "pools": {
+                "cpu": {
+                    "workers": cpu_size,
+                    "in_flight": self._in_flight["cpu"],
+                    "queue_depth": max(0, self._in_flight["cpu"] - cpu_size) if cpu_size else 0
+                },
+                "io": {
+                    "workers": self.io_workers,
+                    "in_flight": self._in_flight["io"],
+                    "queue_depth": max(0, self._in_flight["io"] - self.io_workers)
+                }
+            },
+            "endpoints": [s.to_dict() for s in self._stats.values()]
+        }
+
+    def shutdown(self, wait=False):
+        with self._pool_lock:
+            if self._thread_pool is not None:
+                self._thread_pool.shutdown(wait=wait, cancel_futures=True)
+                self._thread_pool = None
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=wait, cancel_futures=True)
+                self._process_pool = None
@@ -1,6 +1,5 @@
 import os
 from PIL import Image
-from groq import Groq
 from dotenv import load_dotenv
 import csv
 import datetime
@@ -10,9 +9,10 @@ from io import BytesIO
 import logging
 from tenacity import retry, stop_after_attempt, wait_exponential
 import yaml
+from src.llm_provider import get_chat_client
 
 class FoodSpoilageDetector:
-    def __init__(self, config_path):
+    def __init__(self, config_path, llm_config=None):
         # Load config
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
@@ -20,12 +20,15 @@ class FoodSpoilageDetector:
         # Load environment variables
         load_dotenv()
 
-        # Initialize the Groq client
-        self.client = Groq(api_key=os.getenv("GROQ_API_KEY"))
-        
         # Get model name with default
         self.model_name = self.config.get('model', {}).get('name', "llama-3.2-11b-vision-preview")
 
+        # Initialize the chat client. The provider comes from `llm_config` (the main config's `llm`
+        # section, passed by the model registry) or else this config's own `llm` section;
+        # raises ValueError if the Groq provider is selected without GROQ_API_KEY
+        llm_settings = llm_config if llm_config is not None else self.config.get('llm', {})
+        self.client = get_chat_client({'llm': llm_settings}, model_name=self.model_name)
+
         # Configure logging with defaults
         log_level = self.config.get('logging', {}).get('level', 'INFO')
         log_format = self.config.get('logging', {}).get('format', '%(asctime)s - %(levelname)s - %(message)s')
@@ -0,0 +1,70 @@
+"""
+Startup-time report: where the time goes when a backend module is imported.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter (so
+nothing is already cached in sys.modules) and summarises the breakdown.
+
+Usage (from the backend directory):
+    python main.py --import-report            # api.py
+    python -m src.import_report main --top 30
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+
+def measure_imports(module="api", cwd=None):
+    """Import `module` in a fresh interpreter.
+
+    Returns a list of (name, self_us, cumulative_us, depth) in import order;
+    depth 0 entries are top-level imports.
+    """
+    cwd = cwd or os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=cwd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def print_report(module="api", top=20, cwd=None):
+    """Print the total import time, the slowest packages and the slowest modules."""
+    entries = measure_imports(module, cwd=cwd)
+    total_us = sum(self_us for _, self_us, _, _ in entries)
+
+    # Cumulative time per top-level package (e.g. everything under pandas)
+    packages = {}
+    for name, self_us, _, _ in entries:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    print(f"\nimport {module}: {total_us / 1e6:.2f}s across {len(entries)} modules")
+    print(f"\n{'package':>30} {'ms':>9} {'share':>7}")
+    for package, package_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"{package:>30} {package_us / 1000:>9.1f} {package_us / total_us:>7.1%}")
+
+    print(f"\n{'module (cumulative)':>50} {'ms':>9}")
+    for name, _, cumulative_us, _ in sorted(entries, key=lambda entry: -entry[2])[:top]:
+        print(f"{name:>50} {cumulative_us / 1000:>9.1f}")
+    return total_us / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time breakdown of a backend module")
+    parser.add_argument("module", nargs="?", default="api", help="Module to import (default: api)")
+    parser.add_argument("--top", type=int, default=20, help="Rows per table")
+    args = parser.parse_args()
+    print_report(args.module, top=args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,13 @@ import matplotlib.pyplot as plt
 import pandas as pd
 from ultralytics import YOLO
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import yaml
 
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
 class InventoryTracker:
-    def __init__(self, config_path=None):
+    def __init__(self, config_path=None, model=None):
         # Get the workspace root directory
         self.WORKSPACE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         
@@ -18,8 +21,15 @@ class InventoryTracker:
         
         # Define paths relative to workspace root
         self.model_path = self.config['model']['inventory_model_path']
-        self.output_dir = os.path.join(self.WORKSPACE_ROOT, "data/output/detection_images")
-        self.csv_output_path = os.path.join(self.WORKSPACE_ROOT, "data/output/stock_prediction/predicted_items.csv")
+        self.settings = self.config.get('inventory_tracking', {})
+        self.output_dir = self.settings.get(
+            'output_dir', os.path.join(self.WORKSPACE_ROOT, "data/output/detection_images"))
+        self.csv_output_path = self.settings.get(
+            'csv_output_path', os.path.join(self.WORKSPACE_ROOT, "data/output/stock_prediction/predicted_items.csv"))
+        
+        # Bulk mode settings
+        self.batch_size = self.settings.get('batch_size', 8)
+        self.write_workers = self.settings.get('write_workers', 4)
         
         # Class names mapping
         self.items_list = {
@@ -30,8 +40,8 @@ class InventoryTracker:
         self.id_to_name = {v: k for k, v in self.items_list.items()}  
         self.all_categories = list(self.items_list.keys())
         
-        # Initialize model
-        self.model = None
+        # Initialize model (a preloaded model can be shared across trackers)
+        self.model = model
         self.input_image_path = None
         self.annotated_image_path = None
         
@@ -58,10 +68,9 @@ class InventoryTracker:
         print(f"Loaded model from {weights_path}")
         return self.model
 
-    def draw_predictions(self, image, predictions):
-        """Draw bounding boxes and labels on the image."""
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)  # For display
-        image_bgr = image.copy()  # For saving (cv2 uses BGR)
+    def draw_predictions(self, image, predictions, in_place=False):
+        """Draw bounding boxes and labels on the (BGR) image that gets saved."""
+        image_bgr = image if in_place else image.copy()
         
         for pred in predictions:
             x_min, y_min, x_max, y_max = map(int, pred[:4])  # Bounding box coordinates
@@ -70,17 +79,19 @@ class InventoryTracker:
             class_name = self.id_to_name.get(class_id, f"Unknown_{class_id}")
             
             # Draw rectangle
-            cv2.rectangle(image_rgb, (x_min, y_min), (x_max, y_max), (0, 255, 0), 2)
             cv2.rectangle(image_bgr, (x_min, y_min), (x_max, y_max), (0, 255, 0), 2)
             
             # Add label with class name and confidence
             label = f"{class_name} ({conf:.2f})"
-            cv2.putText(image_rgb, label, (x_min, y_min - 10), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
             cv2.putText(image_bgr, label, (x_min, y_min - 10), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
             
-        return image_rgb, image_bgr
+        return image_bgr
+    
+    def count_items(self, predictions):
+        """Count detected items by class name."""
+        class_ids = [int(pred[5]) for pred in predictions]
+        return dict(Counter([self.id_to_name.get(cid, f"Unknown_{cid}") for cid in class_ids]))
 
     def predict_and_plot(self):
         """Run predictions on the input image, plot results, and save annotated images."""
@@ -121,12 +132,10 @@ class InventoryTracker:
             self.annotated_image = image
         else:
             # Count items
-            class_ids = [int(pred[5]) for pred in predictions]
-            item_counts = Counter([self.id_to_name.get(cid, f"Unknown_{cid}") for cid in class_ids])
-            detected_items_list.append({filename: dict(item_counts)})
+            detected_items_list.append({filename: self.count_items(predictions)})
             
             # Draw predictions
-            annotated_image_rgb, annotated_image_bgr = self.draw_predictions(image, predictions)
+            annotated_image_bgr = self.draw_predictions(image, predictions)
             
             # Set the annotated image attribute
             self.annotated_image = annotated_image_bgr
@@ -154,6 +163,74 @@ class InventoryTracker:
 
         return detected_items_list
 
+    def list_images(self, inputs):
+        """Resolve a directory, a single path or a list of paths to image files."""
+        if isinstance(inputs, (str, os.PathLike)):
+            if os.path.isdir(inputs):
+                return sorted(os.path.join(inputs, name) for name in os.listdir(inputs)
+                              if name.lower().endswith(IMAGE_EXTENSIONS))
+            return [str(inputs)]
+        return [str(path) for path in inputs]
+    
+    def predict_batches(self, image_paths, batch_size):
+        """Yield (path, image, predictions) with YOLO run once per batch of images."""
+        for start in range(0, len(image_paths), batch_size):
+            batch = []
+            for path in image_paths[start:start + batch_size]:
+                image = cv2.imread(path)
+                if image is None:
+                    print(f"Warning: Could not load {path}")
+                    continue
+                batch.append((path, image))
+            if not batch:
+                continue
+            
+            results = self.model.predict([image for _, image in batch], conf=0.25, imgsz=640, verbose=False)
+            for (path, image), result in zip(batch, results):
+                yield path, image, result.boxes.data.cpu().numpy()
+    
+    def detect_directory(self, inputs, batch_size=None, write_workers=None):
+        """Bulk mode: detect items in a directory or list of images.
+        
+        Images go through YOLO in batches, annotated images are written on a
+        thread pool, and all counts are written to the CSV in a single write.
+        """
+        if self.model is None:
+            self.load_model()
+        
+        image_paths = self.list_images(inputs)
+        batch_size = batch_size or self.batch_size
+        write_workers = write_workers or self.write_workers
+        print(f"Processing {len(image_paths)} images in batches of {batch_size}")
+        os.makedirs(self.output_dir, exist_ok=True)
+        
+        detected_items_list = []
+        inventory_data = []
+        with ThreadPoolExecutor(max_workers=write_workers, thread_name_prefix="inventory-write") as writer:
+            writes = []
+            for path, image, predictions in self.predict_batches(image_paths, batch_size):
+                filename = os.path.basename(path)
+                item_counts = self.count_items(predictions)
+                detected_items_list.append({filename: item_counts})
+                for item_name, count in item_counts.items():
+                    inventory_data.append({'image': filename, 'item': item_name, 'count': count})
+                
+                # Annotate once, in place, and hand the encode/write to the pool
+                if len(predictions) > 0:
+                    annotated_path = os.path.join(self.output_dir, f"detected_{filename}")
+                    self.draw_predictions(image, predictions, in_place=True)
+                    writes.append(writer.submit(cv2.imwrite, annotated_path, image))
+            
+            # Surface any write errors
+            for write in writes:
+                write.result()
+        
+        df = pd.DataFrame(inventory_data, columns=['image', 'item', 'count'])
+        df.to_csv(self.csv_output_path, index=False)
+        print(f"Saved inventory data for {len(detected_items_list)} images to CSV: {self.csv_output_path}")
+        
+        return detected_items_list
+
     def detect_inventory(self):
         """Main method to run the inventory detection process."""
         try:
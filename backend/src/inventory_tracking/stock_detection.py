@@ -5,10 +5,14 @@ from ultralytics import YOLO
 import time
 import yaml
 import os
-from collections import defaultdict
+import queue
+import threading
+from collections import defaultdict, deque
+from contextlib import nullcontext
+from src.inventory_tracking.tracker import SortTracker
 
 class StockDetector:
-    def __init__(self, config_path=None):
+    def __init__(self, config_path=None, model=None, model_lock=None):
         # Get the workspace root directory
         self.WORKSPACE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         
@@ -56,6 +60,35 @@ class StockDetector:
             "Carrot": (0, 128, 255)    # Light Blue
         }
         
+        # Define expected color ranges for each food type (BGR format)
+        self.color_ranges = {
+            "Apple": [(0, 50, 50), (50, 255, 255)],  # Red
+            "Cheese": [(0, 200, 200), (100, 255, 255)],  # Yellow
+            "Cucumber": [(50, 100, 0), (150, 255, 100)],  # Green
+            "Egg": [(200, 200, 200), (255, 255, 255)],  # White
+            "Grape": [(100, 0, 100), (200, 100, 200)],  # Purple
+            "Zucchini": [(50, 100, 0), (150, 255, 100)],  # Green
+            "Mushroom": [(150, 150, 150), (220, 220, 220)],  # Gray
+            "Strawberry": [(0, 0, 200), (100, 100, 255)],  # Red
+            "Tomato": [(0, 0, 150), (50, 50, 255)],  # Red
+            "Banana": [(0, 200, 200), (100, 255, 255)],  # Yellow
+            "Lemon": [(0, 200, 0), (100, 255, 100)],  # Yellow-green
+            "Broccoli": [(50, 100, 0), (150, 255, 100)],  # Green
+            "Orange": [(0, 150, 200), (50, 255, 255)],  # Orange
+            "Carrot": [(0, 100, 200), (50, 255, 255)]  # Orange
+        }
+        
+        # Per-item color bounds as arrays, with the lighting tolerance applied.
+        # Items without a range get bounds that never reject.
+        self.item_names = list(self.inventory_items.keys())
+        self.color_lower = np.full((len(self.item_names), 3), -np.inf)
+        self.color_upper = np.full((len(self.item_names), 3), np.inf)
+        for i, item in enumerate(self.item_names):
+            if item in self.color_ranges:
+                min_color, max_color = self.color_ranges[item]
+                self.color_lower[i] = np.array(min_color) * 0.5
+                self.color_upper[i] = np.array(max_color) * 1.5
+        
         # Define parameters
         self.min_box_size = 0.001  # 0.1% of frame size
         self.optimal_width = 640
@@ -64,6 +97,33 @@ class StockDetector:
         self.spatial_window = 10
         self.class_history_window = 10
         
+        # Video processing settings
+        self.stock_settings = (self.config or {}).get('stock_detection', {})
+        self.snapshot_interval = self.stock_settings.get('snapshot_interval', 10)
+        self.batch_size = max(1, int(self.stock_settings.get('batch_size', 8)))
+        self.decode_ahead = max(self.batch_size, int(self.stock_settings.get('decode_ahead', 32)))
+        self.pipeline_depth = max(1, int(self.stock_settings.get('pipeline_depth', 2)))
+        
+        # Multi-object tracking gives unique item counts; it replaces the
+        # spatial/class history filters when enabled
+        self.tracker_settings = self.stock_settings.get('tracker', {})
+        self.use_tracker = self.tracker_settings.get('enabled', True)
+        self.tracker = SortTracker.from_config(self.tracker_settings, len(self.item_names))
+        self.stage_timings = {}
+        self._resize_buffers = []
+        
+        # Frame gating: "full" runs YOLO on every frame, "stride" on every
+        # `stride`-th frame, "motion" only when the frame changed enough since
+        # the last inferred one. Skipped frames reuse the previous detections.
+        self.detection_mode = self.stock_settings.get('detection_mode', 'full')
+        self.stride = max(1, int(self.stock_settings.get('stride', 5)))
+        self.motion_threshold = self.stock_settings.get('motion_threshold', 4.0)
+        self.max_skip = max(1, int(self.stock_settings.get('max_skip', 30)))
+        self.motion_size = (64, 36)
+        self._last_inferred_thumb = None
+        self._frames_since_inference = 0
+        self.inference_frames = 0
+        
         # Initialize tracking variables
         self.prev_detections = {}
         self.spatial_history = {}
@@ -73,6 +133,15 @@ class StockDetector:
         # Initialize model
         self.model = None
         self.class_mapping = {}
+        self.class_item_index = np.empty(0, dtype=np.int64)
+        
+        # Held only around each inference batch when the model is shared (e.g. the registry's use lock)
+        self.model_lock = model_lock
+        
+        # Reuse an already loaded YOLO model (e.g. from the API model registry)
+        if model is not None:
+            self.model = model
+            self.build_class_mapping()
     
     def load_model(self):
         """Load and initialize the YOLO model."""
@@ -86,45 +155,54 @@ class StockDetector:
             print(f"Model type: {type(self.model)}")
             print(f"Model names: {self.model.names}")
             
-            # Check if model classes match our inventory
-            model_classes = list(self.model.names.values())
-            print(f"Model classes: {model_classes}")
-            
-            # Check for class name mismatches and create mapping
-            for item in self.inventory_items.keys():
-                if item not in model_classes:
-                    print(f"WARNING: '{item}' is not in the model's class list")
-            
-            # Create a mapping from model class names to our inventory
-            for i, class_name in enumerate(model_classes):
-                for item in self.inventory_items.keys():
-                    if item.lower() in class_name.lower() or class_name.lower() in item.lower():
-                        self.class_mapping[i] = item
-                        print(f"Mapped model class '{class_name}' to inventory item '{item}'")
-                        break
-            
-            print(f"Class mapping: {self.class_mapping}")
+            self.build_class_mapping()
             
         except Exception as e:
             print(f"Error loading YOLO model: {e}")
             raise
     
+    def build_class_mapping(self):
+        """Map the model's class indices to our inventory items."""
+        # Check if model classes match our inventory
+        model_classes = list(self.model.names.values())
+        print(f"Model classes: {model_classes}")
+        
+        # Check for class name mismatches and create mapping
+        for item in self.inventory_items.keys():
+            if item not in model_classes:
+                print(f"WARNING: '{item}' is not in the model's class list")
+        
+        # Create a mapping from model class names to our inventory
+        self.class_mapping = {}
+        for i, class_name in enumerate(model_classes):
+            for item in self.inventory_items.keys():
+                if item.lower() in class_name.lower() or class_name.lower() in item.lower():
+                    self.class_mapping[i] = item
+                    print(f"Mapped model class '{class_name}' to inventory item '{item}'")
+                    break
+        
+        print(f"Class mapping: {self.class_mapping}")
+        
+        # Lookup table from model class index to inventory item index (-1 = not inventory)
+        self.class_item_index = np.full(max(self.model.names) + 1, -1, dtype=np.int64)
+        for cls, class_name in self.model.names.items():
+            if cls in self.class_mapping:
+                self.class_item_index[cls] = self.item_names.index(self.class_mapping[cls])
+            elif class_name in self.inventory_items:
+                self.class_item_index[cls] = self.item_names.index(class_name)
+    
     def check_spatial_consistency(self, x1, y1, x2, y2, food_type):
         """Check if the detection is spatially consistent with recent detections."""
         if food_type not in self.spatial_history:
-            self.spatial_history[food_type] = []
+            self.spatial_history[food_type] = deque(maxlen=self.spatial_window)
         
         # Calculate center of current detection
         center_x = (x1 + x2) / 2
         center_y = (y1 + y2) / 2
         
-        # Add current detection to history
+        # Add current detection to history (the deque keeps only recent detections)
         self.spatial_history[food_type].append((center_x, center_y))
         
-        # Keep only recent detections
-        if len(self.spatial_history[food_type]) > self.spatial_window:
-            self.spatial_history[food_type].pop(0)
-        
         # If we have enough history, check consistency
         if len(self.spatial_history[food_type]) >= 3:
             # Calculate average position
@@ -149,15 +227,11 @@ class StockDetector:
     def check_class_consistency(self, food_type, cls, conf):
         """Check if the detected class is consistent with recent detections."""
         if food_type not in self.class_history:
-            self.class_history[food_type] = []
+            self.class_history[food_type] = deque(maxlen=self.class_history_window)
         
-        # Add current detection to history
+        # Add current detection to history (the deque keeps only recent detections)
         self.class_history[food_type].append((cls, conf))
         
-        # Keep only recent detections
-        if len(self.class_history[food_type]) > self.class_history_window:
-            self.class_history[food_type].pop(0)
-        
         # If we have enough history, check consistency
         if len(self.class_history[food_type]) >= 3:
             # Count occurrences of each class
@@ -187,30 +261,12 @@ class StockDetector:
         # Calculate average color
         avg_color = np.mean(roi, axis=(0, 1))
         
-        # Define expected color ranges for each food type (BGR format)
-        color_ranges = {
-            "Apple": [(0, 50, 50), (50, 255, 255)],  # Red
-            "Cheese": [(0, 200, 200), (100, 255, 255)],  # Yellow
-            "Cucumber": [(50, 100, 0), (150, 255, 100)],  # Green
-            "Egg": [(200, 200, 200), (255, 255, 255)],  # White
-            "Grape": [(100, 0, 100), (200, 100, 200)],  # Purple
-            "Zucchini": [(50, 100, 0), (150, 255, 100)],  # Green
-            "Mushroom": [(150, 150, 150), (220, 220, 220)],  # Gray
-            "Strawberry": [(0, 0, 200), (100, 100, 255)],  # Red
-            "Tomato": [(0, 0, 150), (50, 50, 255)],  # Red
-            "Banana": [(0, 200, 200), (100, 255, 255)],  # Yellow
-            "Lemon": [(0, 200, 0), (100, 255, 100)],  # Yellow-green
-            "Broccoli": [(50, 100, 0), (150, 255, 100)],  # Green
-            "Orange": [(0, 150, 200), (50, 255, 255)],  # Orange
-            "Carrot": [(0, 100, 200), (50, 255, 255)]  # Orange
-        }
-        
         # Skip color check for food types without defined ranges
-        if food_type not in color_ranges:
+        if food_type not in self.color_ranges:
             return True
         
         # Check if the average color is within the expected range
-        min_color, max_color = color_ranges[food_type]
+        min_color, max_color = self.color_ranges[food_type]
         for i in range(3):
             if avg_color[i] < min_color[i] or avg_color[i] > max_color[i]:
                 # Allow more flexibility for lighting variations
@@ -219,78 +275,252 @@ class StockDetector:
         
         return True
     
-    def process_frame(self, frame, scale_x, scale_y):
-        """Process a single frame for object detection."""
-        # Resize frame to optimal size for YOLO processing
-        resized_frame = cv2.resize(frame, (self.optimal_width, self.optimal_height))
+    def motion_score(self, frame):
+        """Mean absolute grey-level difference to the last inferred frame, on a thumbnail."""
+        thumb = cv2.cvtColor(cv2.resize(frame, self.motion_size, interpolation=cv2.INTER_AREA),
+                             cv2.COLOR_BGR2GRAY)
+        if self._last_inferred_thumb is None:
+            return float('inf'), thumb
+        return float(cv2.absdiff(thumb, self._last_inferred_thumb).mean()), thumb
+    
+    def should_infer(self, frame):
+        """Decide whether this frame needs YOLO inference under the current detection mode."""
+        if self.detection_mode == 'stride':
+            infer = self._frames_since_inference == 0 or self._frames_since_inference >= self.stride
+        elif self.detection_mode == 'motion':
+            score, thumb = self.motion_score(frame)
+            infer = score >= self.motion_threshold or self._frames_since_inference >= self.max_skip
+            if infer:
+                self._last_inferred_thumb = thumb
+        else:
+            infer = True
+        
+        if infer:
+            self._frames_since_inference = 1
+        else:
+            self._frames_since_inference += 1
+        return infer
+    
+    def run_inference(self, frames):
+        """Run YOLO on a batch of frames and return one (N, 6) box array per frame.
+        
+        Each row is [x1, y1, x2, y2, conf, cls] in the resized frame's coordinates.
+        """
+        if not frames:
+            return []
+        
+        # Resize frames to optimal size for YOLO processing, reusing buffers between batches
+        while len(self._resize_buffers) < len(frames):
+            self._resize_buffers.append(None)
+        resized_frames = []
+        for i, frame in enumerate(frames):
+            self._resize_buffers[i] = cv2.resize(frame, (self.optimal_width, self.optimal_height),
+                                                 dst=self._resize_buffers[i])
+            resized_frames.append(self._resize_buffers[i])
         
         try:
             # Run inference with appropriate confidence threshold
-            results = self.model(resized_frame, conf=0.03, verbose=False)
-            
-            # Process detections
-            detections = []
-            for result in results:
-                boxes = result.boxes
-                for box in boxes:
-                    try:
-                        # Get box coordinates (in resized frame)
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        conf = float(box.conf[0].cpu().numpy())
-                        cls = int(box.cls[0].cpu().numpy())
-                        class_name = result.names[cls]
-                        
-                        # Calculate box size as percentage of frame
-                        box_width = x2 - x1
-                        box_height = y2 - y1
-                        box_area = box_width * box_height
-                        frame_area = self.optimal_width * self.optimal_height
-                        box_size_percent = box_area / frame_area
-                        
-                        # Skip if box is too small
-                        if box_size_percent < self.min_box_size:
-                            continue
-                        
-                        # Determine the food type
-                        food_type = None
-                        if cls in self.class_mapping:
-                            food_type = self.class_mapping[cls]
-                        elif class_name in self.inventory_items:
-                            food_type = class_name
-                        
-                        if food_type is None:
-                            continue
-                        
-                        # Check spatial consistency
-                        if not self.check_spatial_consistency(x1, y1, x2, y2, food_type):
-                            continue
-                        
-                        # Check class consistency
-                        if not self.check_class_consistency(food_type, cls, conf):
-                            continue
-                        
-                        # Scale coordinates for color check
-                        orig_x1 = int(x1 * scale_x)
-                        orig_y1 = int(y1 * scale_y)
-                        orig_x2 = int(x2 * scale_x)
-                        orig_y2 = int(y2 * scale_y)
-                        
-                        # Check color consistency
-                        if not self.check_color_consistency(frame, orig_x1, orig_y1, orig_x2, orig_y2, food_type):
-                            continue
-                        
-                        # Add to detections
-                        detections.append([x1, y1, x2, y2, food_type, conf])
-                        
-                    except Exception as e:
-                        print(f"Error processing box: {e}")
-                        continue
-            
-            return detections
-            
+            with self.model_lock or nullcontext():
+                results = self.model(resized_frames, conf=0.03, verbose=False)
+                
+                # Move each result's boxes to NumPy in a single transfer
+                return [result.boxes.data.cpu().numpy() for result in results]
         except Exception as e:
             print(f"Error during YOLO detection: {e}")
+            return [np.empty((0, 6), dtype=np.float32) for _ in frames]
+    
+    def _window_rows(self, history_len, count, window):
+        """Indices of the trailing `window` entries ending at each new entry (-1 = padding)."""
+        positions = np.arange(history_len, history_len + count)
+        rows = positions[:, None] - np.arange(window - 1, -1, -1)[None, :]
+        return np.where(rows >= 0, rows, -1)
+    
+    def spatial_consistency_mask(self, food_type, centers):
+        """Vectorized check_spatial_consistency for a frame's (N, 2) centers of one food type."""
+        if food_type not in self.spatial_history:
+            self.spatial_history[food_type] = deque(maxlen=self.spatial_window)
+        history = self.spatial_history[food_type]
+        
+        # Each new center is compared with the mean of the window ending at it
+        sequence = np.concatenate([np.array(history, dtype=np.float64).reshape(-1, 2), centers])
+        rows = self._window_rows(len(history), len(centers), self.spatial_window)
+        valid = rows >= 0
+        window = np.where(valid[:, :, None], sequence[rows], 0.0)
+        counts = valid.sum(axis=1)
+        averages = window.sum(axis=1) / counts[:, None]
+        distances = np.sqrt(((centers - averages) ** 2).sum(axis=1))
+        frame_diagonal = np.sqrt(self.optimal_width**2 + self.optimal_height**2)
+        
+        history.extend(map(tuple, centers))
+        return (counts < 3) | (distances / frame_diagonal <= 0.9)
+    
+    def class_consistency_mask(self, food_type, classes, confs):
+        """Vectorized check_class_consistency for a frame's boxes of one food type."""
+        if food_type not in self.class_history:
+            self.class_history[food_type] = deque(maxlen=self.class_history_window)
+        history = self.class_history[food_type]
+        
+        history_classes = np.array([c for c, _ in history], dtype=np.int64)
+        history_confs = np.array([c for _, c in history], dtype=np.float64)
+        sequence_classes = np.concatenate([history_classes, classes])
+        sequence_confs = np.concatenate([history_confs, confs])
+        history.extend(zip(classes.tolist(), confs.tolist()))
+        
+        # A food type normally maps to a single model class, which is always consistent
+        unique_classes = np.unique(sequence_classes)
+        if len(unique_classes) == 1:
+            return np.ones(len(classes), dtype=bool)
+        
+        rows = self._window_rows(len(history_classes), len(classes), self.class_history_window)
+        valid = rows >= 0
+        window_classes = np.where(valid, sequence_classes[rows], -1)
+        window_confs = np.where(valid, sequence_confs[rows], 0.0)
+        
+        # Per window: count of each class and where it first appears, since the
+        # scalar version breaks ties in favour of the first class seen
+        matches = window_classes[None, :, :] == unique_classes[:, None, None]
+        class_counts = matches.sum(axis=2)
+        first_seen = np.where(class_counts > 0, matches.argmax(axis=2), rows.shape[1])
+        is_top = class_counts == class_counts.max(axis=0)
+        most_common = unique_classes[np.where(is_top, first_seen, rows.shape[1] + 1).argmin(axis=0)]
+        
+        current = np.searchsorted(unique_classes, classes)
+        current_counts = class_counts[current, np.arange(len(classes))]
+        current_conf_sums = (window_confs * matches[current, np.arange(len(classes))]).sum(axis=1)
+        avg_confs = current_conf_sums / current_counts
+        
+        return (valid.sum(axis=1) < 3) | (classes == most_common) | (confs >= avg_confs * 1.05)
+    
+    def color_consistency_mask(self, frame, boxes, item_indices):
+        """Vectorized check_color_consistency using an integral image for ROI means."""
+        height, width = frame.shape[:2]
+        # 32-bit sums are exact up to ~8.4M pixels (4K); fall back to float64 beyond that
+        exact_32bit = height * width * 255 < 2**31
+        integral = cv2.integral(frame, sdepth=cv2.CV_32S if exact_32bit else cv2.CV_64F)
+        
+        # Clamp like Python slicing frame[y1:y2, x1:x2] does
+        def clamp(values, size):
+            return np.where(values < 0, np.maximum(values + size, 0), np.minimum(values, size))
+        
+        x1 = clamp(boxes[:, 0], width)
+        y1 = clamp(boxes[:, 1], height)
+        x2 = np.maximum(clamp(boxes[:, 2], width), x1)
+        y2 = np.maximum(clamp(boxes[:, 3], height), y1)
+        areas = (x2 - x1) * (y2 - y1)
+        
+        def corner(y, x):
+            return integral[y, x].astype(np.float64)
+        
+        sums = corner(y2, x2) - corner(y1, x2) - corner(y2, x1) + corner(y1, x1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_colors = sums / areas[:, None]
+        
+        inside = ((avg_colors >= self.color_lower[item_indices]) &
+                  (avg_colors <= self.color_upper[item_indices])).all(axis=1)
+        # Empty regions are not rejected
+        return (areas == 0) | inside
+    
+    def filter_detections(self, frame, boxes, scale_x, scale_y, use_history=True):
+        """Apply size, class, spatial and color filters to one frame's raw boxes.
+        
+        Vectorized over all boxes in the frame; boxes of each food type are
+        checked in their original order, so the decisions match
+        filter_detections_scalar exactly. With use_history=False the spatial
+        and class history checks are skipped (the tracker handles them).
+        """
+        if len(boxes) == 0:
             return []
+        
+        # Map model classes to inventory items and drop small boxes
+        classes = boxes[:, 5].astype(np.int64)
+        in_range = (classes >= 0) & (classes < len(self.class_item_index))
+        item_indices = np.where(in_range, self.class_item_index[np.where(in_range, classes, 0)], -1)
+        box_size_percent = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]) / \
+            (self.optimal_width * self.optimal_height)
+        keep = (box_size_percent >= self.min_box_size) & (item_indices >= 0)
+        
+        # Spatial, then class consistency per food type, over every surviving box at once
+        centers = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2],
+                           axis=1).astype(np.float64)
+        confs = boxes[:, 4].astype(np.float64)
+        for item_index in (np.unique(item_indices[keep]) if use_history else []):
+            food_type = self.item_names[item_index]
+            selected = np.flatnonzero(keep & (item_indices == item_index))
+            keep[selected] = self.spatial_consistency_mask(food_type, centers[selected])
+            selected = selected[keep[selected]]
+            if len(selected):
+                keep[selected] = self.class_consistency_mask(food_type, classes[selected], confs[selected])
+        
+        # Check color consistency in original frame coordinates
+        selected = np.flatnonzero(keep)
+        if len(selected):
+            scaled = boxes[selected, :4] * np.array([scale_x, scale_y, scale_x, scale_y], dtype=boxes.dtype)
+            keep[selected] = self.color_consistency_mask(frame, scaled.astype(np.int64),
+                                                         item_indices[selected])
+        
+        return [[box[0], box[1], box[2], box[3], self.item_names[item_indices[i]], float(box[4])]
+                for i, box in zip(np.flatnonzero(keep), boxes[keep])]
+    
+    def filter_detections_scalar(self, frame, boxes, scale_x, scale_y):
+        """Per-box reference implementation of filter_detections, kept for tests and benchmarks."""
+        detections = []
+        frame_area = self.optimal_width * self.optimal_height
+        for x1, y1, x2, y2, conf, cls in boxes:
+            try:
+                conf = float(conf)
+                cls = int(cls)
+                class_name = self.model.names[cls]
+                
+                # Calculate box size as percentage of frame
+                box_width = x2 - x1
+                box_height = y2 - y1
+                box_area = box_width * box_height
+                box_size_percent = box_area / frame_area
+                
+                # Skip if box is too small
+                if box_size_percent < self.min_box_size:
+                    continue
+                
+                # Determine the food type
+                food_type = None
+                if cls in self.class_mapping:
+                    food_type = self.class_mapping[cls]
+                elif class_name in self.inventory_items:
+                    food_type = class_name
+                
+                if food_type is None:
+                    continue
+                
+                # Check spatial consistency
+                if not self.check_spatial_consistency(x1, y1, x2, y2, food_type):
+                    continue
+                
+                # Check class consistency
+                if not self.check_class_consistency(food_type, cls, conf):
+                    continue
+                
+                # Scale coordinates for color check
+                orig_x1 = int(x1 * scale_x)
+                orig_y1 = int(y1 * scale_y)
+                orig_x2 = int(x2 * scale_x)
+                orig_y2 = int(y2 * scale_y)
+                
+                # Check color consistency
+                if not self.check_color_consistency(frame, orig_x1, orig_y1, orig_x2, orig_y2, food_type):
+                    continue
+                
+                # Add to detections
+                detections.append([x1, y1, x2, y2, food_type, conf])
+                
+            except Exception as e:
+                print(f"Error processing box: {e}")
+                continue
+        
+        return detections
+    
+    def process_frame(self, frame, scale_x, scale_y):
+        """Process a single frame for object detection."""
+        return self.filter_detections(frame, self.run_inference([frame])[0], scale_x, scale_y)
     
     def draw_results(self, frame, detections, scale_x, scale_y, frame_counts):
         """Draw detection results on the frame."""
@@ -314,8 +544,11 @@ class StockDetector:
                 # Draw bounding box
                 cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
                 
-                # Draw label
-                label = f"{food_type} ({conf:.2f})"
+                # Draw label, with the track ID when tracking
+                if len(det) > 6:
+                    label = f"{food_type} #{det[6]} ({conf:.2f})"
+                else:
+                    label = f"{food_type} ({conf:.2f})"
                 cv2.putText(frame, label, (x1, y1 - 10), 
                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
                 
@@ -337,8 +570,141 @@ class StockDetector:
         
         return frame
     
-    def detect_stock(self):
-        """Main method to run stock detection on video."""
+    def track_detections(self, detections):
+        """Run filtered detections through the tracker and attach track IDs."""
+        if detections:
+            boxes = np.array([det[:4] for det in detections], dtype=np.float64)
+            classes = [self.item_names.index(det[4]) for det in detections]
+            confs = [det[5] for det in detections]
+        else:
+            boxes, classes, confs = np.empty((0, 4)), [], []
+        
+        tracks = self.tracker.update(boxes, classes, confs)
+        return [[*box, self.item_names[cls], conf, track_id] for track_id, box, cls, conf in tracks]
+    
+    def count_rows(self, frame_count, fps, detections, frame_counts, food_counts):
+        """CSV rows for one frame: visible and running total count per item, plus track IDs."""
+        track_ids = defaultdict(list)
+        for det in detections:
+            if len(det) > 6:
+                track_ids[det[4]].append(str(det[6]))
+        
+        return [{
+            "frame": frame_count,
+            "time_s": round(frame_count / fps, 3) if fps > 0 else None,
+            "item": food_type,
+            "visible_count": frame_counts[food_type],
+            "total_count": food_counts[food_type],
+            "track_ids": " ".join(track_ids[food_type])
+        } for food_type in self.item_names if frame_counts[food_type] > 0 or food_counts[food_type] > 0]
+    
+    def make_snapshot(self, frame_count, total_frames, fps_current, frame_counts, food_counts):
+        """Build a JSON-serializable snapshot of the detection state."""
+        return {
+            "frame": frame_count,
+            "total_frames": total_frames,
+            "progress": round(100 * frame_count / total_frames, 1) if total_frames > 0 else None,
+            "fps": round(fps_current, 2),
+            "frame_counts": {k: int(v) for k, v in frame_counts.items() if v > 0},
+            "running_counts": {k: int(v) for k, v in food_counts.items() if v > 0}
+        }
+    
+    def _queue_put(self, q, item, stop, errors):
+        """Put with back-pressure, giving up if the pipeline is stopping."""
+        while not stop.is_set():
+            if errors:
+                raise errors[0]
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise RuntimeError("Video pipeline stopped")
+    
+    def _queue_get(self, q, stop, errors):
+        """Get the next item, re-raising errors from the other stages."""
+        while not stop.is_set():
+            if errors:
+                raise errors[0]
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        raise RuntimeError("Video pipeline stopped")
+    
+    def _decode_stage(self, cap, decode_queue, free_buffers, stop, errors):
+        """Decoder thread: read and gate frames, and queue them in batches for inference."""
+        timings = self.stage_timings["decode"]
+        try:
+            while not stop.is_set():
+                # A batch is complete once it holds batch_size frames that need inference
+                # or decode_ahead frames in total (skipped frames ride along)
+                busy_start = time.perf_counter()
+                frames, selected = [], []
+                while len(selected) < self.batch_size and len(frames) < self.decode_ahead:
+                    try:
+                        buffer = free_buffers.get_nowait()
+                    except queue.Empty:
+                        buffer = None
+                    ret, frame = cap.read(buffer)
+                    if not ret:
+                        break
+                    if self.should_infer(frame):
+                        selected.append(len(frames))
+                    frames.append(frame)
+                timings["busy_s"] += time.perf_counter() - busy_start
+                timings["items"] += len(frames)
+                
+                wait_start = time.perf_counter()
+                self._queue_put(decode_queue, (frames, selected) if frames else None, stop, errors)
+                timings["wait_s"] += time.perf_counter() - wait_start
+                if not frames:
+                    return
+        except Exception as e:
+            if not stop.is_set():
+                errors.append(e)
+    
+    def _encode_stage(self, out, encode_queue, free_buffers, stop, errors):
+        """Encoder thread: write annotated frames in order and recycle their buffers."""
+        timings = self.stage_timings["encode"]
+        try:
+            while True:
+                wait_start = time.perf_counter()
+                frame = self._queue_get(encode_queue, stop, errors)
+                timings["wait_s"] += time.perf_counter() - wait_start
+                if frame is None:
+                    return
+                
+                busy_start = time.perf_counter()
+                out.write(frame)
+                timings["busy_s"] += time.perf_counter() - busy_start
+                timings["items"] += 1
+                
+                # Return the buffer to the decoder, keeping the pool bounded
+                if free_buffers.qsize() < self.decode_ahead * (self.pipeline_depth + 1):
+                    free_buffers.put(frame)
+        except Exception as e:
+            if not stop.is_set():
+                errors.append(e)
+    
+    def print_stage_timings(self):
+        """Print per-stage busy/wait times; the busiest stage bounds throughput."""
+        print("\nPipeline stage timings:")
+        for stage, timing in self.stage_timings.items():
+            print(f"  {stage:<7} busy {timing['busy_s']:.2f}s  wait {timing['wait_s']:.2f}s  "
+                  f"items {timing['items']}")
+        if self.stage_timings:
+            bottleneck = max(self.stage_timings, key=lambda stage: self.stage_timings[stage]["busy_s"])
+            print(f"  Bottleneck stage: {bottleneck}")
+    
+    def detect_stock(self, progress_callback=None, observer=None):
+        """Main method to run stock detection on video.
+        
+        progress_callback, if given, is called after every frame with
+        (frames_processed, total_frames). observer, if given, is called every
+        `snapshot_interval` frames with a snapshot of the running counts and
+        FPS (see make_snapshot). Raising from either stops processing.
+        """
         # Load model if not already loaded
         if self.model is None:
             self.load_model()
@@ -353,7 +719,8 @@ class StockDetector:
         fps = int(cap.get(cv2.CAP_PROP_FPS))
         frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        print(f"Original video properties: {frame_width}x{frame_height} @ {fps}fps")
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        print(f"Original video properties: {frame_width}x{frame_height} @ {fps}fps, {total_frames} frames")
         
         # Calculate scaling factors
         scale_x = frame_width / self.optimal_width
@@ -369,51 +736,122 @@ class StockDetector:
         csv_data = []
         start_time = time.time()
         
+        # Reset per-video state
+        detections = []
+        self.tracker.reset()
+        self._last_inferred_thumb = None
+        self._frames_since_inference = 0
+        self.inference_frames = 0
+        self.stage_timings = {stage: {"busy_s": 0.0, "wait_s": 0.0, "items": 0}
+                              for stage in ("decode", "infer", "encode")}
+        
+        # Three-stage pipeline: a decoder thread and an encoder thread run the
+        # codecs while this thread does inference, filtering and drawing. The
+        # bounded queues give back-pressure; frame buffers are recycled from the
+        # encoder back to the decoder so memory stays fixed.
+        decode_queue = queue.Queue(maxsize=self.pipeline_depth)
+        encode_queue = queue.Queue(maxsize=self.pipeline_depth * self.decode_ahead)
+        free_buffers = queue.Queue()
+        stop = threading.Event()
+        errors = []
+        
+        decoder = threading.Thread(target=self._decode_stage, name="stock-decode",
+                                   args=(cap, decode_queue, free_buffers, stop, errors), daemon=True)
+        encoder = threading.Thread(target=self._encode_stage, name="stock-encode",
+                                   args=(out, encode_queue, free_buffers, stop, errors), daemon=True)
+        decoder.start()
+        encoder.start()
+        
         try:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
+            while True:
+                wait_start = time.perf_counter()
+                batch = self._queue_get(decode_queue, stop, errors)
+                self.stage_timings["infer"]["wait_s"] += time.perf_counter() - wait_start
+                if batch is None:
                     print("End of video file")
                     break
                 
-                frame_count += 1
-                display_frame = frame.copy()
-                
-                # Process frame
-                detections = self.process_frame(frame, scale_x, scale_y)
-                
-                # Initialize frame counts
-                frame_counts = {item: 0 for item in self.inventory_items.keys()}
+                # Run the model once for all selected frames in the batch
+                busy_start = time.perf_counter()
+                frames, selected = batch
+                batch_boxes = dict(zip(selected, self.run_inference([frames[i] for i in selected])))
+                self.inference_frames += len(selected)
                 
-                # Draw results
-                display_frame = self.draw_results(display_frame, detections, scale_x, scale_y, frame_counts)
-                
-                # Calculate and display FPS
-                elapsed_time = time.time() - start_time
-                fps_current = frame_count / elapsed_time if elapsed_time > 0 else 0
-                cv2.putText(display_frame, f"FPS: {fps_current:.2f}", (10, frame_height - 10), 
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-                
-                # Write frame to output video
-                out.write(display_frame)
-                
-                # Update total counts
-                for food_type, count in frame_counts.items():
-                    food_counts[food_type] = max(food_counts[food_type], count)
-                
-                # Print progress every 10 frames
-                if frame_count % 10 == 0:
-                    print(f"Processed frame {frame_count}")
+                for index, frame in enumerate(frames):
+                    frame_count += 1
+                    
+                    # Filter this frame's detections, or carry the last ones forward
+                    if index in batch_boxes:
+                        detections = self.filter_detections(frame, batch_boxes[index], scale_x, scale_y,
+                                                            use_history=not self.use_tracker)
+                        if self.use_tracker:
+                            detections = self.track_detections(detections)
+                    
+                    # Initialize frame counts
+                    frame_counts = {item: 0 for item in self.inventory_items.keys()}
+                    
+                    # Draw results (in place: the filters are done with this frame)
+                    display_frame = self.draw_results(frame, detections, scale_x, scale_y, frame_counts)
+                    
+                    # Calculate and display FPS
+                    elapsed_time = time.time() - start_time
+                    fps_current = frame_count / elapsed_time if elapsed_time > 0 else 0
+                    cv2.putText(display_frame, f"FPS: {fps_current:.2f}", (10, frame_height - 10), 
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                    
+                    # Hand the frame to the encoder thread
+                    busy_end = time.perf_counter()
+                    self.stage_timings["infer"]["busy_s"] += busy_end - busy_start
+                    self._queue_put(encode_queue, display_frame, stop, errors)
+                    busy_start = time.perf_counter()
+                    self.stage_timings["infer"]["wait_s"] += busy_start - busy_end
+                    self.stage_timings["infer"]["items"] += 1
+                    
+                    # Update total counts: unique tracks, or the most seen in any one frame
+                    if self.use_tracker:
+                        food_counts = dict(zip(self.item_names, self.tracker.unique_counts.tolist()))
+                    else:
+                        for food_type, count in frame_counts.items():
+                            food_counts[food_type] = max(food_counts[food_type], count)
+                    
+                    # Record per-frame counts and visible track IDs
+                    csv_data.extend(self.count_rows(frame_count, fps, detections, frame_counts, food_counts))
+                    
+                    # Print progress every 10 frames
+                    if frame_count % 10 == 0:
+                        print(f"Processed frame {frame_count}")
+                    
+                    # Report progress to the caller
+                    if progress_callback is not None:
+                        progress_callback(frame_count, total_frames)
+                    if observer is not None and (frame_count % self.snapshot_interval == 0
+                                                 or frame_count == total_frames):
+                        observer(self.make_snapshot(frame_count, total_frames, fps_current,
+                                                    frame_counts, food_counts))
+                self.stage_timings["infer"]["busy_s"] += time.perf_counter() - busy_start
+            
+            # Let the encoder drain the remaining frames
+            self._queue_put(encode_queue, None, stop, errors)
+            encoder.join()
+            if errors:
+                raise errors[0]
         
         finally:
             # Cleanup
+            stop.set()
+            decoder.join()
+            encoder.join()
             cap.release()
             out.release()
         
+        self.print_stage_timings()
+        
         # Save CSV data
-        df = pd.DataFrame(csv_data)
+        df = pd.DataFrame(csv_data, columns=["frame", "time_s", "item", "visible_count",
+                                             "total_count", "track_ids"])
         df.to_csv(self.output_csv_count_path, index=False)
         
+        print(f"\nRan inference on {self.inference_frames} of {frame_count} frames ({self.detection_mode} mode)")
         print("\nProcessing complete!")
         print("\nVideo saved at: ", self.output_video_path)
         print("\nTotal food items detected:")
@@ -429,5 +867,3 @@ class StockDetector:
 def detect_stock_in_video():
     detector = StockDetector()
     return detector.detect_stock()
-
-# ... rest of the existing code ...
\ No newline at end of file
@@ -0,0 +1,157 @@
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Pairwise IoU between (N, 4) and (M, 4) xyxy boxes."""
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+
+def greedy_match(scores, threshold):
+    """Match rows to columns by descending score, each used at most once."""
+    rows, cols = np.nonzero(scores >= threshold)
+    order = np.argsort(-scores[rows, cols], kind='stable')
+    matched_rows, matched_cols = set(), set()
+    matches = []
+    for row, col in zip(rows[order], cols[order]):
+        if row in matched_rows or col in matched_cols:
+            continue
+        matched_rows.add(row)
+        matched_cols.add(col)
+        matches.append((row, col))
+    return matches
+
+
+class SortTracker:
+    """SORT-style multi-object tracker: constant-velocity prediction and IoU/centroid association.
+
+    Detections are only matched to tracks of the same class. A track gets a
+    persistent ID and counts towards the unique totals once it has been seen
+    in `min_hits` consecutive updates; it is dropped after `max_age` updates
+    without a match.
+    """
+
+    def __init__(self, num_classes, iou_threshold=0.3, centroid_threshold=0.5, max_age=15,
+                 min_hits=3, velocity_smoothing=0.5):
+        self.num_classes = num_classes
+        self.iou_threshold = iou_threshold
+        self.centroid_threshold = centroid_threshold
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.velocity_smoothing = velocity_smoothing
+        self.reset()
+
+    @classmethod
+    def from_config(cls, settings, num_classes):
+        return cls(
+            num_classes,
+            iou_threshold=settings.get('iou_threshold', 0.3),
+            centroid_threshold=settings.get('centroid_threshold', 0.5),
+            max_age=settings.get('max_age', 15),
+            min_hits=settings.get('min_hits', 3),
+            velocity_smoothing=settings.get('velocity_smoothing', 0.5)
+        )
+
+    def reset(self):
+        # Track state, one row per live track
+        self.boxes = np.empty((0, 4))
+        self.velocities = np.empty((0, 4))
+        self.classes = np.empty(0, dtype=np.int64)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.hit_streaks = np.empty(0, dtype=np.int64)
+        self.misses = np.empty(0, dtype=np.int64)
+        self.counted = np.empty(0, dtype=bool)
+
+        self.next_id = 1
+        self.updates = 0
+        self.unique_counts = np.zeros(self.num_classes, dtype=np.int64)
+
+    def _associate(self, predicted, boxes, classes):
+        """Return (detection, track) index pairs for the same class."""
+        same_class = classes[:, None] == self.classes[None, :]
+        scores = np.where(same_class, iou_matrix(boxes, predicted), 0.0)
+        matches = greedy_match(scores, self.iou_threshold)
+
+        # Second pass for fast-moving or sparsely sampled objects: nearest centroid
+        # within centroid_threshold box diagonals
+        unmatched_dets = np.setdiff1d(np.arange(len(boxes)), [d for d, _ in matches])
+        unmatched_trks = np.setdiff1d(np.arange(len(predicted)), [t for _, t in matches])
+        if len(unmatched_dets) and len(unmatched_trks):
+            det_boxes = boxes[unmatched_dets]
+            trk_boxes = predicted[unmatched_trks]
+            det_centers = (det_boxes[:, :2] + det_boxes[:, 2:]) / 2
+            trk_centers = (trk_boxes[:, :2] + trk_boxes[:, 2:]) / 2
+            distances = np.linalg.norm(det_centers[:, None, :] - trk_centers[None, :, :], axis=2)
+            diagonals = np.linalg.norm(trk_boxes[:, 2:] - trk_boxes[:, :2], axis=1)
+            closeness = 1.0 - distances / np.maximum(diagonals[None, :], 1e-9)
+            closeness = np.where(same_class[np.ix_(unmatched_dets, unmatched_trks)], closeness, -np.inf)
+            for d, t in greedy_match(closeness, 1.0 - self.centroid_threshold):
+                matches.append((unmatched_dets[d], unmatched_trks[t]))
+        return matches
+
+    def update(self, boxes, classes, confs=None):
+        """Update tracks with one frame's (N, 4) boxes and class indices.
+
+        Returns a list of (track_id, box, class_index, conf) for the confirmed
+        tracks matched in this frame.
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        classes = np.asarray(classes, dtype=np.int64).reshape(-1)
+        confs = np.ones(len(boxes)) if confs is None else np.asarray(confs, dtype=np.float64)
+        self.updates += 1
+
+        # Predict where each track is now
+        predicted = self.boxes + self.velocities
+        matches = self._associate(predicted, boxes, classes) if len(self.boxes) else []
+        det_idx = np.array([d for d, _ in matches], dtype=np.int64)
+        trk_idx = np.array([t for _, t in matches], dtype=np.int64)
+
+        # Matched tracks: smooth the velocity towards the observed motion
+        matched = np.zeros(len(self.boxes), dtype=bool)
+        matched[trk_idx] = True
+        alpha = self.velocity_smoothing
+        self.velocities[trk_idx] = alpha * (boxes[det_idx] - self.boxes[trk_idx]) + \
+            (1 - alpha) * self.velocities[trk_idx]
+        self.boxes[trk_idx] = boxes[det_idx]
+        self.boxes[~matched] = predicted[~matched]
+        self.hit_streaks = np.where(matched, self.hit_streaks + 1, 0)
+        self.misses = np.where(matched, 0, self.misses + 1)
+
+        # Unmatched detections start new tracks
+        new = np.setdiff1d(np.arange(len(boxes)), det_idx)
+        self.boxes = np.concatenate([self.boxes, boxes[new]])
+        self.velocities = np.concatenate([self.velocities, np.zeros((len(new), 4))])
+        self.classes = np.concatenate([self.classes, classes[new]])
+        self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + len(new))])
+        self.hit_streaks = np.concatenate([self.hit_streaks, np.ones(len(new), dtype=np.int64)])
+        self.misses = np.concatenate([self.misses, np.zeros(len(new), dtype=np.int64)])
+        self.counted = np.concatenate([self.counted, np.zeros(len(new), dtype=bool)])
+        self.next_id += len(new)
+
+        track_confs = np.zeros(len(self.boxes))
+        track_confs[trk_idx] = confs[det_idx]
+        track_confs[len(matched):] = confs[new]
+
+        # Tracks are confirmed after min_hits consecutive matches, so one-frame false positives
+        # are never counted (not even at the start of the video)
+        visible = self.misses == 0
+        confirmed = visible & (self.hit_streaks >= self.min_hits)
+        newly_counted = confirmed & ~self.counted
+        np.add.at(self.unique_counts, self.classes[newly_counted], 1)
+        self.counted |= confirmed
+
+        results = [(int(self.ids[i]), self.boxes[i].copy(), int(self.classes[i]), float(track_confs[i]))
+                   for i in np.flatnonzero(confirmed)]
+
+        # Drop tracks that have been lost for too long
+        alive = self.misses <= self.max_age
+        for name in ('boxes', 'velocities', 'classes', 'ids', 'hit_streaks', 'misses', 'counted'):
+            setattr(self, name, getattr(self, name)[alive])
+        return results
@@ -0,0 +1,4 @@
+"""
+Background Jobs Module
+Durable, SQLite-backed job queue and workers for long-running tasks
+"""
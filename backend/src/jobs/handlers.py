@@ -0,0 +1,103 @@
+import os
+import json
+from datetime import datetime
+
+
+def process_stock_video(job, context, registry, config_path):
+    """Run stock detection on an uploaded video and publish the annotated output."""
+    from src.inventory_tracking.stock_detection import StockDetector
+
+    payload = job["payload"]
+    video_path = payload["video_path"]
+    output_path = payload["output_path"]
+    results_path = payload["results_path"]
+    # Per-job CSV, so concurrent jobs do not overwrite the shared output_csv_count_path
+    counts_path = payload.get("counts_path") or os.path.join(os.path.dirname(output_path),
+                                                             f"food_count_{job['id']}.csv")
+
+    # Ensure the static directory exists
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+
+    def on_frame(frames_done, total_frames):
+        # Reserve the last few percent for writing results
+        if total_frames > 0:
+            context.report(95 * frames_done / total_frames)
+        else:
+            context.check_cancelled()
+
+    def on_snapshot(snapshot):
+        # Partial counts are streamed to clients via /api/jobs/{id}/events
+        progress = 95 * snapshot["frame"] / snapshot["total_frames"] if snapshot["total_frames"] else 0
+        context.report(progress, snapshot=snapshot, force=True)
+
+    context.report(0, message="Loading model", force=True)
+    try:
+        # The shared model is only locked per inference batch, so image endpoints are not held up for the whole video
+        detector = StockDetector(config_path=config_path, model=registry.get("inventory_yolo"),
+                                 model_lock=registry.use_lock("inventory_yolo"))
+        detector.video_path = video_path
+        detector.output_video_path = os.path.abspath(output_path)
+        detector.output_csv_count_path = os.path.abspath(counts_path)
+        context.report(0, message="Detecting stock", force=True)
+        results = detector.detect_stock(progress_callback=on_frame, observer=on_snapshot)
+    except Exception:
+        # Clean up the upload if the job did not produce anything
+        if os.path.exists(video_path):
+            os.remove(video_path)
+            print(f"Cleaned up uploaded video file: {video_path}")
+        raise
+
+    print(f"Detection results: {results}")
+
+    # Save results to a JSON file
+    with open(results_path, "w") as f:
+        json.dump(results, f)
+
+    # Verify the output video actually exists
+    if not os.path.exists(output_path):
+        raise Exception(f"Could not find output video at {output_path}")
+
+    return {
+        "results": results,
+        "video_url": f"/static/{os.path.basename(output_path)}",
+        "results_url": f"/static/{os.path.basename(results_path)}",
+        "counts_url": f"/static/{os.path.basename(counts_path)}",
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+def refresh_sales_forecast(job, context, registry, config_path):
+    """Retrain the sales forecast and publish a new snapshot for GET /api/sales-forecasting."""
+    from src.pipelines import refresh_sales_forecast as refresh
+
+    stages = {
+        "train": (0, "Training forecast models"),
+        "evaluate": (70, "Evaluating on held-out days"),
+        "forecast": (85, "Forecasting")
+    }
+
+    def on_stage(stage):
+        # Also the cancellation point between stages
+        progress, message = stages[stage]
+        context.report(progress, message=message, force=True)
+
+    context.report(0, message="Waiting for other forecast writes", force=True)
+    # A changed sales file refits only the items it touches when rows were just appended;
+    # missing, expired, stale and manual refreshes retrain everything
+    reason = job["payload"].get("reason")
+    snapshot = refresh(config_path, job["payload"].get("days_ahead"), full=reason != "data_changed", on_stage=on_stage)
+    return {
+        "version": snapshot["version"],
+        "reason": reason,
+        "items_refit": snapshot.get("update", {}).get("items_refit"),
+        "predictions": len(snapshot["future_predictions"]),
+        "build_seconds": snapshot["build_seconds"],
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+# Job kind -> handler(job, context, registry, config_path)
+JOB_HANDLERS = {
+    "stock_detection": process_stock_video,
+    "sales_forecast_refresh": refresh_sales_forecast,
+}
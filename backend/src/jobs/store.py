@@ -0,0 +1,295 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+# Job states. "processing" (rather than "running") keeps the task-status
+# responses the frontend already polls for.
+QUEUED = "queued"
+PROCESSING = "processing"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job handler when cancellation has been requested."""
+
+
+class JobStore:
+    """Durable job queue shared by every API and worker process through SQLite."""
+
+    def __init__(self, db_path, retention_hours=24, stale_after_seconds=300, max_attempts=3):
+        self.db_path = db_path
+        self.retention_seconds = retention_hours * 3600
+        self.stale_after_seconds = stale_after_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._init_db()
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.get('jobs', {})
+        return cls(
+            db_path=settings.get('db_path', "data/jobs/jobs.sqlite3"),
+            retention_hours=settings.get('retention_hours', 24),
+            stale_after_seconds=settings.get('stale_after_seconds', 300),
+            max_attempts=settings.get('max_attempts', 3)
+        )
+
+    def _connect(self):
+        # One connection per thread; sqlite3 connections are not shareable
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT,
+                payload TEXT,
+                result TEXT,
+                error TEXT,
+                worker_id TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                updated_at REAL NOT NULL,
+                finished_at REAL,
+                snapshot TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)")
+
+        # Databases created before snapshots were streamed lack the column
+        columns = [row["name"] for row in conn.execute("PRAGMA table_info(jobs)")]
+        if "snapshot" not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN snapshot TEXT")
+
+    def _row_to_job(self, row):
+        if row is None:
+            return None
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"]) if job["payload"] else {}
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["snapshot"] = json.loads(job["snapshot"]) if job["snapshot"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def submit(self, kind, payload=None, job_id=None):
+        """Queue a new job and return its id."""
+        job_id = job_id or str(uuid.uuid4())
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, kind, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, kind, QUEUED, json.dumps(payload or {}), now, now)
+        )
+        return job_id
+
+    def submit_unique(self, kind, payload=None):
+        """Return the id of the queued or running job of `kind`, queueing a new one if there is none.
+
+        The check and the insert run in one write transaction, so concurrent callers
+        (API requests, schedulers in several processes) share a single job.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # A running job that is being cancelled will not produce a result, so it does not count
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE kind = ? AND (status = ? OR (status = ? AND cancel_requested = 0)) "
+                "ORDER BY created_at LIMIT 1",
+                (kind, QUEUED, PROCESSING)
+            ).fetchone()
+            job_id = row["id"] if row is not None else self.submit(kind, payload)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def claim(self, worker_id, kinds=None):
+        """Atomically move the oldest queued job (of the given kinds) to processing."""
+        conn = self._connect()
+        query = "SELECT id FROM jobs WHERE status = ?"
+        params = [QUEUED]
+        if kinds:
+            query += f" AND kind IN ({', '.join('?' for _ in kinds)})"
+            params.extend(kinds)
+        query += " ORDER BY created_at LIMIT 1"
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(query, params).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            now = time.time()
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, attempts = attempts + 1, "
+                "started_at = ?, updated_at = ? WHERE id = ?",
+                (PROCESSING, worker_id, now, now, row["id"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get(row["id"])
+
+    def update_progress(self, job_id, progress, message=None, snapshot=None):
+        """Record progress (0-100) and an optional partial-result snapshot; also a heartbeat."""
+        self._connect().execute(
+            "UPDATE jobs SET progress = ?, message = COALESCE(?, message), "
+            "snapshot = COALESCE(?, snapshot), updated_at = ? WHERE id = ? AND status = ?",
+            (progress, message, json.dumps(snapshot) if snapshot is not None else None,
+             time.time(), job_id, PROCESSING)
+        )
+
+    def heartbeat(self, job_id):
+        """Mark a processing job as still alive."""
+        self._connect().execute(
+            "UPDATE jobs SET updated_at = ? WHERE id = ? AND status = ?",
+            (time.time(), job_id, PROCESSING)
+        )
+
+    # complete/fail/mark_cancelled only apply while `worker_id` still owns the job, so a worker
+    # whose job was requeued (or failed) as stale cannot overwrite the newer outcome.
+    # Each returns whether the update applied.
+
+    def complete(self, job_id, worker_id, result):
+        now = time.time()
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = ?, progress = 100, result = ?, updated_at = ?, finished_at = ? "
+            "WHERE id = ? AND worker_id = ? AND status = ?",
+            (COMPLETED, json.dumps(result), now, now, job_id, worker_id, PROCESSING)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id, worker_id, error):
+        now = time.time()
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = ?, error = ?, updated_at = ?, finished_at = ? "
+            "WHERE id = ? AND worker_id = ? AND status = ?",
+            (FAILED, error, now, now, job_id, worker_id, PROCESSING)
+        )
+        return cursor.rowcount == 1
+
+    def mark_cancelled(self, job_id, worker_id):
+        now = time.time()
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = ?, updated_at = ?, finished_at = ? "
+            "WHERE id = ? AND worker_id = ? AND status = ?",
+            (CANCELLED, now, now, job_id, worker_id, PROCESSING)
+        )
+        return cursor.rowcount == 1
+
+    def request_cancel(self, job_id):
+        """Cancel a queued job now, or ask the worker to stop a running one."""
+        job = self.get(job_id)
+        if job is None or job["status"] in TERMINAL_STATES:
+            return job
+        conn = self._connect()
+        now = time.time()
+        # Queued jobs are cancelled directly; the status guard avoids racing a claim
+        conn.execute(
+            "UPDATE jobs SET status = ?, cancel_requested = 1, updated_at = ?, finished_at = ? "
+            "WHERE id = ? AND status = ?",
+            (CANCELLED, now, now, job_id, QUEUED)
+        )
+        conn.execute(
+            "UPDATE jobs SET cancel_requested = 1, updated_at = ? WHERE id = ? AND status = ?",
+            (now, job_id, PROCESSING)
+        )
+        return self.get(job_id)
+
+    def is_cancel_requested(self, job_id):
+        row = self._connect().execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def get(self, job_id):
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row)
+
+    def list_jobs(self, status=None, kind=None, limit=50, offset=0):
+        query = "SELECT * FROM jobs"
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if kind:
+            conditions.append("kind = ?")
+            params.append(kind)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        rows = self._connect().execute(query, params).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def requeue_stale(self):
+        """Put back jobs whose worker stopped heartbeating (e.g. after a crash or restart).
+
+        A job that has already been claimed `max_attempts` times is failed instead,
+        so a job that keeps killing its worker is not retried forever. A job whose
+        cancellation was requested is cancelled rather than retried.
+        """
+        now = time.time()
+        cutoff = now - self.stale_after_seconds
+        conn = self._connect()
+        failed = conn.execute(
+            "UPDATE jobs SET status = ?, error = ?, worker_id = NULL, updated_at = ?, finished_at = ? "
+            "WHERE status = ? AND updated_at < ? AND attempts >= ?",
+            (FAILED, f"Worker stopped responding after {self.max_attempts} attempt(s)", now, now,
+             PROCESSING, cutoff, self.max_attempts)
+        )
+        if failed.rowcount:
+            print(f"Failed {failed.rowcount} stale job(s) that reached {self.max_attempts} attempts")
+        cancelled = conn.execute(
+            "UPDATE jobs SET status = ?, worker_id = NULL, updated_at = ?, finished_at = ? "
+            "WHERE status = ? AND updated_at < ? AND cancel_requested = 1",
+            (CANCELLED, now, now, PROCESSING, cutoff)
+        )
+        if cancelled.rowcount:
+            print(f"Cancelled {cancelled.rowcount} stale job(s) with a pending cancel request")
+        cursor = conn.execute(
+            "UPDATE jobs SET status = ?, worker_id = NULL, updated_at = ? "
+            "WHERE status = ? AND updated_at < ? AND cancel_requested = 0",
+            (QUEUED, now, PROCESSING, cutoff)
+        )
+        if cursor.rowcount:
+            print(f"Requeued {cursor.rowcount} stale job(s)")
+        return cursor.rowcount
+
+    def purge_expired(self):
+        """Delete finished jobs older than the retention period and return them."""
+        cutoff = time.time() - self.retention_seconds
+        conn = self._connect()
+        placeholders = ", ".join("?" for _ in TERMINAL_STATES)
+        rows = conn.execute(
+            f"SELECT * FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+            (*TERMINAL_STATES, cutoff)
+        ).fetchall()
+        if rows:
+            conn.execute(
+                f"DELETE FROM jobs WHERE id IN ({', '.join('?' for _ in rows)})",
+                [row["id"] for row in rows]
+            )
+        return [self._row_to_job(row) for row in rows]
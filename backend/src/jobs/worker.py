@@ -0,0 +1,191 @@
+import os
+import time
+import socket
+import argparse
+import threading
+import traceback
+import multiprocessing
+import yaml
+
+from src.jobs.store import JobStore, JobCancelled
+
+
+class JobContext:
+    """Handle passed to job handlers for progress reporting and cancellation checks."""
+
+    def __init__(self, store, job_id, min_interval=0.5):
+        self.store = store
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self._last_write = 0.0
+        self._last_progress = None
+
+    def report(self, progress, message=None, force=False, snapshot=None):
+        """Record progress (throttled) and raise JobCancelled if the job was cancelled."""
+        now = time.time()
+        progress = round(min(max(progress, 0), 100), 1)
+        if not force and progress == self._last_progress and message is None and snapshot is None:
+            return
+        if not force and now - self._last_write < self.min_interval:
+            return
+        self._last_write = now
+        self._last_progress = progress
+        self.store.update_progress(self.job_id, progress, message, snapshot)
+        self.check_cancelled()
+
+    def check_cancelled(self):
+        if self.store.is_cancel_requested(self.job_id):
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+
+class JobWorker:
+    """Claims queued jobs from the store and runs the matching handler."""
+
+    def __init__(self, store, handlers, registry=None, config_path="config/config.yaml",
+                 poll_interval=1.0, heartbeat_interval=10.0, purge_interval=600.0, requeue_interval=60.0,
+                 worker_id=None):
+        self.store = store
+        self.handlers = handlers
+        self.registry = registry
+        self.config_path = config_path
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.purge_interval = purge_interval
+        self.requeue_interval = requeue_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_purge = 0.0
+        self._last_requeue = 0.0
+
+    def _heartbeat_loop(self, job_id, done):
+        # Keeps the job from being requeued as stale during long steps
+        while not done.wait(self.heartbeat_interval):
+            try:
+                self.store.heartbeat(job_id)
+            except Exception as e:
+                print(f"Heartbeat failed for job {job_id}: {str(e)}")
+
+    def run_once(self):
+        """Process a single job if one is available. Returns True if a job was run."""
+        job = self.store.claim(self.worker_id, kinds=list(self.handlers))
+        if job is None:
+            return False
+
+        job_id = job["id"]
+        print(f"Worker {self.worker_id} claimed job {job_id} ({job['kind']})")
+        context = JobContext(self.store, job_id)
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat_loop, args=(job_id, done), daemon=True)
+        heartbeat.start()
+        try:
+            context.check_cancelled()
+            result = self.handlers[job["kind"]](job, context, self.registry, self.config_path)
+            if self.store.complete(job_id, self.worker_id, result):
+                print(f"Job {job_id} completed")
+            else:
+                print(f"Job {job_id} finished after it was taken back as stale; result dropped")
+        except JobCancelled:
+            self.store.mark_cancelled(job_id, self.worker_id)
+            print(f"Job {job_id} cancelled")
+        except Exception as e:
+            self.store.fail(job_id, self.worker_id, str(e))
+            print(f"Error in job {job_id}: {str(e)}")
+            print(f"Error details: {traceback.format_exc()}")
+        finally:
+            done.set()
+        return True
+
+    def purge_if_due(self):
+        now = time.time()
+        if now - self._last_purge < self.purge_interval:
+            return
+        self._last_purge = now
+        for job in self.store.purge_expired():
+            # Remove files produced for or by the job along with its record
+            for path in job["payload"].get("cleanup_paths", []):
+                try:
+                    if os.path.exists(path):
+                        os.remove(path)
+                except OSError as e:
+                    print(f"Error deleting file {path}: {str(e)}")
+
+    def requeue_if_due(self):
+        # Runs on every worker, so jobs of a crashed worker are picked up while the others keep going
+        now = time.time()
+        if now - self._last_requeue < self.requeue_interval:
+            return
+        self._last_requeue = now
+        self.store.requeue_stale()
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.requeue_if_due()
+                self.purge_if_due()
+                if not self.run_once():
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                # Never let a database hiccup kill the worker loop
+                print(f"Job worker error: {str(e)}")
+                self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Run the worker loop in a background thread (embedded in the API process)."""
+        self._thread = threading.Thread(target=self.run_forever, name=f"job-worker-{self.worker_id}",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def _run_worker_process(config_path):
+    from src.jobs.handlers import JOB_HANDLERS
+    from src.model_registry import build_default_registry
+
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f)
+    store = JobStore.from_config(config)
+    settings = config.get('jobs', {})
+    worker = JobWorker(
+        store, JOB_HANDLERS,
+        registry=build_default_registry(config_path),
+        config_path=config_path,
+        poll_interval=settings.get('poll_interval_seconds', 1.0),
+        requeue_interval=settings.get('requeue_interval_seconds', 60.0)
+    )
+    print(f"Job worker {worker.worker_id} started")
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run background job workers')
+    parser.add_argument('--config', default='config/config.yaml', help='Path to config file')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes')
+    args = parser.parse_args()
+
+    if args.workers == 1:
+        _run_worker_process(args.config)
+        return
+
+    processes = [multiprocessing.Process(target=_run_worker_process, args=(args.config,))
+                 for _ in range(args.workers)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == '__main__':
+    main()
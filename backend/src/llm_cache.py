@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+
+class LLMResponseCache:
+    """Persistent content-addressed cache for LLM responses, backed by SQLite.
+
+    Entries expire after `ttl_hours`; once more than `max_entries` are stored
+    the least recently used ones are evicted.
+    """
+
+    def __init__(self, db_path, ttl_hours=24, max_entries=10000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._connect().execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache (last_access)")
+
+    @classmethod
+    def from_config(cls, config):
+        """Build the cache from the `llm_cache` config section, or return None if disabled."""
+        settings = config.get('llm_cache', {})
+        if not settings.get('enabled', False):
+            return None
+        return cls(
+            db_path=settings.get('db_path', "data/cache/llm_cache.sqlite3"),
+            ttl_hours=settings.get('ttl_hours', 24),
+            max_entries=settings.get('max_entries', 10000)
+        )
+
+    def _connect(self):
+        # One connection per thread; sqlite3 connections are not shareable
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(system_prompt, model_name, payload):
+        """Hash the prompt, model and (already normalized) request payload."""
+        content = json.dumps({"system": system_prompt, "model": model_name, "payload": payload},
+                             sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached response for key, or None on a miss or expired entry."""
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is not None and now - row[1] > self.ttl_seconds:
+            conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key, value):
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+            (key, value, now, now)
+        )
+        # Evict least recently used entries beyond the size bound
+        count = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        if count > self.max_entries:
+            cursor = conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            with self._lock:
+                self.evictions += cursor.rowcount
+
+    def purge_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        return self._connect().execute("DELETE FROM llm_cache WHERE created_at < ?", (cutoff,)).rowcount
+
+    def clear(self):
+        self._connect().execute("DELETE FROM llm_cache")
+
+    def stats(self):
+        entries = self._connect().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_hours": self.ttl_seconds / 3600,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions
+            }
@@ -0,0 +1,143 @@
+import re
+import json
+from json.decoder import scanstring
+
+_WHITESPACE = re.compile(r'\s*')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?')
+_WORD = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+_FENCE = re.compile(r'^```[A-Za-z]*\s*|\s*```$')
+
+_LITERALS = {'true': True, 'false': False, 'null': None, 'True': True, 'False': False, 'None': None}
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', '/': '/', '\\': '\\', '"': '"', "'": "'"}
+# A single quote only closes a string when followed by one of these (otherwise it is an apostrophe)
+_CLOSERS = ',:]}'
+
+
+class LLMJSONError(ValueError):
+    """The text does not contain a JSON object or array, even after repair."""
+
+
+def parse_llm_json(text):
+    """Parse JSON as LLMs actually write it.
+
+    Well-formed JSON goes through json.loads. Anything else is read in a
+    single pass that accepts single-quoted strings (with apostrophes inside),
+    Python True/False/None, bare keys, trailing commas, missing commas between
+    values, code fences and text around the outermost object or array.
+    A reply wrapped in one extra pair of double quotes is unwrapped first.
+    """
+    text = text.strip()
+    try:
+        value = json.loads(text)
+    except ValueError:
+        pass
+    else:
+        if not isinstance(value, str):
+            return value
+        # "{'analyses': [...]}" decodes to a plain string; parse what it holds
+        text = value.strip()
+
+    text = _FENCE.sub('', text)
+    starts = [index for index in (text.find('{'), text.find('[')) if index >= 0]
+    if not starts:
+        raise LLMJSONError("No JSON object or array found")
+    value, _ = _Parser(text).value(min(starts))
+    return value
+
+
+class _Parser:
+    def __init__(self, text):
+        self.text = text
+
+    def error(self, message, index):
+        return LLMJSONError(f"{message} at char {index}: {self.text[max(0, index - 20):index + 20]!r}")
+
+    def skip(self, index):
+        return _WHITESPACE.match(self.text, index).end()
+
+    def value(self, index):
+        index = self.skip(index)
+        if index >= len(self.text):
+            raise self.error("Unexpected end of input", index)
+        char = self.text[index]
+        if char == '{':
+            return self.object(index + 1)
+        if char == '[':
+            return self.array(index + 1)
+        if char == '"':
+            try:
+                return scanstring(self.text, index + 1, False)
+            except ValueError:
+                raise self.error("Unterminated string", index) from None
+        if char == "'":
+            return self.single_quoted(index + 1)
+        match = _NUMBER.match(self.text, index)
+        if match:
+            number = match.group()
+            return (float(number) if any(c in number for c in '.eE') else int(number)), match.end()
+        match = _WORD.match(self.text, index)
+        if match and match.group() in _LITERALS:
+            return _LITERALS[match.group()], match.end()
+        raise self.error("Expecting value", index)
+
+    def single_quoted(self, index):
+        text, chunks = self.text, []
+        while True:
+            end = text.find("'", index)
+            escape = text.find('\\', index, end if end >= 0 else len(text))
+            if escape >= 0:
+                chunks.append(text[index:escape])
+                code = text[escape + 1:escape + 2]
+                if code == 'u':
+                    chunks.append(chr(int(text[escape + 2:escape + 6], 16)))
+                    index = escape + 6
+                else:
+                    chunks.append(_ESCAPES.get(code, code))
+                    index = escape + 2
+                continue
+            if end < 0:
+                raise self.error("Unterminated string", index)
+            after = self.skip(end + 1)
+            if after >= len(text) or text[after] in _CLOSERS:
+                chunks.append(text[index:end])
+                return ''.join(chunks), end + 1
+            # Apostrophe inside the string, e.g. 'tomorrow's specials'
+            chunks.append(text[index:end + 1])
+            index = end + 1
+
+    def array(self, index):
+        items = []
+        while True:
+            index = self.skip(index)
+            if index < len(self.text) and self.text[index] == ']':
+                return items, index + 1
+            item, index = self.value(index)
+            items.append(item)
+            index = self.skip(index)
+            if index < len(self.text) and self.text[index] == ',':
+                index += 1
+            # A missing comma is tolerated: the next value simply follows
+
+    def object(self, index):
+        obj = {}
+        while True:
+            index = self.skip(index)
+            if index >= len(self.text):
+                raise self.error("Unterminated object", index)
+            char = self.text[index]
+            if char == '}':
+                return obj, index + 1
+            if char in '"\'':
+                key, index = self.value(index)
+            else:
+                match = _WORD.match(self.text, index)
+                if not match:
+                    raise self.error("Expecting property name", index)
+                key, index = match.group(), match.end()
+            index = self.skip(index)
+            if index >= len(self.text) or self.text[index] != ':':
+                raise self.error("Expecting ':'", index)
+            obj[key], index = self.value(index + 1)
+            index = self.skip(index)
+            if index < len(self.text) and self.text[index] == ',':
+                index += 1
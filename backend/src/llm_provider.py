@@ -0,0 +1,243 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from types import SimpleNamespace
+
+logger = logging.getLogger(__name__)
+
+
+class StubLLMError(Exception):
+    """Simulated provider failure; status_code 429 for rate limits."""
+
+    def __init__(self, message, status_code=500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def message_text(message):
+    """Text content of a LangChain message, an OpenAI-style dict or a plain string."""
+    if isinstance(message, str):
+        return message
+    if isinstance(message, tuple):
+        message = message[1]
+        return message if isinstance(message, str) else ""
+    content = message.get("content") if isinstance(message, dict) else getattr(message, "content", "")
+    if isinstance(content, list):
+        # Multimodal messages: keep the text parts, ignore images
+        return "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+class StubLLM:
+    """Local deterministic stand-in for the Groq models.
+
+    Answers with schema-valid output for each LLM-driven module (demand-waste
+    analyses, recipe details and ideas, spoilage CSV lines, waste
+    classification JSON) after a simulated latency, and fails a configurable
+    fraction of calls with 429 or 500 errors. The same prompt always gets
+    the same answer; latency and failures come from a seeded RNG.
+
+    Offers both interfaces used in the repo: LangChain's invoke/ainvoke and
+    the Groq client's chat.completions.create.
+    """
+
+    ACTIONS = [
+        "Use in tomorrow's specials", "Move to the front of the cold store", "Reduce next order",
+        "Check storage temperature twice daily", "Prep and freeze surplus portions", "Discard if spoiled"
+    ]
+    FOODS = ["apple", "banana", "tomato", "bread", "carrot", "orange"]
+
+    def __init__(self, model_name="stub", latency_ms=200, latency_jitter_ms=50, error_rate=0.0,
+                 rate_limit_rate=0.0, seed=0):
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @classmethod
+    def from_config(cls, settings, model_name="stub"):
+        return cls(
+            model_name=model_name,
+            latency_ms=settings.get('latency_ms', 200),
+            latency_jitter_ms=settings.get('latency_jitter_ms', 50),
+            error_rate=settings.get('error_rate', 0.0),
+            rate_limit_rate=settings.get('rate_limit_rate', 0.0),
+            seed=settings.get('seed', 0)
+        )
+
+    def _draw(self):
+        """Latency (s) for the next call and the error it should raise, if any."""
+        with self._lock:
+            self.calls += 1
+            latency = max(0.0, self._rng.gauss(self.latency_ms, self.latency_jitter_ms)) / 1000
+            roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return latency, StubLLMError("Error code: 429 - rate limit exceeded (stub)", status_code=429)
+        if roll < self.rate_limit_rate + self.error_rate:
+            return latency, StubLLMError("Error code: 500 - internal error (stub)")
+        return latency, None
+
+    def _message(self, messages):
+        texts = [message_text(message) for message in messages]
+        content = self.respond("\n".join(texts), texts[-1] if texts else "")
+        # Same rough 4-characters-per-token estimate the rate limiter uses
+        usage = {"input_tokens": sum(len(text) for text in texts) // 4 + 1, "output_tokens": len(content) // 4 + 1}
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return content, usage
+
+    def invoke(self, messages, **kwargs):
+        latency, error = self._draw()
+        time.sleep(latency)
+        if error:
+            raise error
+        from langchain_core.messages import AIMessage
+        content, usage = self._message(messages)
+        return AIMessage(content=content, usage_metadata=usage)
+
+    async def ainvoke(self, messages, **kwargs):
+        latency, error = self._draw()
+        await asyncio.sleep(latency)
+        if error:
+            raise error
+        from langchain_core.messages import AIMessage
+        content, usage = self._message(messages)
+        return AIMessage(content=content, usage_metadata=usage)
+
+    def _create(self, model=None, messages=(), **kwargs):
+        latency, error = self._draw()
+        time.sleep(latency)
+        if error:
+            raise error
+        content, usage = self._message(messages)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=usage["input_tokens"], completion_tokens=usage["output_tokens"])
+        )
+
+    def respond(self, prompt, last_message):
+        """Deterministic, schema-valid answer for the module that wrote the prompt."""
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest(), 16)
+
+        if "analyses" in prompt:
+            rows = last_message.count("Ingredient:")
+            analyses = [{"recommended_actions": [self.ACTIONS[(digest + i) % len(self.ACTIONS)],
+                                                 self.ACTIONS[(digest + i + 3) % len(self.ACTIONS)]]}
+                        for i in range(rows)]
+            return json.dumps({"analyses": analyses})
+
+        if "recipes" in prompt:
+            names = re.findall(r"^\s*- ([^(\n]+?) \(", last_message, re.MULTILINE) or ["seasonal vegetables"]
+            recipes = [{
+                "dish_name": f"{name.title()} Masala",
+                "description": f"A quick curry that uses up surplus {name}.",
+                "ingredients": [f"1kg {name}", "0.2kg onion", "spices"],
+                "reasoning": f"{name} is in surplus or close to expiry."
+            } for name in names[:3]]
+            return json.dumps({"recipes": recipes})
+
+        if "prep_time_minutes" in prompt:
+            dish = re.search(r'dish "([^"]+)"', prompt)
+            dish = dish.group(1) if dish else "the dish"
+            return json.dumps({
+                "description": f"{dish} made with today's surplus ingredients. Served hot.",
+                "cuisine": "North Indian",
+                "prep_time_minutes": 20 + digest % 40,
+                "serving_size": 4 + digest % 3
+            })
+
+        if "contains_food" in prompt:
+            timestamp = re.search(r'"timestamp": "([^"{}]+)"', prompt)
+            image_id = re.search(r'"image_id": "([^"{}]+)"', prompt)
+            is_waste = digest % 2 == 0
+            categories = [{
+                "food_type": self.FOODS[digest % len(self.FOODS)],
+                "name": ["over-portion", "spoiled", "inedible", "contaminated"][digest % 4],
+                "confidence": round(0.6 + (digest % 40) / 100, 2),
+                "explanation": "Simulated classification"
+            }] if is_waste else []
+            return json.dumps({
+                "timestamp": timestamp.group(1) if timestamp else "",
+                "image_id": image_id.group(1) if image_id else "",
+                "contains_food": True,
+                "is_waste": is_waste,
+                "categories": categories
+            }, indent=2)
+
+        if "freshness" in prompt:
+            # The spoilage prompt carries a filled-in example line with the timestamp and image name
+            line = re.search(r'"([^"\[\]]+)","([^"\[\]]+)","\[food name\]"', prompt)
+            timestamp, image_name = line.groups() if line else ("", "")
+            freshness = "fresh" if digest % 2 else "rotten"
+            return f'"{timestamp}","{image_name}","{self.FOODS[digest % len(self.FOODS)]}","{freshness}","success"'
+
+        return "Stub response."
+
+
+# Clients are shared per provider/model so connections, call counts and the stub's RNG span the process
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _shared(key, build):
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = build()
+        return _clients[key]
+
+
+def provider_name(config):
+    """Configured LLM provider: 'groq' (default) or 'stub'; LLM_PROVIDER overrides the config."""
+    return os.getenv("LLM_PROVIDER") or (config or {}).get('llm', {}).get('provider', 'groq')
+
+
+def _check_provider(config):
+    provider = provider_name(config)
+    if provider not in ('groq', 'stub'):
+        raise ValueError(f"Unknown LLM provider '{provider}' (expected 'groq' or 'stub')")
+    if provider == 'groq' and not os.getenv("GROQ_API_KEY"):
+        raise ValueError("GROQ_API_KEY environment variable not set")
+    return provider
+
+
+def get_chat_model(config, model_name="Llama-3.1-8b-Instant", timeout=30):
+    """LangChain-style chat model (invoke/ainvoke) for the configured provider.
+
+    Raises ValueError when the Groq provider is selected without GROQ_API_KEY.
+    """
+    provider = _check_provider(config)
+    if provider == 'stub':
+        settings = (config or {}).get('llm', {}).get('stub', {})
+        # Its own model name keeps stub answers out of cache/checkpoint entries keyed for the real model
+        return _shared(('stub', model_name, json.dumps(settings, sort_keys=True)),
+                       lambda: StubLLM.from_config(settings, model_name=f"stub:{model_name}"))
+
+    def build():
+        from langchain_groq import ChatGroq
+        return ChatGroq(api_key=os.getenv("GROQ_API_KEY"), model_name=model_name, timeout=timeout)
+    return _shared(('groq-chat', model_name, timeout, os.getenv("GROQ_API_KEY")), build)
+
+
+def get_chat_client(config, model_name=None):
+    """Groq-client-style object (chat.completions.create) for the configured provider.
+
+    Raises ValueError when the Groq provider is selected without GROQ_API_KEY.
+    """
+    provider = _check_provider(config)
+    if provider == 'stub':
+        return get_chat_model(config, model_name=model_name or "stub")
+
+    def build():
+        from groq import Groq
+        return Groq(api_key=os.getenv("GROQ_API_KEY"))
+    return _shared(('groq-client', os.getenv("GROQ_API_KEY")), build)
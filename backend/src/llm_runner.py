@@ -0,0 +1,184 @@
+import math
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token) used for rate limiting."""
+    return max(1, math.ceil(len(text) / 4))
+
+
+def is_rate_limit_error(error):
+    """True for HTTP 429 / rate-limit errors from the LLM provider."""
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status == 429:
+        return True
+    message = str(error).lower()
+    return "429" in message or "rate limit" in message or "rate_limit" in message
+
+
+def retry_after_seconds(error):
+    """Read a Retry-After header from the provider's error, if there is one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def response_usage(response):
+    """(input_tokens, output_tokens) reported by the provider, or (None, None)."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        return usage.get("input_tokens"), usage.get("output_tokens")
+    usage = (getattr(response, "response_metadata", None) or {}).get("token_usage") or {}
+    return usage.get("prompt_tokens"), usage.get("completion_tokens")
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `rate_per_minute`."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    async def acquire(self, amount=1):
+        # Requests larger than the bucket would wait forever; cap them
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate_per_second)
+
+
+class AsyncLLMRunner:
+    """Runs LLM calls concurrently under request and token rate limits.
+
+    Concurrency adapts AIMD-style: it grows by one slot after
+    `max_concurrency` consecutive successes and halves on every 429, while
+    the rate-limited call waits (Retry-After or exponential backoff) and is
+    retried. Other errors (timeouts, 5xx) never grow it and restart the
+    success streak.
+    """
+
+    def __init__(self, requests_per_minute=30, tokens_per_minute=6000, max_concurrency=4,
+                 max_retries=5, backoff_seconds=2.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.stats = {"calls": 0, "rate_limited": 0, "errors": 0, "wait_s": 0.0, "min_concurrency": max_concurrency,
+                      "prompt_tokens": 0, "completion_tokens": 0}
+        # One record per successful call, for tuning batch sizes against token cost
+        self.calls = []
+
+    @classmethod
+    def from_config(cls, config):
+        settings = (config or {}).get('llm', {})
+        return cls(
+            requests_per_minute=settings.get('requests_per_minute', 30),
+            tokens_per_minute=settings.get('tokens_per_minute', 6000),
+            max_concurrency=settings.get('max_concurrency', 4),
+            max_retries=settings.get('max_retries', 5),
+            backoff_seconds=settings.get('backoff_seconds', 2.0)
+        )
+
+    def _start(self):
+        # Limiter state is bound to the running event loop
+        self._requests = TokenBucket(self.requests_per_minute)
+        self._tokens = TokenBucket(self.tokens_per_minute)
+        self._slots = asyncio.Condition()
+        self._in_flight = 0
+        self._limit = self.max_concurrency
+        self._successes = 0
+
+    async def _acquire_slot(self):
+        async with self._slots:
+            await self._slots.wait_for(lambda: self._in_flight < self._limit)
+            self._in_flight += 1
+
+    async def _release_slot(self, outcome):
+        async with self._slots:
+            self._in_flight -= 1
+            if outcome == "rate_limited":
+                self._limit = max(1, self._limit // 2)
+                self._successes = 0
+                self.stats["min_concurrency"] = min(self.stats["min_concurrency"], self._limit)
+            elif outcome == "error":
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self._limit and self._limit < self.max_concurrency:
+                    self._limit += 1
+                    self._successes = 0
+            self._slots.notify_all()
+
+    async def call(self, invoke, tokens, **details):
+        """Await invoke() once a slot and rate budget are available, retrying on failure.
+
+        Extra keyword details (e.g. rows=5) are stored with the call's token usage in `calls`.
+        """
+        for attempt in range(self.max_retries + 1):
+            wait_start = time.monotonic()
+            await self._acquire_slot()
+            await self._requests.acquire(1)
+            await self._tokens.acquire(tokens)
+            self.stats["wait_s"] += time.monotonic() - wait_start
+
+            # Anything that ends the call without a response (incl. cancellation) is an error
+            outcome = "error"
+            try:
+                self.stats["calls"] += 1
+                call_start = time.monotonic()
+                response = await invoke()
+                outcome = "success"
+                self._record(response, tokens, time.monotonic() - call_start, attempt + 1, details)
+                return response
+            except Exception as e:
+                rate_limited = is_rate_limit_error(e)
+                if rate_limited:
+                    outcome = "rate_limited"
+                if attempt == self.max_retries:
+                    self.stats["errors"] += 1
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt)
+                if rate_limited:
+                    self.stats["rate_limited"] += 1
+                    delay = retry_after_seconds(e) or delay
+                    logger.warning(f"Rate limited by LLM provider, retrying in {delay:.1f}s")
+                else:
+                    logger.error(f"LLM call failed ({e}), retrying in {delay:.1f}s")
+            finally:
+                await self._release_slot(outcome)
+            await asyncio.sleep(delay)
+
+    def _record(self, response, tokens, latency, attempts, details):
+        input_tokens, output_tokens = response_usage(response)
+        self.stats["prompt_tokens"] += input_tokens or 0
+        self.stats["completion_tokens"] += output_tokens or 0
+        self.calls.append(dict(details, estimated_tokens=tokens, input_tokens=input_tokens,
+                               output_tokens=output_tokens, latency_s=round(latency, 3), attempts=attempts))
+        logger.info(f"LLM call: {self.calls[-1]}")
+
+    async def _gather(self, tasks):
+        self._start()
+        return await asyncio.gather(*(task(self) for task in tasks))
+
+    def run(self, tasks):
+        """Run async task(runner) callables to completion and return their results in order."""
+        return asyncio.run(self._gather(tasks))
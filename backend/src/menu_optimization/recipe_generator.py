@@ -1,7 +1,6 @@
 # src/recipe_generator.py
 
 import pandas as pd
-from langchain_groq import ChatGroq
 import os
 from dotenv import load_dotenv
 import logging
@@ -10,6 +9,7 @@ from datetime import datetime
 import json
 import re
 import yaml
+from src.llm_provider import get_chat_model
 
 class RecipeGenerator:
     def __init__(self, config_path):
@@ -20,9 +20,9 @@ class RecipeGenerator:
         # Load environment variables
         load_dotenv()
 
-        # Initialize the Groq model
-        self.llm = ChatGroq(
-            api_key=os.getenv("GROQ_API_KEY"),
+        # Initialize the chat model (provider selected by `llm.provider` in config.yaml)
+        self.llm = get_chat_model(
+            self.config,
             model_name="Llama-3.1-8b-Instant",
             timeout=30
         )
@@ -5,8 +5,8 @@ import os
 from dotenv import load_dotenv
 import logging
 from tenacity import retry, stop_after_attempt, wait_exponential
-from langchain_groq import ChatGroq
-from langchain.schema import SystemMessage, HumanMessage
+from langchain_core.messages import SystemMessage, HumanMessage
+from src.llm_provider import get_chat_model
 import re
 import json
 # Load environment variables
@@ -16,16 +16,9 @@ load_dotenv()
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Initialize LangChain Groq LLM
-llm = ChatGroq(
-    api_key=os.getenv("GROQ_API_KEY"),
-    model_name="Llama-3.1-8b-Instant",  # Adjust if you want to try others
-    timeout=30
-)
-
 # Retry LLM call with exponential backoff
 @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=2, max=15))
-def invoke_llm_with_retry(messages):
+def invoke_llm_with_retry(llm, messages):
     try:
         response = llm.invoke(messages)
         logger.debug(f"LLM Response: {response.content}")
@@ -42,6 +35,12 @@ class RecipeRecommender:
         self.inventory = pd.read_csv(self.config['data']['inventory_path'])
         self.recipes = pd.read_csv(self.config['data']['recipe_path'])
         self.threshold_days = self.config['recommendation']['expiration_threshold_days']
+        # LLM for recipe details (provider selected by `llm.provider` in config.yaml)
+        self.llm = get_chat_model(
+            self.config,
+            model_name="Llama-3.1-8b-Instant",  # Adjust if you want to try others
+            timeout=30
+        )
 
     def preprocess_inventory(self, current_date):
         self.inventory['delivery_date'] = pd.to_datetime(self.inventory['delivery_date'])
@@ -81,7 +80,7 @@ class RecipeRecommender:
         ]
 
         try:
-            response = invoke_llm_with_retry(messages)
+            response = invoke_llm_with_retry(self.llm, messages)
             # Try parsing JSON from the content
             import json
             content = response.content
@@ -0,0 +1,172 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+
+def _current_rss_bytes():
+    """Return the resident set size of this process in bytes (0 if unknown)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _parameter_bytes(obj):
+    """Best-effort size of the torch parameters held by a model object."""
+    # YOLO wraps the torch module in `.model`, HF models and detectors expose it directly
+    for candidate in (obj, getattr(obj, "model", None)):
+        parameters = getattr(candidate, "parameters", None)
+        if callable(parameters):
+            try:
+                return sum(p.numel() * p.element_size() for p in parameters())
+            except Exception:
+                continue
+    return 0
+
+
+class ModelEntry:
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.instance = None
+        self.load_lock = threading.Lock()
+        # Inference on YOLO / OWL-ViT / Groq wrappers is not thread-safe, so
+        # callers serialize use of a shared instance through this lock
+        self.use_lock = threading.RLock()
+        self.load_time = None
+        self.loaded_at = None
+        self.rss_delta_bytes = 0
+        self.parameter_bytes = 0
+        self.uses = 0
+        self.error = None
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "loaded": self.instance is not None,
+            "load_time_s": round(self.load_time, 3) if self.load_time is not None else None,
+            "loaded_at": self.loaded_at,
+            "rss_delta_mb": round(self.rss_delta_bytes / (1024 * 1024), 2),
+            "parameter_mb": round(self.parameter_bytes / (1024 * 1024), 2),
+            "uses": self.uses,
+            "error": self.error,
+        }
+
+
+class ModelRegistry:
+    """Process-wide cache of heavy models, loaded once and shared across requests."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory):
+        """Register a zero-argument factory that builds the model called `name`."""
+        with self._lock:
+            self._entries[name] = ModelEntry(name, factory)
+
+    def _entry(self, name):
+        try:
+            return self._entries[name]
+        except KeyError:
+            raise KeyError(f"Model '{name}' is not registered")
+
+    def get(self, name):
+        """Return the shared instance for `name`, loading it on first use."""
+        entry = self._entry(name)
+        if entry.instance is not None:
+            return entry.instance
+
+        with entry.load_lock:
+            # Another request may have finished loading while we waited
+            if entry.instance is not None:
+                return entry.instance
+
+            print(f"Loading model '{name}'...")
+            rss_before = _current_rss_bytes()
+            start_time = time.time()
+            try:
+                instance = entry.factory()
+            except Exception as e:
+                entry.error = str(e)
+                print(f"Error loading model '{name}': {str(e)}")
+                raise
+            entry.load_time = time.time() - start_time
+            entry.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+            entry.rss_delta_bytes = max(0, _current_rss_bytes() - rss_before)
+            entry.parameter_bytes = _parameter_bytes(instance)
+            entry.error = None
+            entry.instance = instance
+            print(f"Model '{name}' loaded in {entry.load_time:.2f}s")
+            return instance
+
+    @contextmanager
+    def use(self, name):
+        """Context manager yielding the shared instance while holding its use lock."""
+        entry = self._entry(name)
+        instance = self.get(name)
+        with entry.use_lock:
+            entry.uses += 1
+            yield instance
+
+    def use_lock(self, name):
+        """The lock `use` holds for `name`, for long jobs that only need it around each inference call."""
+        entry = self._entry(name)
+        entry.uses += 1
+        return entry.use_lock
+
+    def warm_up(self, names=None):
+        """Eagerly load the given models (all registered models by default)."""
+        for name in names or list(self._entries):
+            try:
+                self.get(name)
+            except Exception:
+                # Keep the API up; the failure is reported through stats()
+                continue
+
+    def unload(self, name=None):
+        """Drop loaded instances so their memory can be reclaimed."""
+        names = [name] if name else list(self._entries)
+        for model_name in names:
+            entry = self._entry(model_name)
+            with entry.load_lock:
+                entry.instance = None
+
+    def stats(self):
+        return [entry.stats() for entry in self._entries.values()]
+
+
+def build_default_registry(config_path):
+    """Create a registry with the heavy models used by the API and job workers."""
+    registry = ModelRegistry()
+
+    def llm_settings():
+        # The LLM-backed models use the main config's provider, whatever config file they load themselves
+        import yaml
+        with open(config_path, 'r') as f:
+            return (yaml.safe_load(f) or {}).get('llm', {})
+
+    def load_inventory_yolo():
+        from src.inventory_tracking.inventory_tracking import InventoryTracker
+        return InventoryTracker(config_path).load_model()
+
+    def load_spoilage_detector():
+        from src.food_spoilage_detection.food_spoilage_detection import FoodSpoilageDetector
+        return FoodSpoilageDetector(config_path, llm_config=llm_settings())
+
+    def load_waste_classifier():
+        from src.vision_analyis.food_waste_classification import FoodWasteClassifier
+        return FoodWasteClassifier(config_path, llm_config=llm_settings())
+
+    def load_waste_heatmap():
+        from src.vision_analyis.waste_heatmap import WasteHeatmapGenerator
+        return WasteHeatmapGenerator(config_path)
+
+    registry.register("inventory_yolo", load_inventory_yolo)
+    registry.register("spoilage_detector", load_spoilage_detector)
+    registry.register("waste_classifier", load_waste_classifier)
+    registry.register("waste_heatmap", load_waste_heatmap)
+    return registry
@@ -0,0 +1,334 @@
+"""
+CPU-bound pipelines run by the API in its process pool.
+Every function here is top-level and takes/returns picklable values.
+"""
+import os
+import time
+import yaml
+import pandas as pd
+from datetime import timedelta
+
+
+def _load_config(config_path):
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+def generate_future_data(historical_data, days_ahead):
+    """Generate future data for sales forecasting"""
+    last_date = historical_data['date'].max()
+    future_dates = pd.date_range(start=last_date + timedelta(days=1), periods=days_ahead)
+    future_data = []
+
+    for date in future_dates:
+        for item in historical_data['item'].unique():
+            item_data = historical_data[historical_data['item'] == item].tail(7)
+            last_row = item_data.iloc[-1]
+            lag_7 = item_data['quantity'].iloc[0] if len(item_data) >= 7 else 0
+            future_data.append({
+                'date': date,
+                'item': item,
+                'day_of_week': date.dayofweek,
+                'month': date.month,
+                'is_weekend': 1 if date.dayofweek in [5, 6] else 0,
+                'lag_1': last_row['quantity'],
+                'lag_7': lag_7
+            })
+    return pd.DataFrame(future_data)
+
+
+def split_sales_history(data, holdout_days=7):
+    """Hold out the last `holdout_days` of sales for evaluation and train on the rest.
+
+    Used by both the full refresh and incremental updates, so their accuracy
+    figures and training windows are comparable.
+    """
+    train_cutoff = data['date'].max() - timedelta(days=holdout_days)
+    return data[data['date'] <= train_cutoff], data[data['date'] > train_cutoff]
+
+
+def run_sales_forecast(config_path, days_ahead=7, retrain=False):
+    """Train (or load) per-item models, evaluate them and forecast the next days"""
+    from src.smart_kitchen.sales_forecaster_prophet import SalesForecaster
+
+    config = _load_config(config_path)
+
+    # Preprocess data
+    processed_data = pd.read_csv(config['data']['raw_path'])
+    processed_data['date'] = pd.to_datetime(processed_data['date'])
+
+    # Train/test split
+    train_data, test_data = split_sales_history(processed_data, config.get('forecast_serving', {}).get('holdout_days', 7))
+
+    # Train and evaluate model
+    forecaster = SalesForecaster(config_path)
+    # Check if models exist
+    model_files = [f for f in os.listdir(config['model']['path']) if f.endswith('_model.json')]
+    if retrain or len(model_files) < len(processed_data['item'].unique()):
+        print("Training models...")
+        forecaster.train(train_data)
+    else:
+        print("Using existing models (loaded per item on first use)...")
+    accuracy = forecaster.evaluate(test_data)
+
+    # Generate future predictions
+    future_data = generate_future_data(processed_data, days_ahead)
+    future_preds = forecaster.predict(future_data)
+
+    return {
+        "accuracy": accuracy.to_dict(),
+        "future_predictions": future_preds.to_dict(orient='records'),
+        "model_cache": forecaster.cache_stats()
+    }
+
+
+def _read_sales_file(data_path):
+    """Read an uploaded CSV/Excel sales file and check it has date, item and quantity"""
+    if data_path.endswith('.csv'):
+        processed_data = pd.read_csv(data_path)
+    else:
+        processed_data = pd.read_excel(data_path)
+
+    # Ensure required columns exist
+    required_columns = ['date', 'item', 'quantity']
+    missing_columns = [col for col in required_columns if col not in processed_data.columns]
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}. "
+                         f"File must include date, item, and quantity columns.")
+
+    # Convert date to datetime
+    processed_data['date'] = pd.to_datetime(processed_data['date'])
+    return processed_data
+
+
+def merge_sales_history(history, new_rows):
+    """Append uploaded rows to the stored history; uploaded values win for dates already present.
+
+    Returns (merged, changed_items, rows_added, rows_updated), where
+    changed_items are the items with a new or different quantity.
+    """
+    key = ['date', 'item']
+    new_rows = new_rows.drop_duplicates(key, keep='last')
+    joined = new_rows[key + ['quantity']].merge(history[key + ['quantity']], on=key, how='left',
+                                                suffixes=('', '_old'), indicator=True)
+    added = joined['_merge'] == 'left_only'
+    updated = ~added & (joined['quantity'] != joined['quantity_old'])
+    changed_items = list(pd.unique(joined.loc[added | updated, 'item']))
+    merged = pd.concat([history, new_rows], ignore_index=True).drop_duplicates(key, keep='last') \
+        .sort_values(key).reset_index(drop=True)
+    return merged, changed_items, int(added.sum()), int(updated.sum())
+
+
+def _history_path(config):
+    """Managed sales history: the sales file plus incremental uploads, i.e. what the models were fitted on."""
+    return config.get('forecast_serving', {}).get('history_path', "data/forecasts/sales_history.csv")
+
+
+def _read_history(history_path):
+    history = pd.read_csv(history_path)
+    history['date'] = pd.to_datetime(history['date'])
+    return history
+
+
+def _write_history(history, history_path):
+    """Replace the managed history atomically."""
+    os.makedirs(os.path.dirname(history_path) or ".", exist_ok=True)
+    history.to_csv(f"{history_path}.tmp", index=False)
+    os.replace(f"{history_path}.tmp", history_path)
+
+
+def _fit_forecast(config_path, config, history, days_ahead, changed_items=None, on_stage=None):
+    """Fit, evaluate on the held-out days and forecast the next `days_ahead` days.
+
+    With changed_items, only those items (and items without a saved model) are
+    refit, warm-started from their current models; otherwise every item is
+    retrained. on_stage(name) is called before "train", "evaluate" and "forecast".
+    Returns (forecast, fit stats or None for a full retrain).
+    """
+    from src.smart_kitchen.sales_forecaster_prophet import SalesForecaster
+
+    on_stage = on_stage or (lambda stage: None)
+    # Same split for full refreshes and incremental updates
+    train_data, test_data = split_sales_history(history, config.get('forecast_serving', {}).get('holdout_days', 7))
+    forecaster = SalesForecaster(config_path)
+
+    on_stage("train")
+    stats = None
+    if changed_items is None:
+        print("Training models...")
+        forecaster.train(train_data)
+    else:
+        items = list(history['item'].unique())
+        trainable = set(train_data.groupby('item').size().loc[lambda counts: counts >= 2].index)
+        refit = [item for item in items if item in trainable and (item in changed_items or item not in forecaster.models)]
+        print(f"Refitting {len(refit)} of {len(items)} items")
+        fitted = forecaster.update(train_data, refit) if refit else []
+
+        # Time a full retrain would have spent on the items that were kept, at this run's per-item fit time
+        fit_seconds = sum(result[2] for result in fitted)
+        per_item = fit_seconds / len(fitted) if fitted else 0.0
+        stats = {
+            "items_total": len(items),
+            "items_refit": len(refit),
+            "warm_started": sum(1 for result in fitted if result[3]),
+            "fit_seconds": round(fit_seconds, 2),
+            "estimated_seconds_saved": round(per_item * (len(items) - len(refit)), 2)
+        }
+        test_data = test_data[test_data['item'].isin(forecaster.models)]
+
+    on_stage("evaluate")
+    accuracy = forecaster.evaluate(test_data)
+
+    on_stage("forecast")
+    future_preds = forecaster.predict(generate_future_data(history, days_ahead))
+    return {
+        "accuracy": accuracy.to_dict(),
+        "future_predictions": future_preds.to_dict(orient='records'),
+        "model_cache": forecaster.cache_stats()
+    }, stats
+
+
+def refresh_sales_forecast(config_path, days_ahead=None, full=True, on_stage=None):
+    """Merge the sales file into the managed history, refit, and publish the result to the forecast store.
+
+    With full=False, a sales file that only appends rows (no existing date/item
+    quantity changed) refits just the items it touches; anything else, or a
+    snapshot marked stale, retrains every item. on_stage is passed to _fit_forecast.
+    """
+    from src.smart_kitchen.forecast_store import ForecastStore, data_fingerprint, new_version
+
+    config = _load_config(config_path)
+    days_ahead = days_ahead or config.get('forecast_serving', {}).get('days_ahead', 7)
+    history_path = _history_path(config)
+    store = ForecastStore.from_config(config)
+    # Serialized with uploads, which rewrite the same history, models and snapshot
+    with store.write_lock():
+        # Taken before reading the data, so a file changed mid-refresh is picked up by the next check
+        fingerprint = data_fingerprint(config['data']['raw_path'])
+        start = time.time()
+        sales = _read_sales_file(config['data']['raw_path'])
+        previous = store.get()
+        has_history = os.path.exists(history_path)
+        history = _read_history(history_path) if has_history else sales.iloc[0:0]
+        merged, changed_items, rows_added, rows_updated = merge_sales_history(history, sales)
+
+        # Existing models can only be warm-started from if they were fitted on this history
+        append_only = has_history and rows_updated == 0 and previous is not None and not previous.get('stale_reason')
+        incremental = not full and append_only
+        print(f"Refreshing sales forecast ({'changed items' if incremental else 'full retrain'}): "
+              f"{rows_added} rows added, {rows_updated} updated")
+        forecast, stats = _fit_forecast(config_path, config, merged, days_ahead,
+                                        changed_items=changed_items if incremental else None, on_stage=on_stage)
+        _write_history(merged, history_path)
+        snapshot = dict(forecast, version=new_version(fingerprint), data_fingerprint=fingerprint,
+                        days_ahead=days_ahead, generated_at=time.time(), build_seconds=round(time.time() - start, 2))
+        if stats is not None:
+            snapshot["update"] = dict(stats, rows_added=rows_added, rows_updated=rows_updated)
+        return store.save(snapshot)
+
+
+def update_sales_forecast(config_path, data_path, days_ahead=None):
+    """Merge an uploaded sales file into the managed history and refit only the items it changed.
+
+    Changed items are warm-started from their current models; the rest keep
+    theirs. The refreshed forecast is published to the forecast store. The
+    sales file itself (data.raw_path) is never rewritten.
+    """
+    from src.smart_kitchen.forecast_store import ForecastStore, data_fingerprint, new_version
+
+    config = _load_config(config_path)
+    days_ahead = days_ahead or config.get('forecast_serving', {}).get('days_ahead', 7)
+    history_path = _history_path(config)
+    start = time.time()
+    uploaded = _read_sales_file(data_path)
+
+    # Read-modify-write of the history, models and snapshot, serialized with refresh jobs and other uploads
+    store = ForecastStore.from_config(config)
+    with store.write_lock():
+        previous = store.get()
+        if os.path.exists(history_path):
+            history = _read_history(history_path)
+            # The history already holds whatever sales file the current snapshot was built from
+            fingerprint = previous.get('data_fingerprint') if previous else None
+        elif os.path.exists(config['data']['raw_path']):
+            fingerprint = data_fingerprint(config['data']['raw_path'])
+            history = _read_sales_file(config['data']['raw_path'])
+        else:
+            fingerprint = None
+            history = uploaded.iloc[0:0]
+        merged, changed_items, rows_added, rows_updated = merge_sales_history(history, uploaded)
+
+        # Models replaced by an upload-only retrain cannot be warm-started from; retrain them all
+        stale = previous is not None and previous.get('stale_reason')
+        forecast, stats = _fit_forecast(config_path, config, merged, days_ahead,
+                                        changed_items=None if stale else changed_items)
+        if stats is None:
+            items = merged['item'].nunique()
+            stats = {"items_total": items, "items_refit": items, "warm_started": 0}
+        _write_history(merged, history_path)
+
+        snapshot = dict(forecast, version=new_version(fingerprint), data_fingerprint=fingerprint,
+                        days_ahead=days_ahead, generated_at=time.time(), build_seconds=round(time.time() - start, 2),
+                        update=dict(stats, rows_added=rows_added, rows_updated=rows_updated))
+        return store.save(snapshot)
+
+
+def run_sales_forecast_upload(config_path, data_path, days_ahead=7):
+    """Train, evaluate and forecast on an uploaded sales file (replacing the models).
+
+    The published snapshot is marked stale, since the models no longer match
+    the sales history it was built from, so a full refresh rebuilds them.
+    """
+    from src.smart_kitchen.sales_forecaster_prophet import SalesForecaster
+    from src.smart_kitchen.forecast_store import ForecastStore
+
+    processed_data = _read_sales_file(data_path)
+
+    # Train/test split
+    train_cutoff = processed_data['date'].max() - timedelta(days=7)  # Use last week as test data
+    train_data = processed_data[processed_data['date'] <= train_cutoff]
+    test_data = processed_data[processed_data['date'] > train_cutoff]
+
+    if len(test_data) == 0:
+        # If no test data, use last 10% of data as test
+        train_size = int(len(processed_data) * 0.9)
+        train_data = processed_data.iloc[:train_size]
+        test_data = processed_data.iloc[train_size:]
+
+    # Train and evaluate model (the model files are shared with refresh jobs and incremental uploads)
+    store = ForecastStore.from_config(_load_config(config_path))
+    with store.write_lock():
+        forecaster = SalesForecaster(config_path)
+        print("Training models on uploaded data...")
+        forecaster.train(train_data)
+        accuracy = forecaster.evaluate(test_data)
+
+        # Generate future predictions
+        future_data = generate_future_data(processed_data, days_ahead)
+        future_preds = forecaster.predict(future_data)
+        store.mark_stale("models_replaced")
+
+    return {
+        "accuracy": accuracy.to_dict(),
+        "future_predictions": future_preds.to_dict(orient='records')
+    }
+
+
+def run_dashboard(config_path):
+    """Build the waste dashboard reports and return the output directory"""
+    from src.vision_analyis.PlDashboard import RestaurantWasteTracker
+
+    config = _load_config(config_path)
+    output_dashboard_path = config['data']['output_dashboard_path']
+
+    # Initialize dashboard
+    tracker = RestaurantWasteTracker(config_path)
+
+    tracker.save_data_to_csv(output_dashboard_path)
+    tracker.generate_chart_data_csvs(output_dashboard_path)
+
+    # Generate summary data
+    tracker.generate_profit_loss_dashboard()
+    tracker.generate_time_based_analysis()
+
+    return output_dashboard_path
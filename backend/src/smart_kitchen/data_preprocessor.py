@@ -11,19 +11,33 @@ class DataPreprocessor:
         self.data['month'] = self.data['date'].dt.month
         self.data['is_weekend'] = self.data['day_of_week'].isin([5, 6]).astype(int)
 
-    def add_lag_features(self, lag_days=[1, 7]):
-        """Add lagged sales features per item."""
-        for item in self.data['item'].unique():
-            item_data = self.data[self.data['item'] == item].sort_values('date')
-            for lag in lag_days:
-                self.data.loc[self.data['item'] == item, f'lag_{lag}'] = \
-                    item_data['quantity'].shift(lag)
+    def add_lag_features(self, lag_days=[1, 7], rolling_windows=(), rolling_stats=('mean', 'std')):
+        """Add lagged sales features per item (`lag_<n>`) and rolling stats of past sales (`rolling_<stat>_<n>`).
+
+        Rolling windows cover the n days before each row, so a row never sees its own quantity.
+        Rows are matched to their item's history by date order, whatever order the frame is in.
+        """
+        # One stable sort by item then date; every feature is computed on this order
+        ordered = self.data.sort_values(['item', 'date'], kind='mergesort')
+        quantity = ordered.groupby('item', sort=False)['quantity']
+        for lag in lag_days:
+            self.data[f'lag_{lag}'] = quantity.shift(lag)
+
+        if rolling_windows:
+            previous = quantity.shift(1)
+            # Position within the item: windows that would reach into the previous item are masked
+            position = ordered.groupby('item', sort=False).cumcount()
+            for window in rolling_windows:
+                rolling = previous.rolling(window, min_periods=window)
+                for stat in rolling_stats:
+                    values = getattr(rolling, stat)()
+                    self.data[f'rolling_{stat}_{window}'] = values.where(position >= window)
         self.data.dropna(inplace=True)
 
-    def preprocess(self):
-        """Run preprocessing pipeline."""
+    def preprocess(self, rolling_windows=()):
+        """Run preprocessing pipeline (rolling_windows, e.g. (7, 14, 28), adds opt-in rolling stats)."""
         self.add_time_features()
-        self.add_lag_features()
+        self.add_lag_features(rolling_windows=rolling_windows)
         return self.data
 
     def save(self, output_path):
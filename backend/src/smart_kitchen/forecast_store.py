@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within one process
+    fcntl = None
+
+_local_write_lock = threading.Lock()
+
+
+def data_fingerprint(path):
+    """Cheap change marker for the sales data file (size and mtime), or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+
+def new_version(fingerprint):
+    """Version stamp for a forecast snapshot: UTC build time plus the data it was built from."""
+    return f"{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}-{(fingerprint or 'nodata').replace('-', '')[-8:]}"
+
+
+class ForecastStore:
+    """Latest precomputed sales forecast, persisted as one JSON snapshot.
+
+    The snapshot holds the accuracy metrics, next-N-day predictions, a version
+    stamp and the fingerprint of the sales data it was trained on. It is
+    written atomically, so API processes sharing the file always read a whole
+    snapshot; reads are served from memory until the file changes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._mtime_ns = None
+
+    @classmethod
+    def from_config(cls, config):
+        settings = config.get('forecast_serving', {})
+        return cls(settings.get('store_path', "data/forecasts/sales_forecast.json"))
+
+    def get(self):
+        """Current snapshot, or None before the first refresh has finished."""
+        try:
+            mtime_ns = os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            if mtime_ns != self._mtime_ns:
+                with open(self.path, 'r') as f:
+                    self._snapshot = json.load(f)
+                self._mtime_ns = mtime_ns
+            return self._snapshot
+
+    def save(self, snapshot):
+        """Atomically replace the snapshot."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+        return snapshot
+
+    def mark_stale(self, reason):
+        """Keep serving the current snapshot but flag it for a full rebuild (see refresh_reason)."""
+        snapshot = self.get()
+        if snapshot is None:
+            return None
+        return self.save(dict(snapshot, stale_reason=reason))
+
+    @contextmanager
+    def write_lock(self):
+        """Exclusive lock (across processes) held while the sales history, models and snapshot are rewritten."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if fcntl is None:
+            with _local_write_lock:
+                yield
+            return
+        with open(f"{self.path}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def refresh_reason(self, data_path, max_age_seconds=None):
+        """Why the snapshot should be rebuilt ('missing', a mark_stale reason, 'data_changed', 'expired'), or None."""
+        snapshot = self.get()
+        if snapshot is None:
+            return "missing"
+        if snapshot.get('stale_reason'):
+            return snapshot['stale_reason']
+        if snapshot.get('data_fingerprint') != data_fingerprint(data_path):
+            return "data_changed"
+        if max_age_seconds and time.time() - snapshot.get('generated_at', 0) > max_age_seconds:
+            return "expired"
+        return None
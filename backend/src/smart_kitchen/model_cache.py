@@ -0,0 +1,139 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+
+class ModelFileCache:
+    """Process-wide LRU of models deserialized from files, shared across forecaster instances.
+
+    A model is read from disk on first use and served from memory afterwards
+    until its file's mtime or size changes. Once the cached files add up to more than
+    `max_bytes` (file size is the memory estimate) the least recently used
+    models are dropped.
+    """
+
+    def __init__(self, loader, max_bytes=256 * 1024 * 1024):
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> (mtime_ns, size, model)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.cold_load_s = 0.0
+        self.warm_load_s = 0.0
+
+    def get(self, path):
+        """Model stored at path, or None if there is no such file."""
+        start = time.perf_counter()
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.invalidate(path)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._entries.move_to_end(path)
+                self.hits += 1
+                self.warm_load_s += time.perf_counter() - start
+                return entry[2]
+            if entry is not None:
+                # The file was rewritten (e.g. retrained by another process)
+                self._drop(path)
+                self.invalidations += 1
+
+            with open(path, 'r') as f:
+                model = self.loader(f.read())
+            self._insert(path, stat.st_mtime_ns, stat.st_size, model)
+            self.misses += 1
+            self.cold_load_s += time.perf_counter() - start
+            return model
+
+    def put(self, path, model):
+        """Cache a model that was just written to path (e.g. after training)."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            if path in self._entries:
+                self._drop(path)
+            self._insert(path, stat.st_mtime_ns, stat.st_size, model)
+
+    def invalidate(self, path):
+        with self._lock:
+            if os.path.abspath(path) in self._entries:
+                self._drop(os.path.abspath(path))
+                self.invalidations += 1
+
+    def _insert(self, path, mtime_ns, size, model):
+        self._entries[path] = (mtime_ns, size, model)
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, path):
+        _, size, _ = self._entries.pop(path)
+        self.bytes -= size
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "cached_mb": round(self.bytes / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions,
+            "cold_load_ms": round(1000 * self.cold_load_s / self.misses, 3) if self.misses else None,
+            "warm_load_ms": round(1000 * self.warm_load_s / self.hits, 3) if self.hits else None,
+        }
+
+
+class ItemModels(MutableMapping):
+    """item -> model view of a model directory (`<item>_model.json`), read through a ModelFileCache.
+
+    Listing and membership only look at file names; a model is deserialized
+    when its item is first accessed.
+    """
+
+    def __init__(self, model_dir, cache, suffix="_model.json"):
+        self.model_dir = model_dir
+        self.cache = cache
+        self.suffix = suffix
+
+    def path(self, item):
+        return f"{self.model_dir}/{item}{self.suffix}"
+
+    def __getitem__(self, item):
+        model = self.cache.get(self.path(item))
+        if model is None:
+            raise KeyError(item)
+        return model
+
+    def __setitem__(self, item, model):
+        # The model file must already be written; the cache records its mtime
+        self.cache.put(self.path(item), model)
+
+    def __delitem__(self, item):
+        if item not in self:
+            raise KeyError(item)
+        os.remove(self.path(item))
+        self.cache.invalidate(self.path(item))
+
+    def __contains__(self, item):
+        return os.path.exists(self.path(item))
+
+    def __iter__(self):
+        if not os.path.isdir(self.model_dir):
+            return iter([])
+        return iter(sorted(name[:-len(self.suffix)] for name in os.listdir(self.model_dir) if name.endswith(self.suffix)))
+
+    def __len__(self):
+        return sum(1 for _ in self)
@@ -3,8 +3,79 @@ from prophet.serialize import model_to_json, model_from_json
 import pandas as pd
 import yaml
 import os
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.metrics import mean_squared_error, mean_absolute_percentage_error
 import numpy as np
+from src.smart_kitchen.model_cache import ModelFileCache, ItemModels
+
+logger = logging.getLogger(__name__)
+
+def write_model_file(path, model_json):
+    """Atomically replace a saved model, so concurrent readers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(model_json)
+    os.replace(tmp_path, path)
+
+# Deserialized models shared by every SalesForecaster in this process
+_model_cache = None
+_model_cache_lock = threading.Lock()
+
+
+def get_model_cache(config=None):
+    """The process-wide Prophet model cache, sized by prophet.model_cache_mb."""
+    global _model_cache
+    with _model_cache_lock:
+        if _model_cache is None:
+            max_mb = (config or {}).get('prophet', {}).get('model_cache_mb', 256)
+            _model_cache = ModelFileCache(model_from_json, max_bytes=max_mb * 1024 * 1024)
+        return _model_cache
+
+
+def warm_start_params(model):
+    """A fitted model's parameters in the form Prophet.fit(init=...) accepts."""
+    init = {name: model.params[name][0][0] for name in ['k', 'm', 'sigma_obs']}
+    init.update({name: model.params[name][0] for name in ['delta', 'beta']})
+    return init
+
+
+def _new_prophet(params):
+    return Prophet(
+        yearly_seasonality=params['yearly_seasonality'],
+        weekly_seasonality=params['weekly_seasonality'],
+        daily_seasonality=params['daily_seasonality']
+    )
+
+
+def fit_item_models(item_frames, params, inits=None):
+    """Fit one Prophet model per (item, ds/y frame).
+
+    Returns (item, model JSON, fit seconds, warm started) tuples. Items with an
+    entry in `inits` start the optimizer from those parameters; if they no
+    longer fit the model's shape (e.g. fewer changepoints) it starts cold.
+    Top-level so process-pool workers can run it; the serial path uses it too,
+    which keeps both paths' models identical.
+    """
+    inits = inits or {}
+    fitted = []
+    for item, item_data in item_frames:
+        start = time.perf_counter()
+        model, warm = None, item in inits
+        if warm:
+            try:
+                model = _new_prophet(params).fit(item_data, init=inits[item])
+            except Exception as e:
+                logger.warning(f"Warm start failed for {item} ({e}); refitting from scratch")
+                warm = False
+        if model is None:
+            model = _new_prophet(params).fit(item_data)
+        fitted.append((item, model_to_json(model), time.perf_counter() - start, warm))
+    return fitted
+
 
 class SalesForecaster:
     def __init__(self, config_path):
@@ -12,36 +83,73 @@ class SalesForecaster:
             self.config = yaml.safe_load(f)
         self.model_dir = self.config['model']['path']
         os.makedirs(self.model_dir, exist_ok=True)
-        self.models = {}
+        # Per-item models are deserialized on first access and shared through the process cache
+        self.models = ItemModels(self.model_dir, get_model_cache(self.config))
+
+    def train(self, data, workers=None):
+        """Train a Prophet model per ingredient.
+
+        Items are fitted in a process pool of `workers` (default
+        prophet.train_workers); 0 or 1 fits them in this process. Either way
+        the models are written and loaded in item order from their JSON, so
+        the result does not depend on the worker count.
+        """
+        return self._fit(data, data['item'].unique(), workers)
+
+    def update(self, data, items, workers=None):
+        """Refit only `items` on `data`, warm-starting each from its current model.
+
+        Items without a saved model are fitted from scratch. Returns the same
+        per-item (item, model JSON, fit seconds, warm started) list as train.
+        """
+        inits = {item: warm_start_params(self.models[item]) for item in items if item in self.models}
+        return self._fit(data, items, workers, inits)
 
-    def train(self, data):
-        """Train a Prophet model per ingredient."""
+    def _fit(self, data, items, workers=None, inits=None):
         params = self.config['prophet']
-        for item in data['item'].unique():
-            item_data = data[data['item'] == item][['date', 'quantity']].rename(columns={'date': 'ds', 'quantity': 'y'})
-            model = Prophet(
-                yearly_seasonality=params['yearly_seasonality'],
-                weekly_seasonality=params['weekly_seasonality'],
-                daily_seasonality=params['daily_seasonality']
-            )
-            model.fit(item_data)
-            self.models[item] = model
-            # Save model to JSON
-            with open(f"{self.model_dir}/{item}_model.json", 'w') as f:
-                f.write(model_to_json(model))
-
-    def load_models(self):
-        """Load pre-trained Prophet models."""
-        for item in os.listdir(self.model_dir):
-            if item.endswith('_model.json'):
-                item_name = item.replace('_model.json', '')
-                with open(f"{self.model_dir}/{item}", 'r') as f:
-                    self.models[item_name] = model_from_json(f.read())
+        if workers is None:
+            workers = params.get('train_workers', 0)
+        item_frames = [
+            (item, data[data['item'] == item][['date', 'quantity']].rename(columns={'date': 'ds', 'quantity': 'y'}))
+            for item in items
+        ]
+        workers = min(workers, len(item_frames))
+
+        start = time.perf_counter()
+        if workers > 1:
+            # Small chunks keep the workers evenly loaded when item histories differ in length
+            chunk_size = max(1, len(item_frames) // (workers * 4))
+            chunks = [item_frames[i:i + chunk_size] for i in range(0, len(item_frames), chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                fitted = [result for chunk in pool.map(fit_item_models, chunks, [params] * len(chunks),
+                                                       [inits] * len(chunks))
+                          for result in chunk]
+        else:
+            fitted = fit_item_models(item_frames, params, inits)
+
+        for item, model_json, fit_seconds, warm in fitted:
+            logger.info(f"Fitted Prophet model for {item} in {fit_seconds:.2f}s{' (warm start)' if warm else ''}")
+            # Save model to JSON, then cache it against the new file
+            write_model_file(f"{self.model_dir}/{item}_model.json", model_json)
+            self.models[item] = model_from_json(model_json)
+        logger.info(f"Trained {len(fitted)} Prophet models with {max(workers, 1)} worker(s) "
+                    f"in {time.perf_counter() - start:.2f}s")
+        return fitted
+
+    def load_models(self, items=None):
+        """Warm the model cache for `items` (default: every saved model).
+
+        Not needed before predict/evaluate, which load only the items they use.
+        """
+        for item in list(self.models) if items is None else items:
+            self.models.get(item)
+
+    def cache_stats(self):
+        """Hits, misses and cold vs warm load times of the shared model cache."""
+        return self.models.cache.stats()
 
     def predict(self, future_data):
         """Predict future quantities with 2 decimal places."""
-        if not self.models:
-            self.load_models()
         predictions = []
         for item in future_data['item'].unique():
             item_data = future_data[future_data['item'] == item][['date']].rename(columns={'date': 'ds'})
@@ -57,8 +165,6 @@ class SalesForecaster:
 
     def evaluate(self, test_data):
         """Calculate RMSE and MAPE per ingredient."""
-        if not self.models:
-            self.load_models()
         results = []
         for item in test_data['item'].unique():
             item_data = test_data[test_data['item'] == item][['date', 'quantity']].rename(columns={'date': 'ds', 'quantity': 'y'})
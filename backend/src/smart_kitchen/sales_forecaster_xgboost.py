@@ -31,6 +31,32 @@ class SalesForecaster:
             with open(f"{self.model_dir}/{item}_model.pkl", 'wb') as f:
                 pickle.dump(model, f)
 
+    def update(self, data, items, rounds=None):
+        """Continue boosting the saved models of `items` on `data`.
+
+        Each model gets `rounds` (default xgboost.update_rounds) extra trees
+        instead of being rebuilt; items without a model are trained from scratch.
+        """
+        params = self.config['xgboost']
+        rounds = rounds or params.get('update_rounds', 50)
+        if not self.models:
+            self.load_models()
+        for item in items:
+            item_data = data[data['item'] == item]
+            X = self.prepare_features(item_data)
+            y = item_data['quantity']
+            previous = self.models.get(item)
+            model = xgb.XGBRegressor(
+                max_depth=params['max_depth'],
+                learning_rate=params['learning_rate'],
+                n_estimators=rounds if previous is not None else params['n_estimators'],
+                objective='reg:squarederror'
+            )
+            model.fit(X, y, xgb_model=previous.get_booster() if previous is not None else None)
+            self.models[item] = model
+            with open(f"{self.model_dir}/{item}_model.pkl", 'wb') as f:
+                pickle.dump(model, f)
+
     def load_models(self):
         for item in os.listdir(self.model_dir):
             if item.endswith('_model.pkl'):
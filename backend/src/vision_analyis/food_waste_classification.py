@@ -428,7 +428,6 @@
 import requests
 from PIL import Image
 from io import BytesIO
-from groq import Groq
 import os
 from dotenv import load_dotenv
 import csv
@@ -439,9 +438,10 @@ import json
 import re
 import logging
 import yaml
+from src.llm_provider import get_chat_client
 
 class FoodWasteClassifier:
-    def __init__(self, config_path="config/config.yaml"):
+    def __init__(self, config_path="config/config.yaml", llm_config=None):
         # Load environment variables
         load_dotenv()
         
@@ -449,16 +449,13 @@ class FoodWasteClassifier:
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
         
-        # Get API key from environment
-        self.groq_api_key = os.environ.get("GROQ_API_KEY")
-        if not self.groq_api_key:
-            raise ValueError("GROQ_API_KEY environment variable not set")
-        
-        # Initialize the Groq client
-        self.client = Groq(api_key=self.groq_api_key)
-        
         # Get model name from config or use default
         self.model_name = self.config.get('model', {}).get('name', "llama-3.2-90b-vision-preview")
+
+        # Initialize the chat client (provider from `llm_config`, else this config's `llm` section);
+        # raises ValueError if the Groq provider is selected without GROQ_API_KEY
+        llm_settings = llm_config if llm_config is not None else self.config.get('llm', {})
+        self.client = get_chat_client({'llm': llm_settings}, model_name=self.model_name)
         
         # Configure logging
         log_path = self.config.get('data', {}).get('log_path', "data/output/waste_classification/food_waste_classifier.log")
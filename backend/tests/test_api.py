@@ -11,28 +11,26 @@ from pathlib import Path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
 # Import the FastAPI app
-from backend.api import app, task_tracker
+import backend.api
+from backend.api import app, model_registry
+from backend.src.execution import ExecutionLayer
+from backend.src.jobs.store import JobStore
 
 client = TestClient(app)
 
-def test_task_status():
-    """Test the task status endpoint by creating a mock task and checking its status"""
-    # Create a mock task_id
-    task_id = str(uuid.uuid4())
-    
-    # Mock data for testing
-    test_start_time = time.time()
-    test_task_data = {
-        "status": "processing",
-        "progress": 50,
-        "start_time": test_start_time,
-        "result": None,
-        "error": None,
-        "file_id": str(uuid.uuid4())
-    }
-    
-    # Add the mock task to the task_tracker dictionary in the API
-    task_tracker[task_id] = test_task_data
+@pytest.fixture
+def job_store(tmp_path, monkeypatch):
+    """A throwaway job database in place of the shared data/jobs one"""
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    monkeypatch.setattr(backend.api, "job_store", store)
+    return store
+
+def test_task_status(job_store):
+    """Test the task status endpoint by creating a job and checking its status"""
+    # Queue a job and move it to processing
+    task_id = job_store.submit("test_kind", {"file_id": str(uuid.uuid4())})
+    job_store.claim("test-worker", kinds=["test_kind"])
+    job_store.update_progress(task_id, 50)
     
     # Test the task status endpoint
     response = client.get(f"/api/task-status/{task_id}")
@@ -49,14 +47,11 @@ def test_task_status():
     assert response.status_code == 404
     
     # Update task to completed state
-    task_tracker[task_id]["status"] = "completed"
-    task_tracker[task_id]["progress"] = 100
-    task_tracker[task_id]["result"] = {
+    job_store.complete(task_id, "test-worker", {
         "results": {"test_item": 1},
         "video_url": "/static/test_video.mp4",
         "results_url": "/static/test_results.json"
-    }
-    task_tracker[task_id]["end_time"] = time.time()
+    })
     
     # Test the task status endpoint for a completed task
     response = client.get(f"/api/task-status/{task_id}")
@@ -66,10 +61,10 @@ def test_task_status():
     assert "result" in response.json()
     assert response.json()["result"]["video_url"] == "/static/test_video.mp4"
     
-    # Update task to failed state
-    task_tracker[task_id]["status"] = "failed"
-    task_tracker[task_id]["error"] = "Test error message"
-    task_tracker[task_id]["end_time"] = time.time()
+    # A second task that fails
+    task_id = job_store.submit("test_kind", {})
+    job_store.claim("test-worker", kinds=["test_kind"])
+    job_store.fail(task_id, "test-worker", "Test error message")
     
     # Test the task status endpoint for a failed task
     response = client.get(f"/api/task-status/{task_id}")
@@ -78,8 +73,193 @@ def test_task_status():
     assert "error" in response.json()
     assert response.json()["error"] == "Test error message"
     
+    # The job shows up in the job listing
+    response = client.get("/api/jobs", params={"kind": "test_kind"})
+    assert response.status_code == 200
+    assert task_id in [job["job_id"] for job in response.json()["jobs"]]
+
+def test_cancel_queued_job(job_store):
+    """Test that a queued job can be cancelled before any worker claims it"""
+    task_id = job_store.submit("test_kind", {})
+    
+    response = client.post(f"/api/jobs/{task_id}/cancel")
+    assert response.status_code == 200
+    assert response.json()["status"] == "cancelled"
+    assert job_store.claim("test-worker", kinds=["test_kind"]) is None
+    
+    response = client.post(f"/api/jobs/{uuid.uuid4()}/cancel")
+    assert response.status_code == 404
+
+def test_job_events_stream_partial_results(job_store):
+    """Test that job snapshots are exposed and streamed until the job finishes"""
+    task_id = job_store.submit("test_kind", {})
+    job = job_store.claim("test-worker", kinds=["test_kind"])
+    snapshot = {"frame": 10, "total_frames": 20, "progress": 50.0, "fps": 12.5,
+                "frame_counts": {"apple": 2}, "running_counts": {"apple": 3}}
+    job_store.update_progress(job["id"], 50, snapshot=snapshot)
+    
+    response = client.get(f"/api/jobs/{task_id}")
+    assert response.json()["partial_results"] == snapshot
+    
+    job_store.complete(task_id, "test-worker", {"ok": True})
+    response = client.get(f"/api/jobs/{task_id}/events")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: progress" in response.text
+    assert "event: done" in response.text
+    assert '"running_counts": {"apple": 3}' in response.text
+    
+    response = client.get(f"/api/jobs/{uuid.uuid4()}/events")
+    assert response.status_code == 404
+
+def test_demand_waste_stream_emits_scores_before_actions():
+    """Test that the streaming endpoint sends risk scores first, then actions per LLM batch"""
+    import json
+    import pandas as pd
+    from src.demand_waste.waste_predictor import predict_waste
+
+    df = pd.DataFrame([
+        {"ingredient": name, "stock_kg": 5.0 + i, "days_since_delivery": i, "shelf_life_days": 10,
+         "storage_temp_c": 4, "weekly_usage_kg": 7.0}
+        for i, name in enumerate(["tomato", "rice", "milk"])
+    ])
+
+    def fake_predict(df, config_path, use_llm=None, on_scores=None, on_actions=None):
+        scores = predict_waste(df, None, use_llm=False)
+        on_scores(scores)
+        on_actions([0, 2], [["Use tomato"], ["Use milk"]])
+        on_actions([1], [["Use rice"]])
+        return scores
+
+    with patch("src.demand_waste.data_preprocessor.load_inventory_data", return_value=df), \
+            patch("src.demand_waste.waste_predictor.predict_waste", side_effect=fake_predict):
+        response = client.get("/api/demand-waste-prediction/stream?chunk_size=2")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["type"] for event in events] == ["scores", "scores", "actions", "actions", "done"]
+    assert [row["row"] for row in events[0]["rows"] + events[1]["rows"]] == [0, 1, 2]
+    assert events[0]["rows"][0]["spoilage_risk"] == 0.0
+    assert events[2]["rows"] == [{"row": 0, "recommended_actions": ["Use tomato"]},
+                                 {"row": 2, "recommended_actions": ["Use milk"]}]
+
+    with patch("src.demand_waste.data_preprocessor.load_inventory_data", side_effect=FileNotFoundError("missing.csv")):
+        response = client.get("/api/demand-waste-prediction/stream?format=sse")
+    assert "event: error" in response.text and "missing.csv" in response.text
+
+def test_api_import_defers_heavy_stacks():
+    """Test that importing the app does not pull in the ML/LLM stacks used by the endpoints"""
+    import subprocess
+    backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    heavy = ["pandas", "torch", "ultralytics", "prophet", "langchain_core", "langchain_groq", "matplotlib"]
+    script = f"import sys, api; print([m for m in {heavy!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", script], cwd=backend_dir, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
+
+def test_sales_forecast_served_from_store(tmp_path, monkeypatch, job_store):
+    """Test that GET serves the precomputed snapshot and a data change queues one refresh"""
+    from backend.api import config
+    from src.smart_kitchen.forecast_store import ForecastStore, data_fingerprint
+
+    data_path = tmp_path / "sales.csv"
+    data_path.write_text("date,item,quantity\n2024-01-01,dal,10\n")
+    monkeypatch.setitem(config['data'], 'raw_path', str(data_path))
+    store = ForecastStore(str(tmp_path / "forecast.json"))
+    store.save({"accuracy": {"item": {"0": "dal"}}, "future_predictions": [{"item": "dal", "predicted_quantity": 9.5}],
+                "version": "v1", "generated_at": time.time(), "data_fingerprint": data_fingerprint(str(data_path))})
+
+    with patch("backend.api.forecast_store", store), \
+            patch("src.pipelines.refresh_sales_forecast", side_effect=AssertionError("should not train")):
+        response = client.get("/api/sales-forecasting")
+        assert response.status_code == 200
+        assert response.json()["version"] == "v1" and response.json()["stale"] is False
+        assert response.json()["future_predictions"] == [{"item": "dal", "predicted_quantity": 9.5}]
+
+        data_path.write_text("date,item,quantity\n2024-01-01,dal,10\n2024-01-02,dal,12\n")
+        response = client.get("/api/sales-forecasting")
+        assert response.json()["stale"] is True
+        task_id = client.post("/api/sales-forecasting/refresh").json()["task_id"]
+
+    # The GET already queued a refresh; the manual trigger reuses it
+    assert job_store.get(task_id)["kind"] == "sales_forecast_refresh"
+    assert len(job_store.list_jobs(status="queued", kind="sales_forecast_refresh")) == 1
+    client.post(f"/api/jobs/{task_id}/cancel")
+
+def test_model_registry_loads_once():
+    """Test that registered models are built lazily, once, and reported by /api/models"""
+    factory = MagicMock(return_value=object())
+    model_registry.register("test_model", factory)
+    
+    # Nothing is loaded until the model is first requested
+    assert factory.call_count == 0
+    
+    first = model_registry.get("test_model")
+    with model_registry.use("test_model") as second:
+        assert second is first
+    assert factory.call_count == 1
+    
+    response = client.get("/api/models")
+    assert response.status_code == 200
+    stats = {m["name"]: m for m in response.json()["models"]}
+    assert stats["test_model"]["loaded"] is True
+    assert stats["test_model"]["uses"] == 1
+    assert stats["test_model"]["load_time_s"] is not None
+    assert stats["inventory_yolo"]["loaded"] is False
+    
     # Clean up
-    del task_tracker[task_id]
+    model_registry.unload("test_model")
+
+def test_waste_classification_holds_model_lock():
+    """Test that classifier inference runs under the registry use lock"""
+    original_factory = model_registry._entry("waste_classifier").factory
+    model_registry.register("waste_classifier", lambda: classifier)
+    entry = model_registry._entry("waste_classifier")
+    classifier = MagicMock()
+    classifier.detect_food_waste.side_effect = lambda path: {"locked": entry.use_lock._is_owned()}
+    try:
+        response = client.post("/api/waste-classification", files={"file": ("plate.jpg", b"jpeg")})
+        assert response.status_code == 200
+        assert response.json()["classification"] == {"locked": True}
+        assert entry.uses == 1
+    finally:
+        model_registry.register("waste_classifier", original_factory)
+
+def test_execution_layer_limits_and_pools():
+    """Test that blocking work overlaps up to the endpoint limit and CPU work leaves the process"""
+    import asyncio
+    execution = ExecutionLayer(cpu_workers=1, io_workers=4, endpoint_limits={"default": 2})
+    running = {"now": 0, "peak": 0}
+    
+    def blocking_call():
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.2)
+        running["now"] -= 1
+        return os.getpid()
+    
+    async def run_all():
+        io_results = await asyncio.gather(*[execution.run_io("test", blocking_call) for _ in range(4)])
+        cpu_pid = await execution.run_cpu("test-cpu", os.getpid)
+        return io_results, cpu_pid
+    
+    io_results, cpu_pid = asyncio.run(run_all())
+    execution.shutdown(wait=True)
+    
+    # Thread pool work runs in this process, two calls at a time
+    assert io_results == [os.getpid()] * 4
+    assert running["peak"] == 2
+    assert cpu_pid != os.getpid()
+    
+    stats = {s["endpoint"]: s for s in execution.stats()["endpoints"]}
+    assert stats["test"]["completed"] == 4
+    assert stats["test"]["max_queue_depth"] >= 2
+    assert stats["test-cpu"]["completed"] == 1
+    
+    response = client.get("/api/execution")
+    assert response.status_code == 200
+    assert "pools" in response.json()["execution"]
 
 @pytest.mark.skip(reason="Requires actual video file for upload testing")
 def test_upload_stock_detection_video():
@@ -92,7 +272,7 @@ def test_upload_stock_detection_video():
         pytest.skip(f"Test video file not found at {test_video_path}")
     
     # Mock StockDetector to avoid actual processing
-    with patch("backend.api.StockDetector") as mock_detector_class:
+    with patch("backend.src.inventory_tracking.stock_detection.StockDetector") as mock_detector_class:
         # Setup mock detector instance
         mock_detector = MagicMock()
         mock_detector.detect_stock.return_value = {"test_item": 1}
@@ -128,4 +308,24 @@ def test_upload_stock_detection_video():
         
         # Cleanup
         if os.path.exists("static/test_output_video.mp4"):
-            os.remove("static/test_output_video.mp4") 
\ No newline at end of file
+            os.remove("static/test_output_video.mp4") 
+def test_first_sales_forecast_queues_refresh_job(tmp_path, job_store):
+    """Test that without a snapshot GET queues one refresh job and answers 503 instead of training inline"""
+    from src.smart_kitchen.forecast_store import ForecastStore
+
+    store = ForecastStore(str(tmp_path / "forecast.json"))
+    with patch("backend.api.forecast_store", store), \
+            patch("src.pipelines.refresh_sales_forecast", side_effect=AssertionError("should not train inline")):
+        response = client.get("/api/sales-forecasting")
+        assert response.status_code == 503
+        task_id = response.json()["task_id"]
+        assert client.get("/api/sales-forecasting").json()["task_id"] == task_id
+        assert [job["id"] for job in job_store.list_jobs(kind="sales_forecast_refresh")] == [task_id]
+
+        # Once the job has published a snapshot it is served
+        store.save({"accuracy": {}, "future_predictions": [], "version": "v1", "generated_at": time.time(),
+                    "data_fingerprint": None})
+        job_store.claim("test-worker", kinds=["sales_forecast_refresh"])
+        job_store.complete(task_id, "test-worker", {"version": "v1"})
+        response = client.get("/api/sales-forecasting")
+        assert response.status_code == 200 and response.json()["version"] == "v1"
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.smart_kitchen.data_preprocessor import DataPreprocessor
+
+
+def test_lag_and_rolling_features_match_per_item_history(tmp_path):
+    """Features on a shuffled frame equal a per-item shift/rolling over date-sorted sales"""
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2024-01-01", periods=40)
+    sales = pd.concat([pd.DataFrame({"date": dates, "item": item, "quantity": rng.poisson(20, len(dates))})
+                       for item in ["dal", "naan", "paneer"]], ignore_index=True)
+    data_path = tmp_path / "sales.csv"
+    sales.sample(frac=1, random_state=0).to_csv(data_path, index=False)
+
+    preprocessor = DataPreprocessor(str(data_path))
+    preprocessor.add_lag_features(lag_days=[1, 7], rolling_windows=(7, 14))
+    result = preprocessor.data.sort_values(["item", "date"]).reset_index(drop=True)
+
+    expected = []
+    for _, item_sales in sales.groupby("item"):
+        item_sales = item_sales.sort_values("date").copy()
+        item_sales["lag_1"] = item_sales["quantity"].shift(1)
+        item_sales["lag_7"] = item_sales["quantity"].shift(7)
+        for window in (7, 14):
+            past = item_sales["quantity"].shift(1).rolling(window)
+            item_sales[f"rolling_mean_{window}"] = past.mean()
+            item_sales[f"rolling_std_{window}"] = past.std()
+        expected.append(item_sales.dropna())
+    expected = pd.concat(expected, ignore_index=True)
+
+    assert len(result) == 3 * (40 - 14)
+    pd.testing.assert_frame_equal(result[expected.columns], expected, check_dtype=False)
+
+
+def test_preprocess_keeps_lag_only_features_by_default(tmp_path):
+    """Rolling stats are opt-in; by default only the first 7 days per item are dropped"""
+    data_path = tmp_path / "sales.csv"
+    pd.DataFrame({"date": pd.date_range("2024-01-01", periods=40), "item": "dal", "quantity": range(40)}) \
+        .to_csv(data_path, index=False)
+
+    default = DataPreprocessor(str(data_path)).preprocess()
+    assert len(default) == 40 - 7
+    assert not any(column.startswith("rolling_") for column in default.columns)
+    assert len(DataPreprocessor(str(data_path)).preprocess(rolling_windows=(28,))) == 40 - 28
@@ -0,0 +1,78 @@
+import os
+import sys
+import types
+
+import cv2
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+import yaml
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.inventory_tracking.inventory_tracking import InventoryTracker
+
+
+class FakeYOLO:
+    """Returns one Apple box per image, plus an Egg on every other image."""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict(self, images, conf=0.25, imgsz=640, verbose=False):
+        self.batches.append(len(images))
+        results = []
+        for i, _ in enumerate(images):
+            rows = [[10, 10, 50, 50, 0.9, 0]]
+            if (sum(self.batches) - len(images) + i) % 2 == 0:
+                rows.append([60, 60, 90, 90, 0.8, 3])
+            data = torch.tensor(rows, dtype=torch.float32)
+            results.append(types.SimpleNamespace(boxes=types.SimpleNamespace(data=data)))
+        return results
+
+
+@pytest.fixture
+def tracker(tmp_path):
+    config = {
+        'model': {'inventory_model_path': 'unused.pt'},
+        'inventory_tracking': {
+            'output_dir': str(tmp_path / "annotated"),
+            'csv_output_path': str(tmp_path / "predicted_items.csv"),
+            'batch_size': 3,
+            'write_workers': 2
+        }
+    }
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+    return InventoryTracker(str(config_path), model=FakeYOLO())
+
+
+def test_bulk_directory_mode(tracker, tmp_path):
+    """A directory of images is detected in batches and summarised in one CSV"""
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    for i in range(7):
+        cv2.imwrite(str(image_dir / f"shelf_{i}.jpg"), np.full((100, 120, 3), 40 * i, dtype=np.uint8))
+    (image_dir / "notes.txt").write_text("not an image")
+
+    results = tracker.detect_directory(str(image_dir))
+
+    assert tracker.model.batches == [3, 3, 1]
+    assert len(results) == 7
+    assert results[0] == {"shelf_0.jpg": {"Apple": 1, "Egg": 1}}
+    assert results[1] == {"shelf_1.jpg": {"Apple": 1}}
+
+    counts = pd.read_csv(tracker.csv_output_path)
+    assert len(counts) == 11
+    assert counts.groupby("item")["count"].sum().to_dict() == {"Apple": 7, "Egg": 4}
+    assert sorted(os.listdir(tracker.output_dir)) == [f"detected_shelf_{i}.jpg" for i in range(7)]
+
+
+def test_draw_predictions_draws_once(tracker):
+    """Annotations are drawn into a single BGR copy, leaving the input untouched"""
+    image = np.zeros((100, 100, 3), dtype=np.uint8)
+    annotated = tracker.draw_predictions(image, np.array([[10, 10, 50, 50, 0.9, 0]]))
+    assert annotated is not image
+    assert image.sum() == 0 and annotated.sum() > 0
@@ -0,0 +1,181 @@
+import os
+import sys
+import time
+import threading
+import pytest
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.jobs.store import JobStore, JobCancelled
+from src.jobs.worker import JobWorker
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"), retention_hours=1, stale_after_seconds=60)
+
+
+def test_worker_runs_job_with_progress(store):
+    """A worker claims a queued job, reports progress and stores the result"""
+    seen_progress = []
+
+    def handler(job, context, registry, config_path):
+        for frame in range(1, 5):
+            context.report(25 * frame, force=True)
+            seen_progress.append(store.get(job["id"])["progress"])
+        return {"count": job["payload"]["count"] * 2}
+
+    job_id = store.submit("double", {"count": 21})
+    worker = JobWorker(store, {"double": handler})
+
+    assert worker.run_once() is True
+    assert worker.run_once() is False
+
+    job = store.get(job_id)
+    assert job["status"] == "completed"
+    assert job["result"] == {"count": 42}
+    assert seen_progress == [25, 50, 75, 100]
+
+
+def test_running_job_can_be_cancelled(store):
+    """Cancellation requested while a job runs stops it at the next progress report"""
+    def handler(job, context, registry, config_path):
+        store.request_cancel(job["id"])
+        context.report(10, force=True)
+        raise AssertionError("handler should have been cancelled")
+
+    job_id = store.submit("slow", {})
+    JobWorker(store, {"slow": handler}).run_once()
+
+    assert store.get(job_id)["status"] == "cancelled"
+
+
+def test_failed_job_records_error(store):
+    def handler(job, context, registry, config_path):
+        raise ValueError("bad video")
+
+    job_id = store.submit("broken", {})
+    JobWorker(store, {"broken": handler}).run_once()
+
+    job = store.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "bad video"
+
+
+def test_stale_jobs_are_requeued_after_restart(tmp_path):
+    """Jobs left processing by a dead worker are picked up again by a new store/worker"""
+    db_path = str(tmp_path / "jobs.sqlite3")
+    store = JobStore(db_path, stale_after_seconds=0)
+    job_id = store.submit("video", {})
+    assert store.claim("dead-worker")["id"] == job_id
+
+    # Simulate a restart: a fresh store on the same database
+    time.sleep(0.01)
+    restarted = JobStore(db_path, stale_after_seconds=0)
+    assert restarted.requeue_stale() == 1
+    job = restarted.claim("new-worker")
+    assert job["id"] == job_id
+    assert job["attempts"] == 2
+
+
+def test_expired_jobs_are_purged_with_files(store, tmp_path):
+    output_file = tmp_path / "output.mp4"
+    output_file.write_text("video")
+
+    job_id = store.submit("video", {"cleanup_paths": [str(output_file)]})
+    store.claim("test-worker")
+    store.complete(job_id, "test-worker", {"ok": True})
+    store.retention_seconds = 0
+    time.sleep(0.01)
+
+    worker = JobWorker(store, {}, purge_interval=0)
+    worker.purge_if_due()
+
+    assert store.get(job_id) is None
+    assert not output_file.exists()
+
+
+def test_running_worker_requeues_stale_jobs_and_gives_up(tmp_path):
+    """A live worker picks up jobs a crashed worker left behind, and fails jobs that keep crashing"""
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), stale_after_seconds=0, max_attempts=2)
+    crashing_id = store.submit("crashes", {})
+    assert store.claim("crashed-worker")["attempts"] == 1
+    time.sleep(0.01)
+    assert store.requeue_stale() == 1
+    assert store.claim("crashed-again")["attempts"] == 2
+    time.sleep(0.01)
+    assert store.requeue_stale() == 0
+    assert store.get(crashing_id)["status"] == "failed"
+
+    orphan_id = store.submit("double", {"count": 2})
+    store.claim("crashed-worker")
+    worker = JobWorker(store, {"double": lambda job, *args: {"count": 4}},
+                       poll_interval=0.01, requeue_interval=0).start()
+    try:
+        deadline = time.time() + 5
+        while store.get(orphan_id)["status"] != "completed" and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        worker.stop(timeout=5)
+    assert store.get(orphan_id)["result"] == {"count": 4}
+
+
+def test_stale_job_with_cancel_request_is_cancelled(tmp_path):
+    """A stale job whose cancellation was requested is cancelled, not left processing or retried"""
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), stale_after_seconds=0, max_attempts=3)
+    job_id = store.submit("video", {})
+    store.claim("dead-worker")
+    store.request_cancel(job_id)
+    time.sleep(0.01)
+
+    assert store.requeue_stale() == 0
+    job = store.get(job_id)
+    assert job["status"] == "cancelled"
+    assert job["finished_at"] is not None
+    assert store.claim("new-worker") is None
+
+
+def test_stale_worker_cannot_overwrite_newer_outcome(tmp_path):
+    """Once a job is requeued, the worker that lost it can no longer complete, fail or cancel it"""
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), stale_after_seconds=0)
+    job_id = store.submit("video", {})
+    store.claim("slow-worker")
+    time.sleep(0.01)
+    store.requeue_stale()
+    store.claim("new-worker")
+
+    assert store.complete(job_id, "slow-worker", {"stale": True}) is False
+    assert store.fail(job_id, "slow-worker", "late error") is False
+    assert store.mark_cancelled(job_id, "slow-worker") is False
+    assert store.get(job_id)["status"] == "processing"
+
+    assert store.complete(job_id, "new-worker", {"ok": True}) is True
+    assert store.fail(job_id, "new-worker", "too late") is False
+    job = store.get(job_id)
+    assert job["status"] == "completed" and job["result"] == {"ok": True}
+
+
+def test_submit_unique_shares_one_job_across_threads(tmp_path):
+    """Concurrent submit_unique calls queue exactly one job; a new one is queued once it finishes"""
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    barrier = threading.Barrier(8)
+    job_ids = []
+
+    def submit():
+        barrier.wait()
+        job_ids.append(store.submit_unique("refresh", {"reason": "test"}))
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(job_ids)) == 1
+    assert len(store.list_jobs(kind="refresh")) == 1
+
+    # Still shared while running, but not once cancellation was requested
+    store.claim("worker")
+    assert store.submit_unique("refresh") == job_ids[0]
+    store.request_cancel(job_ids[0])
+    assert store.submit_unique("refresh") != job_ids[0]
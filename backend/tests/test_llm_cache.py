@@ -0,0 +1,101 @@
+import os
+import sys
+import types
+from unittest.mock import patch, AsyncMock
+
+import pandas as pd
+import pytest
+import yaml
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(str(tmp_path / "cache.sqlite3"), ttl_hours=1, max_entries=3)
+
+
+def test_cache_hits_misses_and_key_normalization(cache):
+    """Keys depend on prompt, model and payload; counters track lookups"""
+    key = LLMResponseCache.make_key("prompt", "model-a", [{"a": 1, "b": 2}])
+    assert key == LLMResponseCache.make_key("prompt", "model-a", [{"b": 2, "a": 1}])
+    assert key != LLMResponseCache.make_key("prompt", "model-b", [{"a": 1, "b": 2}])
+    assert key != LLMResponseCache.make_key("other prompt", "model-a", [{"a": 1, "b": 2}])
+
+    assert cache.get(key) is None
+    cache.set(key, "response")
+    assert cache.get(key) == "response"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_cache_ttl_and_lru_eviction(cache):
+    """Expired entries miss, and the least recently used entry is evicted first"""
+    for name in ("a", "b", "c"):
+        cache.set(name, name.upper())
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("d", "D")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.stats()["evictions"] == 1
+
+    with patch("src.llm_cache.time.time", return_value=10**10):
+        assert cache.get("a") is None
+
+
+def test_predict_waste_reuses_cached_responses(tmp_path):
+    """A second run over unchanged inventory rows does not call the LLM"""
+    from src.demand_waste import waste_predictor
+
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump({
+        "llm_cache": {"enabled": True, "db_path": str(tmp_path / "llm_cache.sqlite3")},
+        "llm": {"provider": "stub"}
+    }))
+    df = pd.DataFrame([
+        {"ingredient": "tomato", "stock_kg": 5, "days_since_delivery": 12, "shelf_life_days": 10,
+         "storage_temp_c": 4, "weekly_usage_kg": 7},
+        {"ingredient": "eggplant", "stock_kg": 2, "days_since_delivery": 3, "shelf_life_days": 10,
+         "storage_temp_c": 6, "weekly_usage_kg": 3},
+    ])
+    content = "{'analyses': [{'recommended_actions': ['Use soon']}, {'recommended_actions': ['Hold']}]}"
+
+    with patch.object(waste_predictor, "invoke_llm_async",
+                      AsyncMock(return_value=types.SimpleNamespace(content=content))) as invoke:
+        first = waste_predictor.predict_waste(df.copy(), str(config_path))
+        second = waste_predictor.predict_waste(df.copy(), str(config_path))
+
+    assert invoke.call_count == 1
+    assert first.equals(second)
+    assert second["recommended_actions"].tolist() == [["Use soon"], ["Hold"]]
+    stats = waste_predictor.get_response_cache(str(config_path)).stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_stub_answers_are_not_served_to_groq(tmp_path, monkeypatch):
+    """Responses cached while running on the stub provider are misses for the real model"""
+    from src.demand_waste import waste_predictor
+
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    monkeypatch.setenv("GROQ_API_KEY", "dummy")
+    cache_settings = {"enabled": True, "db_path": str(tmp_path / "llm_cache.sqlite3")}
+    config_paths = {}
+    for provider in ("stub", "groq"):
+        config_paths[provider] = tmp_path / f"{provider}.yaml"
+        config_paths[provider].write_text(yaml.safe_dump({"llm_cache": cache_settings,
+                                                          "llm": {"provider": provider, "stub": {"latency_ms": 0}}}))
+    df = pd.DataFrame([{"ingredient": "tomato", "stock_kg": 5, "days_since_delivery": 12, "shelf_life_days": 10,
+                        "storage_temp_c": 4, "weekly_usage_kg": 7}])
+
+    assert waste_predictor.get_llm(yaml.safe_load(config_paths["stub"].read_text())).model_name.startswith("stub:")
+    waste_predictor.predict_waste(df.copy(), str(config_paths["stub"]))
+    content = "{'analyses': [{'recommended_actions': ['From groq']}]}"
+    with patch.object(waste_predictor, "invoke_llm_async",
+                      AsyncMock(return_value=types.SimpleNamespace(content=content))) as invoke:
+        result = waste_predictor.predict_waste(df.copy(), str(config_paths["groq"]))
+
+    assert invoke.call_count == 1
+    assert result["recommended_actions"].tolist() == [["From groq"]]
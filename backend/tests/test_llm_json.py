@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm_json import parse_llm_json, LLMJSONError
+from src.demand_waste.waste_predictor import validate_response, extract_recommended_actions, BatchMismatchError
+
+
+@pytest.mark.parametrize("text", [
+    '{"analyses": [{"recommended_actions": ["Use in tomorrow\'s specials", "Reduce next order"]}]}',
+    "{'analyses': [{'recommended_actions': ['Use in tomorrow's specials', 'Reduce next order']}]}",
+    "{'analyses': [{'recommended_actions': ['Use in tomorrow\\'s specials', 'Reduce next order',],},],}",
+    "```json\n{analyses: [{recommended_actions: [\"Use in tomorrow's specials\" \"Reduce next order\"]}]}\n```",
+    "Sure! Here is the analysis:\n\"{'analyses': [{'recommended_actions': ['Use in tomorrow's specials', 'Reduce next order']}]}\"",
+])
+def test_repairs_common_llm_mistakes(text):
+    assert parse_llm_json(text) == {"analyses": [{"recommended_actions": ["Use in tomorrow's specials", "Reduce next order"]}]}
+
+
+def test_missing_commas_between_objects_and_literals():
+    text = "{'analyses': [{'recommended_actions': []} {'recommended_actions': ['a'], 'urgent': True, 'score': -1.5e1}]}"
+    assert parse_llm_json(text)["analyses"] == [
+        {"recommended_actions": []}, {"recommended_actions": ["a"], "urgent": True, "score": -15.0}
+    ]
+
+
+def test_reply_wrapped_in_double_quotes():
+    """A whole reply quoted once decodes to a string with json.loads; its contents are parsed"""
+    text = "\"{'analyses': [{'recommended_actions': ['Use in tomorrow's specials']}]}\""
+    assert parse_llm_json(text) == {"analyses": [{"recommended_actions": ["Use in tomorrow's specials"]}]}
+    assert validate_response(text)[0]
+    with pytest.raises(LLMJSONError):
+        parse_llm_json('"just a sentence"')
+
+
+@pytest.mark.parametrize("text", ["no json here", '{"analyses": [{"recommended', "{'analyses' [1]}"])
+def test_unrecoverable_text_raises(text):
+    with pytest.raises(LLMJSONError):
+        parse_llm_json(text)
+
+
+def test_validate_response_checks_schema():
+    assert validate_response("{'analyses': [{'recommended_actions': ['a',]}]}") == \
+        (True, '{"analyses": [{"recommended_actions": ["a"]}]}')
+    is_valid, error = validate_response("{'analyses': [{'actions': ['a']}]}")
+    assert not is_valid and "recommended_actions" in error
+
+    with pytest.raises(BatchMismatchError):
+        extract_recommended_actions("{'analyses': [{'recommended_actions': 'a'}]}", range(1), strict=True)
+    assert extract_recommended_actions("{'analyses': [{'recommended_actions': ['a']} {'recommended_actions': ['b']}]}",
+                                       ["x", "y"]) == {"x": ["a"], "y": ["b"]}
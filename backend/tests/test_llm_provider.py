@@ -0,0 +1,110 @@
+import os
+import sys
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+import yaml
+from PIL import Image
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm_provider import StubLLM, StubLLMError, get_chat_model, get_chat_client
+from src.llm_runner import is_rate_limit_error
+
+
+def test_provider_selection(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    with pytest.raises(ValueError):
+        get_chat_model({"llm": {"provider": "groq"}})
+    with pytest.raises(ValueError):
+        get_chat_client({"llm": {"provider": "unknown"}})
+
+    stub = get_chat_model({"llm": {"provider": "stub"}})
+    assert isinstance(stub, StubLLM)
+    assert get_chat_model({"llm": {"provider": "stub"}}) is stub
+
+    monkeypatch.setenv("LLM_PROVIDER", "stub")
+    assert isinstance(get_chat_client({}), StubLLM)
+
+
+def test_stub_is_deterministic_and_fails_on_demand():
+    """Answers depend only on the prompt; failures follow the configured rates"""
+    messages = [("system", "Return JSON with 'analyses'"), ("human", "Ingredient: a\nIngredient: b")]
+    first = StubLLM(latency_ms=0, latency_jitter_ms=0).invoke(messages)
+    second = StubLLM(latency_ms=0, latency_jitter_ms=0, seed=7).invoke(messages)
+    assert first.content == second.content
+    assert len(json.loads(first.content)["analyses"]) == 2
+    assert first.usage_metadata["output_tokens"] > 0
+
+    with pytest.raises(StubLLMError) as error:
+        StubLLM(latency_ms=0, rate_limit_rate=1.0).invoke(messages)
+    assert is_rate_limit_error(error.value)
+    with pytest.raises(StubLLMError) as error:
+        StubLLM(latency_ms=0, error_rate=1.0).chat.completions.create(model="m", messages=[])
+    assert not is_rate_limit_error(error.value)
+
+
+@pytest.fixture
+def stub_config(tmp_path):
+    inventory_path = tmp_path / "inventory.csv"
+    pd.DataFrame([
+        {"ingredient": "tomato", "stock_kg": 12.0, "shelf_life_days": 7, "weekly_usage_kg": 5.0, "delivery_date": "2024-01-01"},
+        {"ingredient": "paneer", "stock_kg": 1.0, "shelf_life_days": 5, "weekly_usage_kg": 4.0, "delivery_date": "2024-01-01"},
+    ]).to_csv(inventory_path, index=False)
+    Image.fromarray(np.full((32, 32, 3), 120, dtype=np.uint8)).save(tmp_path / "banana.jpg")
+
+    config = {
+        "data": {
+            "inventory_path": str(inventory_path),
+            "output_spoilage_path": str(tmp_path / "spoilage.csv"),
+            "log_path": str(tmp_path / "classification.log"),
+            "output_waste_classification_path": str(tmp_path / "waste.csv"),
+        },
+        "logging": {"file": str(tmp_path / "spoilage.log")},
+        "llm": {"provider": "stub", "stub": {"latency_ms": 0, "latency_jitter_ms": 0}}
+    }
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump(config))
+    return str(config_path), tmp_path
+
+
+def test_llm_modules_run_offline_with_stub(stub_config):
+    """Recipe generation, spoilage detection and waste classification work against the stub"""
+    from src.menu_optimization.recipe_generator import RecipeGenerator
+    from src.food_spoilage_detection.food_spoilage_detection import FoodSpoilageDetector
+    from src.vision_analyis.food_waste_classification import FoodWasteClassifier
+
+    config_path, tmp_path = stub_config
+    recipes = RecipeGenerator(config_path).generate_recipes()
+    assert [recipe["dish_name"] for recipe in recipes][0] == "Tomato Masala"
+
+    line = FoodSpoilageDetector(config_path).detect_spoilage(str(tmp_path / "banana.jpg"))
+    assert '"banana.jpg"' in line and line.endswith('"success"')
+    assert pd.read_csv(tmp_path / "spoilage.csv")["status"].tolist() == ["success"]
+
+    result = json.loads(FoodWasteClassifier(config_path).detect_food_waste(str(tmp_path / "banana.jpg")))
+    assert result["image_id"] == "banana.jpg" and result["contains_food"] is True
+
+
+def test_spoilage_detector_takes_llm_settings_from_the_main_config(stub_config, tmp_path, monkeypatch):
+    """A spoilage config without an `llm` section uses the provider passed in by the registry"""
+    from src.food_spoilage_detection.food_spoilage_detection import FoodSpoilageDetector
+    from src.model_registry import build_default_registry
+
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    config_path, _ = stub_config
+    spoilage_config = yaml.safe_load(open(config_path))
+    del spoilage_config["llm"]
+    spoilage_path = tmp_path / "spoilage_config.yaml"
+    spoilage_path.write_text(yaml.safe_dump(spoilage_config))
+
+    with pytest.raises(ValueError, match="GROQ_API_KEY"):
+        FoodSpoilageDetector(str(spoilage_path))
+    detector = FoodSpoilageDetector(str(spoilage_path), llm_config={"provider": "stub"})
+    assert isinstance(detector.client, StubLLM)
+    assert isinstance(build_default_registry(config_path).get("spoilage_detector").client, StubLLM)
@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+import asyncio
+
+import pytest
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm_runner import AsyncLLMRunner, TokenBucket, is_rate_limit_error
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+def test_token_bucket_paces_requests():
+    """Once the burst capacity is used up, acquisitions follow the refill rate"""
+    async def run():
+        bucket = TokenBucket(rate_per_minute=1200, capacity=2)  # 20 per second
+        start = time.monotonic()
+        for _ in range(6):
+            await bucket.acquire(1)
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(run())
+    assert 0.15 < elapsed < 0.6
+
+
+def test_runner_keeps_order_and_limits_concurrency():
+    """Results come back in task order and never exceed max_concurrency in flight"""
+    runner = AsyncLLMRunner(requests_per_minute=60000, tokens_per_minute=10**7, max_concurrency=3)
+    state = {"in_flight": 0, "peak": 0}
+
+    def make_task(i):
+        async def task(r):
+            async def invoke():
+                state["in_flight"] += 1
+                state["peak"] = max(state["peak"], state["in_flight"])
+                await asyncio.sleep(0.01 * (5 - i % 5))
+                state["in_flight"] -= 1
+                return i
+            return await r.call(invoke, tokens=10)
+        return task
+
+    assert runner.run([make_task(i) for i in range(12)]) == list(range(12))
+    assert state["peak"] == 3
+    assert runner.stats["calls"] == 12
+
+
+def test_runner_backs_off_on_rate_limits():
+    """A 429 halves concurrency and the call is retried after backing off"""
+    runner = AsyncLLMRunner(requests_per_minute=60000, tokens_per_minute=10**7, max_concurrency=4,
+                            backoff_seconds=0.01)
+    attempts = {}
+
+    def make_task(i):
+        async def task(r):
+            async def invoke():
+                attempts[i] = attempts.get(i, 0) + 1
+                if attempts[i] == 1 and i % 2 == 0:
+                    raise RateLimitError("Error code: 429 - rate limit exceeded")
+                return i * 10
+            return await r.call(invoke, tokens=1)
+        return task
+
+    assert runner.run([make_task(i) for i in range(6)]) == [0, 10, 20, 30, 40, 50]
+    assert runner.stats["rate_limited"] == 3
+    assert runner.stats["min_concurrency"] < 4
+
+
+def test_runner_gives_up_after_max_retries():
+    runner = AsyncLLMRunner(max_retries=2, backoff_seconds=0.001)
+
+    async def task(r):
+        async def invoke():
+            raise ValueError("boom")
+        return await r.call(invoke, tokens=1)
+
+    with pytest.raises(ValueError):
+        runner.run([task])
+    assert runner.stats["calls"] == 3 and runner.stats["errors"] == 1
+    assert is_rate_limit_error(RateLimitError()) and not is_rate_limit_error(ValueError("boom"))
+
+
+def test_only_successful_calls_grow_concurrency():
+    """Timeouts and 5xx errors never raise the concurrency limit; successes do"""
+    runner = AsyncLLMRunner(max_concurrency=4)
+
+    async def run():
+        runner._start()
+        runner._limit = 1
+        limits = []
+        for outcome in ["error"] * 5 + ["success", "error", "success", "success"]:
+            runner._in_flight += 1
+            await runner._release_slot(outcome)
+            limits.append(runner._limit)
+        return limits
+
+    assert asyncio.run(run()) == [1, 1, 1, 1, 1, 2, 2, 2, 3]
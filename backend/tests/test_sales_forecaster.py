@@ -0,0 +1,252 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import yaml
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.smart_kitchen.sales_forecaster_prophet import SalesForecaster
+
+
+def make_sales(items, days=120, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=days)
+    return pd.concat([
+        pd.DataFrame({"date": dates, "item": f"dish_{i}",
+                      "quantity": rng.poisson(10 + 5 * i, days) + 3 * (dates.dayofweek >= 5)})
+        for i in range(items)
+    ], ignore_index=True)
+
+
+def test_parallel_training_matches_serial(tmp_path):
+    """Models fitted in the process pool are identical to the serial ones"""
+    data = make_sales(3)
+    forecasts = {}
+    for workers in (0, 2):
+        model_dir = tmp_path / f"models_{workers}"
+        config_path = tmp_path / f"config_{workers}.yaml"
+        config_path.write_text(yaml.safe_dump({
+            "model": {"path": str(model_dir)},
+            "prophet": {"yearly_seasonality": False, "weekly_seasonality": True, "daily_seasonality": False}
+        }))
+        forecaster = SalesForecaster(str(config_path))
+        forecaster.train(data, workers=workers)
+        assert list(forecaster.models) == ["dish_0", "dish_1", "dish_2"]
+        forecasts[workers] = forecaster.predict(data[data["date"] >= "2024-04-01"])
+
+    assert sorted(os.listdir(tmp_path / "models_0")) == sorted(os.listdir(tmp_path / "models_2"))
+    for name in os.listdir(tmp_path / "models_0"):
+        assert (tmp_path / "models_0" / name).read_text() == (tmp_path / "models_2" / name).read_text()
+    pd.testing.assert_frame_equal(forecasts[0], forecasts[2])
+
+
+def test_refresh_publishes_versioned_snapshot(tmp_path):
+    """A refresh retrains, evaluates and stores accuracy and predictions with a version stamp"""
+    from src.pipelines import refresh_sales_forecast
+    from src.smart_kitchen.forecast_store import ForecastStore, data_fingerprint
+
+    data_path = tmp_path / "sales.csv"
+    sales = make_sales(2, days=120)
+    sales.to_csv(data_path, index=False)
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump({
+        "data": {"raw_path": str(data_path)},
+        "model": {"path": str(tmp_path / "models")},
+        "prophet": {"yearly_seasonality": False, "weekly_seasonality": True, "daily_seasonality": False},
+        "forecast_serving": {"store_path": str(tmp_path / "forecast.json"), "days_ahead": 3,
+                             "history_path": str(tmp_path / "history.csv")}
+    }))
+
+    snapshot = refresh_sales_forecast(str(config_path))
+    store = ForecastStore(str(tmp_path / "forecast.json"))
+    assert store.get()["version"] == snapshot["version"]
+    assert len(store.get()["future_predictions"]) == 2 * 3
+    assert store.get()["data_fingerprint"] == data_fingerprint(str(data_path))
+    assert store.refresh_reason(str(data_path)) is None
+    assert store.refresh_reason(str(data_path), max_age_seconds=1e-9) == "expired"
+
+    # An upload that changes nothing keeps every model and reports accuracy on the same held-out days
+    from src.pipelines import update_sales_forecast
+    unchanged = tmp_path / "unchanged.csv"
+    sales.tail(3).to_csv(unchanged, index=False)
+    update = update_sales_forecast(str(config_path), str(unchanged))
+    assert update["update"]["items_refit"] == 0
+    assert update["accuracy"] == snapshot["accuracy"]
+
+
+def test_forecast_writes_are_serialized(tmp_path):
+    """The store's write lock is exclusive, so refreshes and uploads never rewrite models together"""
+    import threading
+    from src.smart_kitchen.forecast_store import ForecastStore
+
+    store = ForecastStore(str(tmp_path / "forecast.json"))
+    acquired = threading.Event()
+
+    def writer():
+        with store.write_lock():
+            acquired.set()
+
+    with store.write_lock():
+        thread = threading.Thread(target=writer)
+        thread.start()
+        assert not acquired.wait(0.2)
+    assert acquired.wait(5)
+    thread.join()
+
+
+def test_incremental_upload_refits_only_changed_items(tmp_path):
+    """New rows for one item refit (warm-started) just that item and extend the stored history"""
+    from src.pipelines import update_sales_forecast, merge_sales_history
+
+    history_path = tmp_path / "history.csv"
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump({
+        "data": {"raw_path": str(tmp_path / "sales.csv")},
+        "model": {"path": str(tmp_path / "models")},
+        "prophet": {"yearly_seasonality": False, "weekly_seasonality": True, "daily_seasonality": False},
+        "forecast_serving": {"store_path": str(tmp_path / "forecast.json"), "days_ahead": 3,
+                             "history_path": str(history_path)}
+    }))
+    sales = make_sales(3, days=100)
+    first_upload = tmp_path / "first.csv"
+    sales[sales["date"] < "2024-04-01"].to_csv(first_upload, index=False)
+    assert update_sales_forecast(str(config_path), str(first_upload))["update"]["items_refit"] == 3
+    kept_models = {name: (tmp_path / "models" / name).read_text() for name in ["dish_0_model.json", "dish_2_model.json"]}
+
+    second_upload = tmp_path / "second.csv"
+    new_rows = sales[(sales["date"] >= "2024-04-01") & (sales["item"] == "dish_1")]
+    new_rows.to_csv(second_upload, index=False)
+    snapshot = update_sales_forecast(str(config_path), str(second_upload))
+
+    update = snapshot["update"]
+    assert (update["items_refit"], update["warm_started"], update["rows_added"]) == (1, 1, len(new_rows))
+    assert len(pd.read_csv(history_path)) == (sales["date"] < "2024-04-01").sum() + len(new_rows)
+    assert all((tmp_path / "models" / name).read_text() == text for name, text in kept_models.items())
+    assert len(snapshot["future_predictions"]) == 3 * 3
+
+    # A corrected quantity counts as a change for its item only
+    history = pd.read_csv(history_path, parse_dates=["date"])
+    correction = history[history["item"] == "dish_2"].tail(1).assign(quantity=999)
+    _, changed, added, updated = merge_sales_history(history, correction)
+    assert (changed, added, updated) == (["dish_2"], 0, 1)
+    assert not (tmp_path / "sales.csv").exists()
+
+
+def test_upload_only_retrain_marks_snapshot_stale(tmp_path):
+    """Retraining on an upload alone leaves the sales file and history alone and flags the snapshot for a rebuild"""
+    from src.pipelines import refresh_sales_forecast, run_sales_forecast_upload
+    from src.smart_kitchen.forecast_store import ForecastStore
+
+    data_path = tmp_path / "sales.csv"
+    sales = make_sales(2, days=60)
+    sales.to_csv(data_path, index=False)
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump({
+        "data": {"raw_path": str(data_path)},
+        "model": {"path": str(tmp_path / "models")},
+        "prophet": {"yearly_seasonality": False, "weekly_seasonality": True, "daily_seasonality": False},
+        "forecast_serving": {"store_path": str(tmp_path / "forecast.json"), "days_ahead": 3,
+                             "history_path": str(tmp_path / "history.csv")}
+    }))
+    snapshot = refresh_sales_forecast(str(config_path))
+    sales_text, history_text = data_path.read_text(), (tmp_path / "history.csv").read_text()
+
+    upload = tmp_path / "upload.csv"
+    sales[sales["item"] == "dish_0"].to_csv(upload, index=False)
+    run_sales_forecast_upload(str(config_path), str(upload), 3)
+    store = ForecastStore(str(tmp_path / "forecast.json"))
+    assert store.get()["version"] == snapshot["version"]
+    assert store.refresh_reason(str(data_path)) == "models_replaced"
+    assert (data_path.read_text(), (tmp_path / "history.csv").read_text()) == (sales_text, history_text)
+
+    refresh_sales_forecast(str(config_path))
+    assert store.refresh_reason(str(data_path)) is None
+
+
+def test_model_cache_loads_lazily_and_invalidates(tmp_path):
+    """Only requested items are deserialized; rewritten files reload; the byte cap evicts LRU"""
+    import json
+    import time
+    from src.smart_kitchen.model_cache import ModelFileCache, ItemModels
+
+    loads = []
+    cache = ModelFileCache(lambda text: loads.append(text) or json.loads(text), max_bytes=25)
+    models = ItemModels(str(tmp_path), cache)
+    for item in ["a", "b", "c"]:
+        (tmp_path / f"{item}_model.json").write_text(json.dumps({"item": item}))  # 13 bytes each
+
+    assert list(models) == ["a", "b", "c"] and "b" in models and "z" not in models
+    assert loads == []
+    assert models["a"] == {"item": "a"} and models["a"] == {"item": "a"}
+    assert len(loads) == 1 and (cache.hits, cache.misses) == (1, 1)
+
+    time.sleep(0.01)
+    (tmp_path / "a_model.json").write_text(json.dumps({"item": "A"}))
+    assert models["a"] == {"item": "A"} and cache.invalidations == 1
+
+    models["b"], models["c"]
+    assert cache.evictions == 2 and cache.stats()["entries"] == 1
+    assert cache.stats()["cold_load_ms"] is not None and cache.stats()["warm_load_ms"] is not None
+
+
+def forecast_config(tmp_path, data_path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump({
+        "data": {"raw_path": str(data_path)},
+        "model": {"path": str(tmp_path / "models")},
+        "prophet": {"yearly_seasonality": False, "weekly_seasonality": True, "daily_seasonality": False},
+        "forecast_serving": {"store_path": str(tmp_path / "forecast.json"), "days_ahead": 3,
+                             "history_path": str(tmp_path / "history.csv")}
+    }))
+    return str(config_path)
+
+
+def test_data_change_refresh_refits_appended_items_and_stops_between_stages(tmp_path):
+    """A refresh job for appended rows refits only their item; a cancel stops it before publishing"""
+    from src.jobs.handlers import JOB_HANDLERS
+    from src.jobs.store import JobStore
+    from src.jobs.worker import JobWorker
+    from src.smart_kitchen.forecast_store import ForecastStore
+
+    data_path = tmp_path / "sales.csv"
+    sales = make_sales(3, days=80)
+    sales[sales["date"] < "2024-03-15"].to_csv(data_path, index=False)
+    config_path = forecast_config(tmp_path, data_path)
+    jobs = JobStore(str(tmp_path / "jobs.sqlite3"))
+    worker = JobWorker(jobs, JOB_HANDLERS, config_path=config_path)
+
+    job_id = jobs.submit("sales_forecast_refresh", {"reason": "missing"})
+    worker.run_once()
+    assert jobs.get(job_id)["result"]["items_refit"] is None
+    kept_model = (tmp_path / "models" / "dish_0_model.json").read_text()
+
+    # Rows appended for one item only
+    appended = sales[(sales["date"] >= "2024-03-15") & (sales["item"] == "dish_1")]
+    pd.concat([sales[sales["date"] < "2024-03-15"], appended]).to_csv(data_path, index=False)
+    job_id = jobs.submit("sales_forecast_refresh", {"reason": "data_changed"})
+    worker.run_once()
+    assert jobs.get(job_id)["result"]["items_refit"] == 1
+    assert (tmp_path / "models" / "dish_0_model.json").read_text() == kept_model
+
+    # Cancelled once training is done: nothing is published
+    store = ForecastStore(str(tmp_path / "forecast.json"))
+    version = store.get()["version"]
+    refresh_handler = JOB_HANDLERS["sales_forecast_refresh"]
+
+    def cancel_after_training(job, context, registry, config_path):
+        report = context.report
+
+        def report_and_cancel(progress, message=None, **kwargs):
+            if message == "Evaluating on held-out days":
+                jobs.request_cancel(job["id"])
+            return report(progress, message=message, **kwargs)
+        context.report = report_and_cancel
+        return refresh_handler(job, context, registry, config_path)
+
+    job_id = jobs.submit("sales_forecast_refresh", {"reason": "manual"})
+    JobWorker(jobs, {"sales_forecast_refresh": cancel_after_training}, config_path=config_path).run_once()
+    assert jobs.get(job_id)["status"] == "cancelled"
+    assert store.get()["version"] == version
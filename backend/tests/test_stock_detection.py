@@ -0,0 +1,249 @@
+import os
+import sys
+import types
+import threading
+
+import cv2
+import numpy as np
+import pytest
+import torch
+import pandas as pd
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.inventory_tracking.stock_detection import StockDetector
+
+
+class FakeYOLO:
+    """Stands in for an ultralytics model: deterministic boxes derived from frame brightness."""
+
+    names = {0: "Apple", 1: "Banana", 2: "Egg"}
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, frames, conf=0.25, verbose=False):
+        self.calls.append(len(frames))
+        results = []
+        for frame in frames:
+            level = float(frame.mean())
+            offset = level % 50
+            data = torch.tensor([
+                [100 + offset, 100, 200 + offset, 220, 0.9, 0],
+                [300, 300 + offset, 380, 420 + offset, 0.6, 1],
+                [10, 10, 12, 12, 0.8, 2],  # Too small, filtered out
+            ], dtype=torch.float32)
+            results.append(types.SimpleNamespace(boxes=types.SimpleNamespace(data=data)))
+        return results
+
+
+@pytest.fixture
+def video_path(tmp_path):
+    path = str(tmp_path / "clip.mp4")
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), 10, (320, 240))
+    for i in range(23):
+        frame = np.full((240, 320, 3), 30 + 5 * i, dtype=np.uint8)
+        cv2.rectangle(frame, (40, 40), (120, 130), (30, 40, 200), -1)
+        out.write(frame)
+    out.release()
+    return path
+
+
+def run_detector(video_path, tmp_path, batch_size):
+    model = FakeYOLO()
+    detector = StockDetector(model=model)
+    detector.batch_size = batch_size
+    detector.video_path = video_path
+    detector.output_video_path = str(tmp_path / f"out_{batch_size}.mp4")
+    detector.output_csv_count_path = str(tmp_path / f"counts_{batch_size}.csv")
+
+    snapshots = []
+    results = detector.detect_stock(observer=snapshots.append)
+    return model, results, snapshots
+
+
+def test_batched_inference_matches_single_frame(video_path, tmp_path):
+    """Batching frames through the model does not change what is detected"""
+    single_model, single_results, single_snapshots = run_detector(video_path, tmp_path, 1)
+    batch_model, batch_results, batch_snapshots = run_detector(video_path, tmp_path, 8)
+
+    assert single_model.calls == [1] * 23
+    assert batch_model.calls == [8, 8, 7]
+    assert batch_results == single_results
+    assert [s["running_counts"] for s in batch_snapshots] == [s["running_counts"] for s in single_snapshots]
+    assert [s["frame"] for s in batch_snapshots] == [10, 20, 23]
+
+
+def test_filter_detections_drops_small_boxes():
+    """Raw (N, 6) box arrays are mapped to inventory items and filtered"""
+    detector = StockDetector(model=FakeYOLO())
+    frame = np.full((640, 640, 3), (20, 100, 100), dtype=np.uint8)
+    boxes = detector.run_inference([frame])[0]
+
+    assert isinstance(boxes, np.ndarray) and boxes.shape == (3, 6)
+    detections = detector.filter_detections(frame, boxes, 1.0, 1.0)
+    assert [d[4] for d in detections] == ["Apple", "Banana"]
+
+
+@pytest.mark.parametrize("mode", ["stride", "motion"])
+def test_gated_modes_skip_inference_but_keep_counts(tmp_path, mode):
+    """On a static clip, gated modes run YOLO on fewer frames and report the same counts"""
+    path = str(tmp_path / "static.mp4")
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), 10, (320, 240))
+    frame = np.full((240, 320, 3), 120, dtype=np.uint8)
+    for _ in range(40):
+        out.write(frame)
+    out.release()
+
+    counts = {}
+    for detection_mode in ("full", mode):
+        model = FakeYOLO()
+        detector = StockDetector(model=model)
+        detector.detection_mode = detection_mode
+        # Tracks need min_hits inferred frames, so re-infer often enough on this short clip
+        detector.max_skip = 10
+        detector.video_path = path
+        detector.output_video_path = str(tmp_path / f"out_{detection_mode}.mp4")
+        detector.output_csv_count_path = str(tmp_path / f"counts_{detection_mode}.csv")
+        counts[detection_mode] = (dict(detector.detect_stock()), detector.inference_frames)
+
+    assert counts["full"][1] == 40
+    assert counts[mode][1] < 40
+    assert counts[mode][0] == counts["full"][0]
+
+
+def test_pipeline_preserves_frame_order(video_path, tmp_path):
+    """Frames come out of the decode/infer/encode pipeline in their original order"""
+    run_detector(video_path, tmp_path, 4)
+    cap = cv2.VideoCapture(str(tmp_path / "out_4.mp4"))
+    levels = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        levels.append(float(frame[200:, 200:].mean()))
+    cap.release()
+
+    assert len(levels) == 23
+    assert levels == sorted(levels)
+
+
+def test_pipeline_stops_when_callback_raises(video_path, tmp_path):
+    """An error raised by a progress callback stops every pipeline stage"""
+    detector = StockDetector(model=FakeYOLO())
+    detector.batch_size = 2
+    detector.video_path = video_path
+    detector.output_video_path = str(tmp_path / "out.mp4")
+    detector.output_csv_count_path = str(tmp_path / "counts.csv")
+
+    def cancel(frames_done, total_frames):
+        if frames_done == 5:
+            raise KeyboardInterrupt("cancelled")
+
+    with pytest.raises(KeyboardInterrupt):
+        detector.detect_stock(progress_callback=cancel)
+    assert detector.stage_timings["infer"]["items"] == 5
+    assert all(not t.name.startswith("stock-") for t in threading.enumerate())
+
+
+def random_recorded_detections(frames, seed=0):
+    """Frames of raw (N, 6) boxes with mixed classes, some mapped to the same item."""
+    rng = np.random.default_rng(seed)
+    for index in range(frames):
+        frame = rng.integers(0, 256, (360, 480, 3), dtype=np.uint8)
+        if index % 3 == 0:
+            frame[:] = (20, 100, 100)
+        n = rng.integers(0, 40)
+        xy = rng.uniform(-5, 640, (n, 2))
+        wh = rng.uniform(1, 300, (n, 2))
+        boxes = np.concatenate([xy, xy + wh, rng.uniform(0.03, 1, (n, 1)),
+                                rng.integers(0, 5, (n, 1))], axis=1).astype(np.float32)
+        if index == frames // 2:
+            # A far outlier so the spatial check rejects something
+            boxes = np.concatenate([boxes, [[9000, 9000, 9100, 9100, 0.9, 0]]]).astype(np.float32)
+        yield frame, boxes
+
+
+def test_vectorized_filters_match_scalar_filters():
+    """Vectorized filters keep and drop exactly the boxes the per-box filters do"""
+    class Model:
+        names = {0: "Apple", 1: "Banana", 2: "Egg", 3: "Green Apple", 4: "Plate"}
+
+    scalar = StockDetector(model=Model())
+    vectorized = StockDetector(model=Model())
+    kept = 0
+    for frame, boxes in random_recorded_detections(200):
+        expected = scalar.filter_detections_scalar(frame, boxes, 0.75, 0.5625)
+        actual = vectorized.filter_detections(frame, boxes, 0.75, 0.5625)
+        assert [(d[4], d[5]) for d in actual] == [(d[4], d[5]) for d in expected]
+        assert np.array_equal(np.array([d[:4] for d in actual]), np.array([d[:4] for d in expected]))
+        kept += len(actual)
+    assert 0 < kept
+    assert {k: list(v) for k, v in vectorized.class_history.items()} == \
+        {k: list(v) for k, v in scalar.class_history.items()}
+
+
+def test_tracked_counts_and_per_frame_csv(video_path, tmp_path):
+    """With tracking, totals are unique tracks and the per-frame CSV is written"""
+    _, results, snapshots = run_detector(video_path, tmp_path, 8)
+    counts = pd.read_csv(tmp_path / "counts_8.csv")
+
+    assert list(counts.columns) == ["frame", "time_s", "item", "visible_count", "total_count", "track_ids"]
+    assert counts["frame"].max() == 23
+    final = counts[counts["frame"] == 23].set_index("item")["total_count"].to_dict()
+    assert final == results
+    assert counts["track_ids"].notna().all()
+
+
+def test_shared_model_is_locked_per_batch(video_path, tmp_path):
+    """A shared model lock is taken around each inference batch and released between them"""
+    lock = threading.RLock()
+    held = []
+
+    class LockCheckingYOLO(FakeYOLO):
+        def __call__(self, frames, conf=0.25, verbose=False):
+            held.append(lock._is_owned())
+            return super().__call__(frames, conf=conf, verbose=verbose)
+
+    detector = StockDetector(model=LockCheckingYOLO(), model_lock=lock)
+    detector.batch_size = 8
+    detector.video_path = video_path
+    detector.output_video_path = str(tmp_path / "out.mp4")
+    detector.output_csv_count_path = str(tmp_path / "counts.csv")
+    detector.detect_stock()
+
+    assert held and all(held)
+    # Free again once the video is done, so image requests were never blocked for the whole run
+    assert lock.acquire(blocking=False)
+    lock.release()
+
+
+def test_video_jobs_write_their_own_count_csv(video_path, tmp_path):
+    """Each stock video job writes its counts next to its own outputs, not to the shared CSV"""
+    from src.jobs.handlers import JOB_HANDLERS
+    from src.jobs.store import JobStore
+    from src.jobs.worker import JobWorker
+    from src.model_registry import ModelRegistry
+
+    registry = ModelRegistry()
+    registry.register("inventory_yolo", FakeYOLO)
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    job_ids = []
+    for name in ("a", "b"):
+        job_ids.append(store.submit("stock_detection", {
+            "video_path": video_path,
+            "output_path": str(tmp_path / f"output_video_{name}.mp4"),
+            "results_path": str(tmp_path / f"detection_results_{name}.json"),
+        }))
+    worker = JobWorker(store, JOB_HANDLERS, registry=registry, config_path="config/config.yaml")
+    while worker.run_once():
+        pass
+
+    counts_urls = set()
+    for job_id in job_ids:
+        job = store.get(job_id)
+        assert job["status"] == "completed", job["error"]
+        counts_urls.add(job["result"]["counts_url"])
+        assert (tmp_path / f"food_count_{job_id}.csv").exists()
+    assert len(counts_urls) == 2
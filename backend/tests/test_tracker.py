@@ -0,0 +1,69 @@
+import os
+import sys
+
+import numpy as np
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.inventory_tracking.tracker import SortTracker, iou_matrix
+
+
+def moving_box(start_x, frame, speed=4.0, y=100.0, size=60.0):
+    x = start_x + speed * frame
+    return [x, y, x + size, y + size]
+
+
+def test_iou_matrix():
+    """IoU is 1 for identical boxes, 0 for disjoint ones and symmetric"""
+    a = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=float)
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10]], dtype=float)
+    ious = iou_matrix(a, b)
+    assert np.allclose(ious, [[1.0, 1 / 3], [0.0, 0.0]])
+    assert np.allclose(iou_matrix(b, a), ious.T)
+
+
+def test_tracker_keeps_ids_and_counts_items_seen_one_at_a_time():
+    """Three apples that pass through one after another are counted as three"""
+    tracker = SortTracker(num_classes=2, max_age=3, min_hits=3)
+    seen_ids = []
+    for item in range(3):
+        for frame in range(10):
+            results = tracker.update([moving_box(0, frame)], [0], [0.9])
+            seen_ids.extend(track_id for track_id, _, _, _ in results)
+        # Gap between items, longer than max_age
+        for _ in range(5):
+            tracker.update(np.empty((0, 4)), [])
+
+    assert tracker.unique_counts.tolist() == [3, 0]
+    assert sorted(set(seen_ids)) == [1, 2, 3]
+    # Each item kept one ID for all of its frames after confirmation
+    assert [seen_ids.count(i) for i in (1, 2, 3)] == [8, 8, 8]
+
+
+def test_tracker_separates_classes_and_survives_short_misses():
+    """Overlapping boxes of different classes get separate tracks; brief dropouts keep the ID"""
+    tracker = SortTracker(num_classes=3, max_age=5, min_hits=2)
+    ids = {}
+    for frame in range(12):
+        boxes, classes = [moving_box(0, frame)], [0]
+        if frame not in (5, 6):
+            boxes.append(moving_box(2, frame))
+            classes.append(2)
+        for track_id, _, cls, _ in tracker.update(boxes, classes):
+            ids.setdefault(cls, set()).add(track_id)
+
+    assert tracker.unique_counts.tolist() == [1, 0, 1]
+    assert len(ids[0]) == 1 and len(ids[2]) == 1
+    assert ids[0] != ids[2]
+
+
+def test_tracker_ignores_spurious_box_in_first_frame():
+    """A box seen only in the first frame is never confirmed or counted"""
+    tracker = SortTracker(num_classes=2, max_age=3, min_hits=3)
+    first = tracker.update([moving_box(0, 0), [400, 400, 460, 460]], [0, 1])
+    assert first == []
+    for frame in range(1, 6):
+        tracker.update([moving_box(0, frame)], [0])
+
+    assert tracker.unique_counts.tolist() == [1, 0]
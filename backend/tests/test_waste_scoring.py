@@ -0,0 +1,289 @@
+import os
+import re
+import sys
+import time
+import types
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import yaml
+
+# Add the parent directory to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.demand_waste import waste_predictor
+from src.demand_waste.waste_predictor import score_inventory, dedup_profiles
+
+
+def calculate_spoilage_risk(days_since_delivery, shelf_life_days):
+    """The previous per-row spoilage rule."""
+    days_past = days_since_delivery - shelf_life_days
+    if days_past <= 0:
+        return 0.0
+    elif 0 < days_past <= 2:
+        return 0.5
+    elif 2 < days_past <= 5:
+        return 0.8
+    else:
+        return 1.0
+
+
+def calculate_overuse_risk(stock_kg, weekly_usage_kg, shelf_life_days):
+    """The previous per-row overuse rule."""
+    stock_duration = (stock_kg / (weekly_usage_kg / 7)) if weekly_usage_kg > 0 else float('inf')
+    if stock_duration >= shelf_life_days:
+        return 0.0
+    elif stock_duration >= 7:
+        return 0.3
+    elif stock_duration >= 3:
+        return 0.7
+    else:
+        return 1.0
+
+
+def make_inventory(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "ingredient": [f"ingredient_{i}" for i in range(size)],
+        "stock_kg": rng.uniform(0, 20, size).round(1),
+        "days_since_delivery": rng.integers(0, 20, size),
+        "shelf_life_days": rng.integers(1, 15, size),
+        "storage_temp_c": rng.integers(-18, 8, size),
+        "weekly_usage_kg": rng.choice([0.0, 0.5, 3.0, 7.0, 14.0], size)
+    })
+
+
+def test_vectorized_scores_match_per_row_rules():
+    """score_inventory agrees with the scalar heuristics on every row"""
+    df = make_inventory(500)
+    scores = score_inventory(df)
+
+    expected_spoilage = [calculate_spoilage_risk(d, s) for d, s in zip(df["days_since_delivery"], df["shelf_life_days"])]
+    expected_overuse = [calculate_overuse_risk(st, w, s)
+                        for st, w, s in zip(df["stock_kg"], df["weekly_usage_kg"], df["shelf_life_days"])]
+    expected_replenishment = [round(max(0, (w + 0.10 * w) - st), 2) for st, w in zip(df["stock_kg"], df["weekly_usage_kg"])]
+
+    assert scores["spoilage_risk"].tolist() == expected_spoilage
+    assert scores["overuse_risk"].tolist() == expected_overuse
+    np.testing.assert_allclose(scores["suggested_replenishment_kg"], expected_replenishment)
+
+
+def test_missing_rows_and_delivery_dates():
+    """Incomplete rows are flagged in place and days_since_delivery is derived from delivery_date"""
+    df = pd.DataFrame({
+        "ingredient": ["milk", "rice"],
+        "stock_kg": [2.0, None],
+        "delivery_date": ["2024-01-01", "2024-01-05"],
+        "shelf_life_days": [7, 365],
+        "storage_temp_c": [4, 20],
+        "weekly_usage_kg": [7.0, 3.0]
+    })
+    scores = score_inventory(df, current_date=datetime(2024, 1, 10))
+
+    assert scores["days_since_delivery"].tolist() == [9, 5]
+    assert scores.loc[0, "spoilage_risk"] == 0.5
+    assert scores.loc[1, "spoilage_risk"] == "Error: Missing data"
+    assert scores.loc[1, "stock_kg"] is None
+    assert scores.loc[1, "suggested_replenishment_kg"] == 0.0
+
+
+def test_predict_waste_without_llm(monkeypatch):
+    """Risk columns come back without any LLM call when none is configured"""
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    monkeypatch.delenv("LLM_PROVIDER", raising=False)
+    result = waste_predictor.predict_waste(make_inventory(20), config_path=None)
+    assert len(result) == 20
+    assert result["recommended_actions"].map(len).sum() == 0
+    assert set(result["spoilage_risk"]) <= {0.0, 0.5, 0.8, 1.0}
+
+
+def outlet_inventory(outlets, stock_step=0.0):
+    """The same three ingredients at several outlets, optionally with slightly different tomato stock."""
+    rows = []
+    for outlet in range(outlets):
+        rows += [
+            {"ingredient": "Tomato", "stock_kg": 5.0 + stock_step * outlet, "days_since_delivery": 12, "shelf_life_days": 10,
+             "storage_temp_c": 4, "weekly_usage_kg": 7.0},
+            {"ingredient": "tomato ", "stock_kg": 15.0, "days_since_delivery": 1, "shelf_life_days": 10,
+             "storage_temp_c": 4, "weekly_usage_kg": 7.0},
+            {"ingredient": "rice", "stock_kg": 20.0, "days_since_delivery": 3, "shelf_life_days": 365,
+             "storage_temp_c": 20, "weekly_usage_kg": 10.0},
+        ]
+    return pd.DataFrame(rows)
+
+
+def test_dedup_groups_only_identical_profiles():
+    """Identical rows share a profile; a row with different stock gets its own, since actions may quote it"""
+    scores = score_inventory(outlet_inventory(4))
+    representatives, inverse = dedup_profiles(scores)
+    assert representatives.tolist() == [0, 1, 2]
+    assert inverse.tolist() == [0, 1, 2] * 4
+
+    representatives, inverse = dedup_profiles(score_inventory(outlet_inventory(2, stock_step=0.1)))
+    assert representatives.tolist() == [0, 1, 2, 3]
+    assert inverse.tolist() == [0, 1, 2, 3, 1, 2]
+
+
+def test_predict_waste_fans_out_deduplicated_actions(tmp_path):
+    """Only one row per profile is sent to the LLM and every member gets its actions"""
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump({"llm": {"provider": "stub", "backoff_seconds": 0.01}}))
+    prompts = []
+
+    async def fake_invoke(llm, messages):
+        prompts.append(messages[-1].content)
+        names = re.findall(r"Ingredient: ([^,]+),", messages[-1].content)
+        analyses = ", ".join(f"{{'recommended_actions': ['Use {name.strip()}']}}" for name in names)
+        return types.SimpleNamespace(content="{'analyses': [" + analyses + "]}")
+
+    streamed = {}
+    with patch.object(waste_predictor, "invoke_llm_async", fake_invoke):
+        result = waste_predictor.predict_waste(outlet_inventory(10), str(config_path),
+                                               on_actions=lambda positions, actions: streamed.update(zip(positions, actions)))
+
+    assert len(prompts) == 1 and prompts[0].count("Ingredient:") == 3
+    assert result["recommended_actions"].tolist() == [["Use Tomato"], ["Use tomato"], ["Use rice"]] * 10
+    assert [streamed[i] for i in range(30)] == result["recommended_actions"].tolist()
+    stats = result.attrs["llm_stats"]
+    assert (stats["rows"], stats["profiles"], stats["batches"], stats["calls_saved"]) == (30, 3, 1, 9)
+
+
+def test_pack_batches_respects_token_budget():
+    rows = score_inventory(make_inventory(100)).to_dict('records')
+    batches = waste_predictor.pack_batches(rows, "system prompt", max_prompt_tokens=400, max_rows=25)
+    assert sum(len(batch) for batch in batches) == 100
+    assert all(waste_predictor.estimate_tokens("system prompt" + waste_predictor.build_user_input(batch)) <= 400
+               for batch in batches)
+    assert max(len(batch) for batch in batches) > 5
+    assert len(waste_predictor.pack_batches(rows, "system prompt", max_prompt_tokens=10**6, max_rows=25)) == 4
+
+
+def test_count_mismatch_splits_only_failing_batch(tmp_path):
+    """A response with too few analyses is retried as two halves; token usage is recorded per call"""
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump({"demand_waste": {"max_batch_rows": 4, "dedup": {"enabled": False}},
+                                           "llm": {"provider": "stub"}}))
+
+    async def fake_invoke(llm, messages):
+        names = re.findall(r"Ingredient: ([^,]+),", messages[-1].content)
+        # The batch containing ingredient_5 always drops its last analysis until it is small enough
+        if "ingredient_5" in names and len(names) > 2:
+            names = names[:-1]
+        analyses = ", ".join(f"{{'recommended_actions': ['Use {name}']}}" for name in names)
+        return types.SimpleNamespace(content="{'analyses': [" + analyses + "]}",
+                                     usage_metadata={"input_tokens": 100 + len(names), "output_tokens": 10 * len(names)})
+
+    with patch.object(waste_predictor, "invoke_llm_async", fake_invoke):
+        result = waste_predictor.predict_waste(make_inventory(8), str(config_path))
+
+    assert result["recommended_actions"].tolist() == [[f"Use ingredient_{i}"] for i in range(8)]
+    calls = result.attrs["llm_calls"]
+    assert sorted((call["rows"], call["depth"]) for call in calls) == [(2, 1), (2, 1), (4, 0), (4, 0)]
+    assert result.attrs["llm_stats"]["split_calls"] == 2
+    assert result.attrs["llm_stats"]["completion_tokens"] == 10 * (4 + 3 + 2 + 2)
+
+
+def checkpoint_config(tmp_path):
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump({
+        "demand_waste": {"max_batch_rows": 2, "dedup": {"enabled": False},
+                         "checkpoint": {"dir": str(tmp_path / "checkpoints"), "max_age_hours": 1}},
+        "llm": {"provider": "stub", "max_retries": 0, "backoff_seconds": 0.01}
+    }))
+    return str(config_path)
+
+
+def fake_invoke(asked, fail_on=None, before=None):
+    async def invoke(llm, messages):
+        names = re.findall(r"Ingredient: ([^,]+),", messages[-1].content)
+        if before is not None:
+            before(names)
+        if fail_on in names:
+            raise RuntimeError("connection dropped")
+        asked.extend(names)
+        analyses = ", ".join(f"{{'recommended_actions': ['Use {name}']}}" for name in names)
+        return types.SimpleNamespace(content="{'analyses': [" + analyses + "]}")
+    return invoke
+
+
+def test_interrupted_run_resumes_from_checkpoint(tmp_path):
+    """Finished profiles are checkpointed per batch; a rerun only asks for the missing ones"""
+    config_path = checkpoint_config(tmp_path)
+    asked = []
+
+    with patch.object(waste_predictor, "invoke_llm_async", fake_invoke(asked, fail_on="ingredient_4")):
+        first = waste_predictor.predict_waste(make_inventory(6), config_path, checkpoint=True)
+    assert first["recommended_actions"].tolist()[4] == ["Fallback: Consult inventory manager"]
+    [checkpoint_path] = (tmp_path / "checkpoints").iterdir()
+    assert len(checkpoint_path.read_text().splitlines()) == 4
+    # A write cut short by the interruption is skipped on load
+    with open(checkpoint_path, "a") as f:
+        f.write('{"key": "abc", "actions": ["Use')
+
+    asked.clear()
+    with patch.object(waste_predictor, "invoke_llm_async", fake_invoke(asked)):
+        second = waste_predictor.predict_waste(make_inventory(6), config_path, checkpoint=True)
+    assert asked == ["ingredient_4", "ingredient_5"]
+    assert second["recommended_actions"].tolist() == [[f"Use ingredient_{i}"] for i in range(6)]
+    assert second.attrs["llm_stats"]["resumed"] == 4
+    assert not checkpoint_path.exists()
+
+
+def test_calls_saved_ignores_checkpointed_profiles(tmp_path):
+    """Dedup savings are the same for a resumed run as for the run it resumes"""
+    config_path = tmp_path / "config.yaml"
+    config_path.write_text(yaml.safe_dump({
+        "demand_waste": {"max_batch_rows": 2,
+                         "checkpoint": {"dir": str(tmp_path / "checkpoints"), "max_age_hours": 1}},
+        "llm": {"provider": "stub", "max_retries": 0, "backoff_seconds": 0.01}
+    }))
+    asked = []
+
+    with patch.object(waste_predictor, "invoke_llm_async", fake_invoke(asked, fail_on="rice")):
+        first = waste_predictor.predict_waste(outlet_inventory(10), str(config_path), checkpoint=True)
+    with patch.object(waste_predictor, "invoke_llm_async", fake_invoke(asked)):
+        second = waste_predictor.predict_waste(outlet_inventory(10), str(config_path), checkpoint=True)
+
+    assert second.attrs["llm_stats"]["resumed"] == 2
+    assert second.attrs["llm_stats"]["batches"] == 1
+    assert second.attrs["llm_stats"]["calls_saved"] == first.attrs["llm_stats"]["calls_saved"] == 18
+
+
+def test_overlapping_runs_keep_separate_checkpoints(tmp_path):
+    """A run finishing (and clearing its checkpoint) mid-way through another leaves the other's intact"""
+    import threading
+
+    config_path = checkpoint_config(tmp_path)
+    other_inventory = make_inventory(6).assign(ingredient=lambda df: "other_" + df["ingredient"])
+    other_done = threading.Event()
+    asked = []
+
+    def run_other(names):
+        if "ingredient_4" in names and not other_done.is_set():
+            other_done.set()
+            other = threading.Thread(target=waste_predictor.predict_waste, args=(other_inventory, config_path),
+                                     kwargs={"checkpoint": True})
+            other.start()
+            other.join()
+
+    # The other run starts and finishes while this one's last batch is in flight
+    with patch.object(waste_predictor, "invoke_llm_async", fake_invoke(asked, fail_on="ingredient_4", before=run_other)):
+        waste_predictor.predict_waste(make_inventory(6), config_path, checkpoint=True)
+    assert [name for name in asked if name.startswith("other_")] == list(other_inventory["ingredient"])
+    [checkpoint_path] = (tmp_path / "checkpoints").iterdir()
+    assert len(checkpoint_path.read_text().splitlines()) == 4
+
+    # API-style runs never write checkpoints
+    with patch.object(waste_predictor, "invoke_llm_async", fake_invoke([], fail_on="ingredient_4")):
+        waste_predictor.predict_waste(other_inventory, config_path)
+    assert list((tmp_path / "checkpoints").iterdir()) == [checkpoint_path]
+
+    # An expired checkpoint is not resumed from
+    os.utime(checkpoint_path, (time.time() - 7200, time.time() - 7200))
+    asked.clear()
+    with patch.object(waste_predictor, "invoke_llm_async", fake_invoke(asked)):
+        rerun = waste_predictor.predict_waste(make_inventory(6), config_path, checkpoint=True)
+    assert sorted(asked) == [f"ingredient_{i}" for i in range(6)]
+    assert rerun.attrs["llm_stats"]["resumed"] == 0